@@ -8,17 +8,29 @@ __copyright__ = "Copyright 2019 United Kingdom Research and Innovation"
 __license__ = "BSD - see LICENSE file in top-level directory"
 __contact__ = "Philip.Kershaw@stfc.ac.uk"
 import logging
-import stat
+import time
 import base64
 import os
-import errno
 import json
+import ssl
+import tempfile
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 
 import six
 import requests
-import requests_oauthlib
+import requests.adapters
 from OpenSSL import crypto
-from asn1crypto.x509 import BasicConstraints
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+from contrail.security.onlineca.client.openssl_utils import (
+    iter_pem_der,
+    PemParseError,
+)
+from contrail.security.onlineca.client.trustroots_sync import sync_trustroots_dir
 
 if six.PY2:
     _unicode_conv = lambda string_: string_
@@ -29,7 +41,41 @@ else:
 log = logging.getLogger(__name__)
 
 
-class OnlineCaClientErrorResponse(Exception):
+def _write_file_atomic(filepath, content):
+    """Write file with user-only read/write permissions. Regular files are
+    written to a temporary file in the same directory and renamed so that
+    readers never see a partially written file
+
+    :param filepath: output file path
+    :param content: file content
+    :type content: bytes
+    """
+    if os.path.exists(filepath) and not os.path.isfile(filepath):
+        # Device or pipe e.g. /dev/stdout - can only write in place
+        with open(filepath, "wb") as out_file:
+            out_file.write(content)
+        return
+
+    # mkstemp creates the file with 0o600 mode
+    tmp_file_desc, tmp_filepath = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(filepath)),
+        prefix="." + os.path.basename(filepath) + ".",
+    )
+    try:
+        with os.fdopen(tmp_file_desc, "wb") as tmp_file:
+            tmp_file.write(content)
+
+        os.replace(tmp_filepath, filepath)
+    except BaseException:
+        os.unlink(tmp_filepath)
+        raise
+
+
+class OnlineCaClientError(Exception):
+    """Base class for Online CA client errors"""
+
+
+class OnlineCaClientErrorResponse(OnlineCaClientError):
     """Error response for Online CA client"""
 
     def __init__(self, message, http_resp):
@@ -42,25 +88,278 @@ class OnlineCaClientErrorResponse(Exception):
         self.http_resp = http_resp
 
 
+# Result of an individual job from a bulk issuance call. key_pair and certs
+# are None and error is set to the exception raised if the job failed
+CertificateJobResult = namedtuple(
+    "CertificateJobResult", ("job", "key_pair", "certs", "error")
+)
+
+
+class _SSLContextPoolAdapter(requests.adapters.HTTPAdapter):
+    """HTTPAdapter whose connection pools verify servers against the CA
+    certificates held in an SSL context only"""
+
+    def __init__(self, ssl_context, *args, **kwargs):
+        self.ssl_context = ssl_context
+        super(_SSLContextPoolAdapter, self).__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **pool_kwargs):
+        # Pass the context to every connection pool. This is supported by all
+        # requests versions unlike the pool key hooks added in requests 2.32
+        pool_kwargs["ssl_context"] = self.ssl_context
+        super(_SSLContextPoolAdapter, self).init_poolmanager(*args, **pool_kwargs)
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        proxy_kwargs["ssl_context"] = self.ssl_context
+        return super(_SSLContextPoolAdapter, self).proxy_manager_for(
+            proxy, **proxy_kwargs
+        )
+
+    def cert_verify(self, conn, url, verify, cert):
+        # CA certificates are held in the SSL context - don't load any others
+        super(_SSLContextPoolAdapter, self).cert_verify(conn, url, True, cert)
+        conn.ca_certs = None
+        conn.ca_cert_dir = None
+
+
+class SSLContextHTTPAdapter(requests.adapters.BaseAdapter):
+    """Transport adapter which verifies servers against CA certificates held
+    in an SSL context. This avoids re-reading and parsing a CA directory each
+    time a new connection is made. The context is applied only to requests
+    made with verify set to the CA directory it was created from. Other
+    requests are passed to a requests.adapters.HTTPAdapter e.g. for calls to an
+    OAuth service verified against the default CA bundle.
+
+    Each verify setting is given its own adapter and so its own connection
+    pools. A connection opened without verification to bootstrap trust roots
+    is never re-used for a request which expects the server to be verified
+    """
+
+    def __init__(
+        self,
+        pool_connections=requests.adapters.DEFAULT_POOLSIZE,
+        pool_maxsize=requests.adapters.DEFAULT_POOLSIZE,
+        max_retries=requests.adapters.DEFAULT_RETRIES,
+        pool_block=requests.adapters.DEFAULT_POOLBLOCK,
+    ):
+        super(SSLContextHTTPAdapter, self).__init__()
+        self._adapter_kwargs = dict(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=max_retries,
+            pool_block=pool_block,
+        )
+        self._adapters = {}
+        self._adapters_lock = threading.Lock()
+        self.__ssl_context = None
+        self.ca_cert_dir = None
+
+    @property
+    def ssl_context(self):
+        return self.__ssl_context
+
+    @ssl_context.setter
+    def ssl_context(self, val):
+        with self._adapters_lock:
+            if val is self.__ssl_context:
+                return
+
+            self.__ssl_context = val
+
+            # Drop connections verified against the previous context
+            stale_keys = [key for key in self._adapters if key[0]]
+            stale_adapters = [self._adapters.pop(key) for key in stale_keys]
+
+        for adapter in stale_adapters:
+            adapter.close()
+
+    def get_adapter(self, verify):
+        """Get the adapter for a given verify setting, creating it if needed
+
+        :param verify: verify setting for request as passed to send
+        :return: requests.adapters.HTTPAdapter
+        """
+        with self._adapters_lock:
+            use_ssl_context = (
+                self.__ssl_context is not None
+                and verify is not None
+                and verify == self.ca_cert_dir
+            )
+            key = (use_ssl_context, verify)
+            adapter = self._adapters.get(key)
+            if adapter is None:
+                if use_ssl_context:
+                    adapter = _SSLContextPoolAdapter(
+                        self.__ssl_context, **self._adapter_kwargs
+                    )
+                else:
+                    adapter = requests.adapters.HTTPAdapter(**self._adapter_kwargs)
+
+                self._adapters[key] = adapter
+
+        return adapter
+
+    def send(
+        self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None
+    ):
+        return self.get_adapter(verify).send(
+            request,
+            stream=stream,
+            timeout=timeout,
+            verify=verify,
+            cert=cert,
+            proxies=proxies,
+        )
+
+    def close(self):
+        """Close all pooled connections"""
+        with self._adapters_lock:
+            adapters = list(self._adapters.values())
+            self._adapters.clear()
+
+        for adapter in adapters:
+            adapter.close()
+
+
 class OnlineCaClient(object):
     """Client to Online Certificate Authority Service"""
 
     PRIKEY_NBITS = 2048
+
+    # Supported key algorithms for certificate requests. Elliptic curve keys
+    # are much faster to generate than RSA keys of equivalent strength
+    KEY_TYPE_RSA = "rsa"
+    KEY_TYPE_EC_P256 = "ec-p256"
+    KEY_TYPE_EC_P384 = "ec-p384"
+    KEY_TYPE_ED25519 = "ed25519"
+    KEY_TYPES = (KEY_TYPE_RSA, KEY_TYPE_EC_P256, KEY_TYPE_EC_P384, KEY_TYPE_ED25519)
+    DEF_KEY_TYPE = KEY_TYPE_RSA
+    EC_KEY_TYPE_CURVES = {
+        KEY_TYPE_EC_P256: ec.SECP256R1,
+        KEY_TYPE_EC_P384: ec.SECP384R1,
+    }
+    RSA_PUBLIC_EXPONENT = 65537
+
+    # Library used to create key pairs and certificate requests. With
+    # cryptography, key pairs are cryptography private key objects and
+    # certificate requests are created with its builder interface without
+    # any conversion to or from pyOpenSSL objects
+    CRYPTO_BACKEND_PYOPENSSL = "pyopenssl"
+    CRYPTO_BACKEND_CRYPTOGRAPHY = "cryptography"
+    CRYPTO_BACKENDS = (CRYPTO_BACKEND_PYOPENSSL, CRYPTO_BACKEND_CRYPTOGRAPHY)
+    DEF_CRYPTO_BACKEND = CRYPTO_BACKEND_PYOPENSSL
+
     MESSAGE_DIGEST_TYPE = "sha256"
     CERT_REQ_POST_PARAM_KEYNAME = b"certificate_request"
     TRUSTED_CERTS_FIELDNAME = b"TRUSTED_CERTS"
     TRUSTED_CERTS_FILEDATA_FIELDNAME_PREFIX = b"FILEDATA_"
     PEM_CERT_BEGIN_DELIM = "-----BEGIN CERTIFICATE-----"
+
+    # Deprecated: no longer used as the CA flag is read with cryptography.
+    # Kept for compatibility with code which refers to them
     X509_BASIC_CONSTR_FIELDNAME = b"basicConstraints"
     X509_BASIC_CONSTR_CAFLAG_FIELDNAME = "ca"
 
+    # Connection pool settings for HTTP connections to the Online CA service.
+    # Connections are kept alive and re-used across calls so that repeated
+    # requests to the same server avoid a new TCP connection and TLS handshake
+    DEF_HTTP_POOL_CONNECTIONS = 10
+    DEF_HTTP_POOL_MAXSIZE = 10
+    DEF_HTTP_MAX_RETRIES = 0
+
+    # Default number of worker threads for bulk issuance
+    DEF_N_BATCH_WORKERS = 4
+
+    # HTTP cache validators from the last trust roots download are saved in a
+    # hidden file in ca_cert_dir so that refreshes can use a conditional GET.
+    # Files starting with "." are never trust roots
+    TRUSTROOTS_VALIDATORS_FILENAME = ".trustroots_validators.json"
+
+    # Size of chunks read from the response when streaming trust roots
+    TRUSTROOTS_CHUNK_SIZE = 65536
+
     # Optionally, OAuth Access Token can be stored and retrieved from this
     # default location
     DEF_OAUTH_TOK_FILENAME = ".onlinecaclient_token.json"
     DEF_OAUTH_TOK_FILEPATH = os.path.join(os.environ["HOME"], DEF_OAUTH_TOK_FILENAME)
 
-    def __init__(self):
+    # Access tokens are refreshed when they are due to expire within this
+    # number of seconds. See oauth_refresh_settings
+    OAUTH_TOK_REFRESH_MARGIN = 300
+    OAUTH_REFRESH_SETTINGS_KEYS = ("token_url", "client_id", "client_secret")
+
+    def __init__(
+        self,
+        http_pool_connections=DEF_HTTP_POOL_CONNECTIONS,
+        http_pool_maxsize=DEF_HTTP_POOL_MAXSIZE,
+        http_pool_block=False,
+        http_max_retries=DEF_HTTP_MAX_RETRIES,
+    ):
+        """
+        :param http_pool_connections: number of hosts for which to keep a
+        connection pool
+        :param http_pool_maxsize: maximum number of connections kept alive in
+        the pool for each host
+        :param http_pool_block: set to True to block when all connections
+        for a host are in use rather than opening a new, un-pooled connection
+        :param http_max_retries: number of retries for failed connections
+        """
         self.__ca_cert_dir = None
+        self.__trustroots_atomic_swap = False
+        self.__key_pair_pool = None
+        self.__key_type = self.__class__.DEF_KEY_TYPE
+        self.__crypto_backend = self.__class__.DEF_CRYPTO_BACKEND
+        self.__credential_cache = None
+        self.__chain_cache = None
+        self.__ssl_context = None
+        self.__ssl_context_cadata = None
+        self.__oauth_refresh_settings = None
+
+        # Adapter holds the connection pools. It is shared by all the sessions
+        # created by this client, each of which applies its own credentials
+        self.__http_adapter = SSLContextHTTPAdapter(
+            pool_connections=http_pool_connections,
+            pool_maxsize=http_pool_maxsize,
+            pool_block=http_pool_block,
+            max_retries=http_max_retries,
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Close pooled connections to the Online CA service"""
+        self.__http_adapter.close()
+
+    @property
+    def http_adapter(self):
+        """Transport adapter holding the pool of connections to the Online CA
+        service"""
+        return self.__http_adapter
+
+    def mount_http_adapter(self, session):
+        """Set a session to use this client's connection pool and SSL context
+
+        :param session: requests.Session or derived type
+        :return: the input session
+        """
+        self.__http_adapter.ssl_context = self.ssl_context
+
+        for prefix in ("https://", "http://"):
+            session.mount(prefix, self.__http_adapter)
+
+        return session
+
+    def create_http_session(self):
+        """Create a session which shares this client's connection pool. Set
+        credentials on the session returned as required
+
+        :return: new requests.Session
+        """
+        return self.mount_http_adapter(requests.Session())
 
     @property
     def ca_cert_dir(self):
@@ -74,32 +373,326 @@ class OnlineCaClient(object):
             )
 
         self.__ca_cert_dir = val
+        self._set_ssl_context(None, None)
+
+    @property
+    def trustroots_atomic_swap(self):
+        """Set to True to update ca_cert_dir atomically when trust roots are
+        written to it. The directory is then maintained as a symbolic link to
+        the current version. This applies only to a directory created in this
+        way - an existing directory is always updated in place. See
+        trustroots_sync module"""
+        return self.__trustroots_atomic_swap
+
+    @trustroots_atomic_swap.setter
+    def trustroots_atomic_swap(self, val):
+        if not isinstance(val, bool):
+            raise TypeError(
+                'Expecting bool type for "trustroots_atomic_swap"; got %r' % type(val)
+            )
+
+        self.__trustroots_atomic_swap = val
+
+    @property
+    def ssl_context(self):
+        """SSL context holding the CA certificates from ca_cert_dir. It is
+        created on first use and re-used for all connections until either
+        ca_cert_dir is changed or different trust roots are written to it
+
+        :return: ssl.SSLContext or None if ca_cert_dir isn't set or contains
+        no CA certificates
+        """
+        if self.__ssl_context is None and self.__ca_cert_dir is not None:
+            self._update_ssl_context(self._read_ca_cert_dir(self.__ca_cert_dir))
+
+        return self.__ssl_context
+
+    @classmethod
+    def create_ssl_context(cls, files_dict):
+        """Create SSL context for verifying the Online CA service from CA
+        trust root files
+
+        :param files_dict: dictionary of file names and file contents as
+        returned from get_trustroots
+        :return: ssl.SSLContext or None if there are no CA certificates
+        """
+        cadata = cls._get_cadata(files_dict)
+        if not cadata:
+            return None
+
+        return ssl.create_default_context(cadata=cadata)
+
+    @staticmethod
+    def _get_cadata(files_dict):
+        """Get DER encoded CA certificates from trust root files with any
+        duplicates, such as those reached through hash links, removed
+
+        :param files_dict: dictionary of file names and file contents
+        :return: concatenated DER encoded certificates
+        """
+        ders = []
+        ders_found = set()
+        for file_name in sorted(files_dict):
+            try:
+                for der in iter_pem_der(files_dict[file_name]):
+                    if der not in ders_found:
+                        ders_found.add(der)
+                        ders.append(der)
+            except PemParseError as e:
+                log.warning("Ignoring CA trust root file %r: %s", file_name, e)
+
+        return b"".join(ders)
+
+    def _update_ssl_context(self, files_dict):
+        """Re-create SSL context from trust root files if the CA certificates
+        they contain have changed"""
+        cadata = self._get_cadata(files_dict)
+        if self.__ssl_context is not None and cadata == self.__ssl_context_cadata:
+            return
+
+        self._set_ssl_context(
+            ssl.create_default_context(cadata=cadata) if cadata else None, cadata
+        )
+
+    def _set_ssl_context(self, ssl_context, cadata):
+        self.__ssl_context = ssl_context
+        self.__ssl_context_cadata = cadata
+        self.__http_adapter.ca_cert_dir = self.__ca_cert_dir
+        self.__http_adapter.ssl_context = ssl_context
+
+    @staticmethod
+    def _read_ca_cert_dir(ca_cert_dir):
+        """Read files from CA directory
+
+        :param ca_cert_dir: CA directory path
+        :return: dictionary of file names and file contents
+        """
+        files_dict = {}
+        try:
+            file_names = os.listdir(ca_cert_dir)
+        except (IOError, OSError):
+            return files_dict
+
+        for file_name in file_names:
+            file_path = os.path.join(ca_cert_dir, file_name)
+            if file_name.startswith(".") or not os.path.isfile(file_path):
+                continue
+
+            with open(file_path, "rb") as trustroot_file:
+                files_dict[file_name] = trustroot_file.read()
+
+        return files_dict
+
+    @property
+    def key_type(self):
+        """Key algorithm for key pairs created for certificate requests - one
+        of KEY_TYPES"""
+        return self.__key_type
+
+    @key_type.setter
+    def key_type(self, val):
+        if val not in self.__class__.KEY_TYPES:
+            raise ValueError(
+                "Expecting one of %r for key_type; got %r"
+                % (self.__class__.KEY_TYPES, val)
+            )
+
+        self.__key_type = val
+
+    @property
+    def crypto_backend(self):
+        """Library used to create key pairs and certificate requests - one of
+        CRYPTO_BACKENDS. Key pairs returned from get certificate calls are
+        OpenSSL.crypto.PKey objects for pyopenssl and cryptography private
+        key objects for cryptography"""
+        return self.__crypto_backend
+
+    @crypto_backend.setter
+    def crypto_backend(self, val):
+        if val not in self.__class__.CRYPTO_BACKENDS:
+            raise ValueError(
+                "Expecting one of %r for crypto_backend; got %r"
+                % (self.__class__.CRYPTO_BACKENDS, val)
+            )
+
+        self.__crypto_backend = val
+
+    @property
+    def credential_cache(self):
+        """Optional cache of issued credentials. If set, get_certificate and
+        get_delegated_certificate return a cached credential for the same
+        server, identity and password or token provided that it is not due to
+        expire. See
+        contrail.security.onlineca.client.credential_cache.CredentialCache
+        """
+        return self.__credential_cache
+
+    @credential_cache.setter
+    def credential_cache(self, val):
+        if val is not None and not (
+            callable(getattr(val, "get", None)) and callable(getattr(val, "put", None))
+        ):
+            raise TypeError(
+                'Expecting credential cache object with "get" and "put" '
+                'methods for "credential_cache"; got %r' % type(val)
+            )
+
+        self.__credential_cache = val
+
+    @property
+    def chain_cache(self):
+        """Optional cache of CA certificates returned in the chain of trust
+        with issued certificates. If set, these certificates are parsed and
+        PEM encoded once only rather than for every certificate issued. See
+        contrail.security.onlineca.client.chain_cache.CertificateChainCache
+        """
+        return self.__chain_cache
+
+    @chain_cache.setter
+    def chain_cache(self, val):
+        if val is not None and not all(
+            callable(getattr(val, name, None))
+            for name in ("fingerprint", "get", "put", "get_pem")
+        ):
+            raise TypeError(
+                'Expecting certificate chain cache object for "chain_cache"; '
+                "got %r" % type(val)
+            )
+
+        self.__chain_cache = val
+
+    @property
+    def key_pair_pool(self):
+        """Optional pool of pre-generated key pairs. If set, key pairs for
+        certificate requests are taken from the pool rather than generated
+        inline. See contrail.security.onlineca.client.key_pool.KeyPairPool
+        """
+        return self.__key_pair_pool
+
+    @key_pair_pool.setter
+    def key_pair_pool(self, val):
+        if val is not None and not callable(getattr(val, "get", None)):
+            raise TypeError(
+                'Expecting key pair pool object with a "get" method for '
+                '"key_pair_pool"; got %r' % type(val)
+            )
+
+        self.__key_pair_pool = val
+
+    @property
+    def oauth_refresh_settings(self):
+        """Optional settings for refreshing OAuth access tokens with the
+        refresh token saved with them. If set, get_delegated_certificate
+        refreshes access tokens which have expired or are due to expire
+        within OAUTH_TOK_REFRESH_MARGIN seconds so that the interactive flow
+        to obtain a new token isn't needed.
+
+        Dictionary with token_url, client_id and client_secret keys as set in
+        the identity provider settings file. Optionally, tok_filepath sets the
+        file to write refreshed tokens to. It defaults to
+        DEF_OAUTH_TOK_FILEPATH
+        """
+        return self.__oauth_refresh_settings
+
+    @oauth_refresh_settings.setter
+    def oauth_refresh_settings(self, val):
+        if val is not None:
+            if not isinstance(val, dict):
+                raise TypeError(
+                    'Expecting dict type for "oauth_refresh_settings"; got %r'
+                    % type(val)
+                )
+
+            missing_keys = [
+                key
+                for key in self.__class__.OAUTH_REFRESH_SETTINGS_KEYS
+                if not val.get(key)
+            ]
+            if missing_keys:
+                raise ValueError(
+                    'Missing %r settings for "oauth_refresh_settings"' % missing_keys
+                )
+
+        self.__oauth_refresh_settings = val
 
     @staticmethod
-    def create_key_pair(n_bits_for_key=PRIKEY_NBITS):
+    def create_key_pair(
+        n_bits_for_key=PRIKEY_NBITS,
+        key_type=DEF_KEY_TYPE,
+        crypto_backend=DEF_CRYPTO_BACKEND,
+    ):
         """Generate key pair and return as PEM encoded string
         :type n_bits_for_key: int
         :param n_bits_for_key: number of bits for private key generation -
-        default is 2048
-        :rtype: OpenSSL.crypto.PKey
+        default is 2048. This applies to RSA keys only
+        :type key_type: string
+        :param key_type: key algorithm, one of OnlineCaClient.KEY_TYPES -
+        default is RSA
+        :type crypto_backend: string
+        :param crypto_backend: library used to create the key pair, one of
+        OnlineCaClient.CRYPTO_BACKENDS - default is pyOpenSSL
+        :rtype: OpenSSL.crypto.PKey or cryptography private key
         :return: public/private key pair
         """
-        key_pair = crypto.PKey()
-        key_pair.generate_key(crypto.TYPE_RSA, n_bits_for_key)
+        if crypto_backend not in OnlineCaClient.CRYPTO_BACKENDS:
+            raise ValueError(
+                "Expecting one of %r for crypto_backend; got %r"
+                % (OnlineCaClient.CRYPTO_BACKENDS, crypto_backend)
+            )
+
+        if (
+            key_type == OnlineCaClient.KEY_TYPE_RSA
+            and crypto_backend == OnlineCaClient.CRYPTO_BACKEND_PYOPENSSL
+        ):
+            key_pair = crypto.PKey()
+            key_pair.generate_key(crypto.TYPE_RSA, n_bits_for_key)
+            return key_pair
+
+        if key_type == OnlineCaClient.KEY_TYPE_RSA:
+            crypto_key = rsa.generate_private_key(
+                OnlineCaClient.RSA_PUBLIC_EXPONENT, n_bits_for_key
+            )
+
+        elif key_type in OnlineCaClient.EC_KEY_TYPE_CURVES:
+            curve = OnlineCaClient.EC_KEY_TYPE_CURVES[key_type]
+            crypto_key = ec.generate_private_key(curve())
+
+        elif key_type == OnlineCaClient.KEY_TYPE_ED25519:
+            crypto_key = ed25519.Ed25519PrivateKey.generate()
+        else:
+            raise ValueError(
+                "Expecting one of %r for key_type; got %r"
+                % (OnlineCaClient.KEY_TYPES, key_type)
+            )
+
+        if crypto_backend == OnlineCaClient.CRYPTO_BACKEND_CRYPTOGRAPHY:
+            return crypto_key
 
-        return key_pair
+        return crypto.PKey.from_cryptography_key(crypto_key)
 
     @staticmethod
     def create_cert_req(key_pair, message_digest=MESSAGE_DIGEST_TYPE):
         """Create a certificate request.
 
-        :type key_pair: string/None
-        :param key_pair: public/private key pair
+        :type key_pair: OpenSSL.crypto.PKey or cryptography private key
+        :param key_pair: public/private key pair. The certificate request is
+        created with the library the key pair object is from
         :type message_digest: basestring
-        :param message_digest: message digest type - default is MD5
-        :rtype: base string
-        :return: certificate request PEM text and private key PEM text
+        :param message_digest: message digest type - default is SHA-256
+        :rtype: bytes
+        :return: certificate request PEM text
         """
+        if not isinstance(key_pair, crypto.PKey):
+            return OnlineCaClient._create_cert_req_with_builder(
+                key_pair, message_digest
+            )
+
+        # Ed25519 signatures take no separate message digest which isn't
+        # supported by PyOpenSSL's X509Req.sign. Use cryptography instead
+        if key_pair.type() not in (crypto.TYPE_RSA, crypto.TYPE_EC):
+            return OnlineCaClient._create_cert_req_with_builder(
+                key_pair.to_cryptography_key(), message_digest
+            )
 
         # Check all required certificate request DN parameters are set
         # Create certificate request
@@ -115,7 +708,35 @@ class OnlineCaClient(object):
 
         return cert_req_s
 
-    def get_certificate_using_session(self, session, server_url, pem_out_filepath=None):
+    @staticmethod
+    def _create_cert_req_with_builder(crypto_key, message_digest):
+        """Create a certificate request with cryptography's builder interface
+
+        :param crypto_key: cryptography private key
+        :param message_digest: message digest type e.g. "sha256". This is
+        ignored for Ed25519 keys which take no separate message digest
+        :return: certificate request PEM text
+        """
+        if isinstance(crypto_key, ed25519.Ed25519PrivateKey):
+            algorithm = None
+        else:
+            try:
+                algorithm = getattr(hashes, message_digest.upper())()
+            except AttributeError:
+                raise ValueError(
+                    "Unsupported message digest type %r" % message_digest
+                ) from None
+
+        csr = (
+            x509.CertificateSigningRequestBuilder()
+            .subject_name(x509.Name([]))
+            .sign(crypto_key, algorithm)
+        )
+        return csr.public_bytes(serialization.Encoding.PEM)
+
+    def get_certificate_using_session(
+        self, session, server_url, pem_out_filepath=None, key_pair=None, cert_req=None
+    ):
         """Obtain a create a new key pair and invoke the SLCS service to obtain
         a certificate using authentication method determined by input session
         object: the latter can be username/password using HTTPBasicAuth object
@@ -127,6 +748,11 @@ class OnlineCaClient(object):
         :param server_url: URL for get certificate endpoint
         :param pem_out_filepath: optionally set output path for file containing
         concatenated private key and certificate issued
+        :param key_pair: optionally set a key pair generated in advance e.g.
+        by contrail.security.onlineca.client.cert_req_engine.CertReqEngine.
+        If omitted, a new key pair is created
+        :param cert_req: PEM encoded certificate request for key_pair. If
+        omitted, it is created from key_pair
         :return: tuple of key pair object and certificate
         """
         if not isinstance(session, requests.Session):
@@ -136,8 +762,9 @@ class OnlineCaClient(object):
                 "object"
             )
 
-        key_pair = self.__class__.create_key_pair()
-        cert_req = self.__class__.create_cert_req(key_pair)
+        key_pair, cert_req = self._create_key_pair_and_cert_req(
+            key_pair=key_pair, cert_req=cert_req
+        )
 
         req = {self.__class__.CERT_REQ_POST_PARAM_KEYNAME: cert_req}
 
@@ -149,25 +776,105 @@ class OnlineCaClient(object):
                 res,
             )
 
+        endentity_cert, certchain = self._parse_cert_resp(
+            res.content, chain_cache=self.chain_cache
+        )
+
+        # Optionally output the private key and certificate together PEM
+        # encoded in a single file. Any additional certificate chain is appended
+        # to the end of the output
+        if pem_out_filepath:
+            self._write_pem_out(
+                pem_out_filepath,
+                key_pair,
+                endentity_cert,
+                certchain,
+                chain_cache=self.chain_cache,
+            )
+
+        return key_pair, (endentity_cert,) + tuple(certchain)
+
+    def _create_key_pair_and_cert_req(self, key_pair=None, cert_req=None):
+        """Create key pair and certificate request for a get certificate call.
+        The key pair is taken from the key pair pool if one is set
+
+        :param key_pair: optionally set a key pair generated in advance
+        :param cert_req: PEM encoded certificate request for key_pair
+        :return: tuple of key pair object and PEM encoded certificate request
+        """
+        if key_pair is None:
+            if cert_req is not None:
+                raise TypeError("cert_req is set but no key_pair was given")
+
+            if self.key_pair_pool is not None:
+                self._check_key_pair_pool(self.key_pair_pool)
+                key_pair = self.key_pair_pool.get()
+            else:
+                key_pair = self.__class__.create_key_pair(
+                    key_type=self.key_type, crypto_backend=self.crypto_backend
+                )
+
+        if cert_req is None:
+            cert_req = self.__class__.create_cert_req(key_pair)
+
+        return key_pair, cert_req
+
+    def _check_key_pair_pool(self, key_pair_pool):
+        """Check that key pairs from the pool match the key type and crypto
+        backend set for this client. Pools which don't declare these settings
+        are trusted to match
+
+        :param key_pair_pool: key pair pool object
+        :raises OnlineCaClientError: pool settings differ from this client's
+        """
+        for name in ("key_type", "crypto_backend"):
+            pool_val = getattr(key_pair_pool, name, None)
+            client_val = getattr(self, name)
+            if pool_val is not None and pool_val != client_val:
+                raise OnlineCaClientError(
+                    "Key pair pool %s %r doesn't match client %s %r"
+                    % (name, pool_val, name, client_val)
+                )
+
+    @classmethod
+    def _parse_cert_resp(cls, content, chain_cache=None):
+        """Parse response from get certificate call
+
+        :param content: response body
+        :type content: bytes
+        :param chain_cache: optional cache of CA certificates. CA certificates
+        found in the cache are not parsed again and new ones are added to it
+        :return: tuple of end entity certificate and list of CA certificates
+        in the chain of trust
+        """
         # Response contains PEM-encoded certificate just issued + any additional
         # CA certificates in the chain of trust configured on the server-side.
-        # Parse into OpenSSL.crypto.X509 objects
-        cert_s = res.content.decode(encoding="utf-8")
+        # Parse into OpenSSL.crypto.X509 objects in a single pass over the
+        # response
         certchain = []
         endentity_cert = None
-        for pem_cert_frag in cert_s.split(self.PEM_CERT_BEGIN_DELIM)[1:]:
-            pem_cert = self.PEM_CERT_BEGIN_DELIM + pem_cert_frag
-
-            cert = crypto.load_certificate(crypto.FILETYPE_PEM, pem_cert)
-
+        for der in iter_pem_der(content):
             # Separate certificates into the end entity certificate and any
             # certificates in an intermediate chain of trust to the root.
             # The end entity certificate ought to be the first but this code
-            # does a sanity check
-            if self._is_ca_certificate(cert):
+            # does a sanity check. The CA flag is read from the DER directly
+            # so that only CA certificates are looked up in the cache
+            is_ca = cls._is_ca_certificate(x509.load_der_x509_certificate(der))
+            if is_ca and chain_cache is not None:
+                fingerprint = chain_cache.fingerprint(der)
+                cached_cert = chain_cache.get(fingerprint)
+                if cached_cert is not None:
+                    certchain.append(cached_cert.cert)
+                    continue
+
+            cert = crypto.load_certificate(crypto.FILETYPE_ASN1, der)
+            if is_ca:
                 # If it's a CA certificate, then it must be part of the
                 # intermediate chain. Nb. RFC3820 Proxy certificates are not
                 # supported here
+                if chain_cache is not None:
+                    chain_cache.put(fingerprint, cert)
+
                 certchain.append(cert)
             else:
                 # check for more than one end entity certificate
@@ -180,24 +887,56 @@ class OnlineCaClient(object):
 
                 endentity_cert = cert
 
-        # Optionally output the private key and certificate together PEM
-        # encoded in a single file. Any additional certificate chain is appended
-        # to the end of the output
-        if pem_out_filepath:
+        return endentity_cert, certchain
+
+    @staticmethod
+    def serialise_credential(key_pair, endentity_cert, certchain, chain_cache=None):
+        """Serialise private key and certificate together PEM encoded followed
+        by any additional certificate chain. This is the format written to
+        pem_out_filepath by the get certificate calls
+
+        :param chain_cache: optional cache of CA certificates. PEM encodings
+        held in the cache are used instead of encoding the certificates again
+
+        :return: PEM encoded credential
+        :rtype: bytes
+        """
+        if isinstance(key_pair, crypto.PKey):
             pem_pkey = crypto.dump_privatekey(crypto.FILETYPE_PEM, key_pair)
-            pem_endentity_cert = crypto.dump_certificate(
-                crypto.FILETYPE_PEM, endentity_cert
+        else:
+            # PKCS#8 as written by pyOpenSSL
+            pem_pkey = key_pair.private_bytes(
+                serialization.Encoding.PEM,
+                serialization.PrivateFormat.PKCS8,
+                serialization.NoEncryption(),
             )
-            pem_certchain = b""
-            for cacert in certchain:
-                pem_certchain += crypto.dump_certificate(crypto.FILETYPE_PEM, cacert)
+        pem_endentity_cert = crypto.dump_certificate(
+            crypto.FILETYPE_PEM, endentity_cert
+        )
+        pem_certchain = b""
+        for cacert in certchain:
+            pem_cacert = chain_cache.get_pem(cacert) if chain_cache else None
+            if pem_cacert is None:
+                pem_cacert = crypto.dump_certificate(crypto.FILETYPE_PEM, cacert)
 
-            with open(pem_out_filepath, "wb", 0o400) as pem_out_file:
-                pem_out_file.write(pem_endentity_cert)
-                pem_out_file.write(pem_pkey)
-                pem_out_file.write(pem_certchain)
+            pem_certchain += pem_cacert
 
-        return key_pair, (endentity_cert,) + tuple(certchain)
+        return pem_endentity_cert + pem_pkey + pem_certchain
+
+    @classmethod
+    def _write_pem_out(
+        cls, pem_out_filepath, key_pair, endentity_cert, certchain, chain_cache=None
+    ):
+        """Write private key and certificate together PEM encoded in a single
+        file followed by any additional certificate chain. The file is
+        replaced atomically and is readable by the user only
+        """
+        _write_file_atomic(
+            pem_out_filepath,
+            cls.serialise_credential(
+                key_pair, endentity_cert, certchain, chain_cache=chain_cache
+            ),
+        )
 
     @classmethod
     def _is_ca_certificate(cls, cert):
@@ -205,23 +944,21 @@ class OnlineCaClient(object):
         It checks the BasicConstraints extension for ca flag set. This method
         is used for parsing and organising response from get certificate
         call.
+
+        :param cert: certificate
+        :type cert: cryptography.x509.Certificate or OpenSSL.crypto.X509
         """
-        n_ext = cert.get_extension_count()
-        for i in range(n_ext):
-            ext = cert.get_extension(i)
-            short_name = ext.get_short_name()
-            if short_name == cls.X509_BASIC_CONSTR_FIELDNAME:
-                ext_dat = ext.get_data()
-                parsed_ext_dat = BasicConstraints.load(ext_dat)
-                if (
-                    parsed_ext_dat.native.get(
-                        cls.X509_BASIC_CONSTR_CAFLAG_FIELDNAME, False
-                    )
-                    is True
-                ):
-                    return True
+        if isinstance(cert, crypto.X509):
+            cert = cert.to_cryptography()
 
-        return False
+        try:
+            basic_constraints = cert.extensions.get_extension_for_class(
+                x509.BasicConstraints
+            )
+        except x509.ExtensionNotFound:
+            return False
+
+        return basic_constraints.value.ca
 
     def get_certificate(self, username, password, server_url, pem_out_filepath=None):
         """Obtain a create a new key pair and invoke the SLCS service to obtain
@@ -234,12 +971,28 @@ class OnlineCaClient(object):
         concatenated private key and certificate issued
         :return: tuple of key pair object and certificate
         """
-        session = requests.Session()
+        cached_credential = self._get_cached_credential(
+            server_url, username, password, pem_out_filepath
+        )
+        if cached_credential is not None:
+            return cached_credential
+
+        session = self.create_http_session()
         session.auth = requests.auth.HTTPBasicAuth(username, password)
 
-        return self.get_certificate_using_session(
+        credential = self.get_certificate_using_session(
             session, server_url, pem_out_filepath=pem_out_filepath
         )
+        if self.credential_cache is not None:
+            self.credential_cache.put(
+                server_url,
+                username,
+                password,
+                *credential,
+                pem_out_filepath=pem_out_filepath,
+            )
+
+        return credential
 
     def get_delegated_certificate(
         self, access_token, server_url, pem_out_filepath=None
@@ -255,13 +1008,232 @@ class OnlineCaClient(object):
         concatenated private key and certificate issued
         :return: tuple of key pair object and certificate
         """
-        session = requests_oauthlib.OAuth2Session(token=access_token)
+        identity = access_token.get("access_token", "")
+        cached_credential = self._get_cached_credential(
+            server_url, identity, identity, pem_out_filepath
+        )
+        if cached_credential is not None:
+            return cached_credential
 
-        return self.get_certificate_using_session(
+        if self.oauth_refresh_settings is not None:
+            access_token = self.refresh_oauth_tok(access_token)
+
+        session = self._create_oauth_session(access_token)
+
+        credential = self.get_certificate_using_session(
             session, server_url, pem_out_filepath=pem_out_filepath
         )
+        if self.credential_cache is not None:
+            # Cache against the token used which may have been refreshed
+            identity = session.token.get("access_token", "")
+            self.credential_cache.put(
+                server_url,
+                identity,
+                identity,
+                *credential,
+                pem_out_filepath=pem_out_filepath,
+            )
+
+        return credential
+
+    def _create_oauth_session(self, access_token):
+        """Create OAuth 2.0 session which shares this client's connection
+        pool. If oauth_refresh_settings is set, the session refreshes the
+        access token automatically if it expires
+
+        :param access_token: OAuth 2.0 access token
+        :return: requests_oauthlib.OAuth2Session
+        """
+        # Imported here as it's needed for delegated certificates only
+        import requests_oauthlib
+
+        settings = self.oauth_refresh_settings
+        if settings is None:
+            session = requests_oauthlib.OAuth2Session(token=access_token)
+        else:
+            session = requests_oauthlib.OAuth2Session(
+                settings["client_id"],
+                token=access_token,
+                auto_refresh_url=settings["token_url"],
+                auto_refresh_kwargs={
+                    "client_id": settings["client_id"],
+                    "client_secret": settings["client_secret"],
+                },
+                token_updater=self._save_refreshed_oauth_tok,
+            )
+
+        return self.mount_http_adapter(session)
+
+    @classmethod
+    def is_oauth_tok_due_for_refresh(cls, access_token, margin=None):
+        """Check whether an access token has expired or is due to expire
+
+        :param access_token: OAuth 2.0 access token
+        :param margin: time in seconds before expiry at which the token is
+        due for refresh. Defaults to OAUTH_TOK_REFRESH_MARGIN
+        :return: True if the token is due for refresh, False if it isn't or
+        its expiry time is unknown
+        """
+        if margin is None:
+            margin = cls.OAUTH_TOK_REFRESH_MARGIN
+
+        expires_at = access_token.get("expires_at")
+        if expires_at is None:
+            return False
+
+        return float(expires_at) - time.time() < margin
+
+    def refresh_oauth_tok(self, access_token, force=False):
+        """Refresh access token using its refresh token if the access token
+        has expired or is due to expire. oauth_refresh_settings must be set.
+        The refreshed token is written out
+
+        :param access_token: OAuth 2.0 access token as returned from
+        read_oauth_tok
+        :param force: set to True to refresh the token regardless of its
+        expiry time
+        :return: refreshed token or the input token if it isn't due for
+        refresh
+        """
+        settings = self.oauth_refresh_settings
+        if settings is None:
+            raise OnlineCaClientError(
+                'Set "oauth_refresh_settings" in order to refresh access tokens'
+            )
+
+        if not (force or self.is_oauth_tok_due_for_refresh(access_token)):
+            return access_token
+
+        if not access_token.get("refresh_token"):
+            raise OnlineCaClientError(
+                "Access token can't be refreshed: no refresh token was issued "
+                "with it"
+            )
+
+        log.debug("Refreshing OAuth access token")
+        session = self._create_oauth_session(access_token)
+        token = session.refresh_token(
+            settings["token_url"],
+            client_id=settings["client_id"],
+            client_secret=settings["client_secret"],
+        )
+        self._save_refreshed_oauth_tok(token)
+
+        return token
+
+    def _save_refreshed_oauth_tok(self, token):
+        self.save_oauth_tok(
+            token, tok_filepath=self.oauth_refresh_settings.get("tok_filepath")
+        )
+
+    def _get_cached_credential(
+        self, server_url, identity, secret, pem_out_filepath=None
+    ):
+        """Get credential from the credential cache if one is set. Where
+        pem_out_filepath is set, the credential already in that file is
+        re-used if it was obtained with the same identity and secret
+
+        :return: tuple of key pair object and certificate or None if there is
+        no cache or no valid credential cached
+        """
+        if self.credential_cache is None:
+            return None
+
+        return self.credential_cache.get(
+            server_url, identity, secret, pem_out_filepath=pem_out_filepath
+        )
+
+    def get_certificates(self, jobs, server_url, max_workers=DEF_N_BATCH_WORKERS):
+        """Issue certificates for many identities concurrently. Results are
+        yielded as each job finishes so they may be out of order with respect
+        to the input. A failing job doesn't stop the others: its error is
+        returned in the result.
 
-    def get_trustroots(self, server_url, write_to_ca_cert_dir=False, bootstrap=False):
+        :param jobs: iterable of tuples of username, password or OAuth access
+        token and output file path. Where a token is given, the username is
+        used only to identify the job. The output file path may be None. In
+        place of a password or token, a callable taking no arguments and
+        returning one may be given. It is called as the job runs so that e.g.
+        failing to read a token file fails only that job
+        :param server_url: URL for get certificate endpoint
+        :param max_workers: number of worker threads issuing certificates
+        :return: iterator of CertificateJobResult. If iterating over jobs
+        raises an error, it is re-raised once jobs already started have
+        finished and their results have been yielded
+        """
+        # Bound the number of jobs submitted at any one time so that a large
+        # or lazily generated input isn't read into memory all at once
+        max_pending = max_workers * 2
+        jobs = iter(jobs)
+        jobs_error = None
+        pending = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            try:
+                jobs_remaining = True
+                while jobs_remaining or pending:
+                    while jobs_remaining and len(pending) < max_pending:
+                        try:
+                            job = next(jobs)
+                        except StopIteration:
+                            jobs_remaining = False
+                            break
+                        except Exception as e:
+                            log.error("Error reading certificate jobs: %s", e)
+                            jobs_error = e
+                            jobs_remaining = False
+                            break
+
+                        future = executor.submit(
+                            self._get_certificate_for_job, job, server_url
+                        )
+                        pending[future] = job
+
+                    if not pending:
+                        break
+
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        job = pending.pop(future)
+                        try:
+                            key_pair, certs = future.result()
+                        except Exception as e:
+                            log.debug("Error issuing certificate for %r: %s", job, e)
+                            yield CertificateJobResult(job, None, None, e)
+                        else:
+                            yield CertificateJobResult(job, key_pair, certs, None)
+            finally:
+                # Caller stopped iterating early - drop jobs not yet started
+                for future in pending:
+                    future.cancel()
+
+        if jobs_error is not None:
+            raise jobs_error
+
+    def _get_certificate_for_job(self, job, server_url):
+        """Issue certificate for a single job from get_certificates
+
+        :param job: tuple of username, password or OAuth access token and
+        output file path. The password or token may be given as a callable
+        returning it
+        :param server_url: URL for get certificate endpoint
+        :return: tuple of key pair object and certificate
+        """
+        username, password_or_token, pem_out_filepath = job
+        if callable(password_or_token):
+            password_or_token = password_or_token()
+
+        if isinstance(password_or_token, dict):
+            return self.get_delegated_certificate(
+                password_or_token, server_url, pem_out_filepath=pem_out_filepath
+            )
+
+        return self.get_certificate(
+            username, password_or_token, server_url, pem_out_filepath=pem_out_filepath
+        )
+
+    def get_trustroots(
+        self, server_url, write_to_ca_cert_dir=False, bootstrap=False, conditional=True
+    ):
         """Get Certificate authority files to enable client to correctly apply
         SSL verification of server peer.
 
@@ -271,42 +1243,313 @@ class OnlineCaClient(object):
         :param bootstrap: set to True to bootstrap trust in the server.  This
         disables SSL authentication of the server to initialise trust in it.
         Use with caution as this exposes the client to spoofing attacks
+        :param conditional: when writing to ca_cert_dir, send validators saved
+        from the previous download so that the server can respond with 304 Not
+        Modified if the trust roots are unchanged. The files are then read
+        from ca_cert_dir instead
         :return: dictionary containing CA trust root files as strings
         """
+        validators = None
+        if write_to_ca_cert_dir and conditional:
+            validators = self._read_trustroots_validators(server_url)
+
+        res = self._request_trustroots(server_url, bootstrap, validators)
+        if res is None:
+            files_dict = self._read_trustroots(validators["files"])
+            if files_dict is not None:
+                return files_dict
+
+            # Files have been removed since the validators were saved
+            res = self._request_trustroots(server_url, bootstrap)
+
+        files_dict = self._parse_trustroots(res.content)
+
+        if write_to_ca_cert_dir:
+            self._save_trustroots(server_url, res.headers, files_dict)
+
+        return files_dict
+
+    def iter_trustroots(self, server_url, bootstrap=False):
+        """Get Certificate authority files streaming the response so that each
+        file is decoded and returned as soon as it has been received
+
+        :param server_url: URL for get trust roots endpoint
+        :param bootstrap: set to True to bootstrap trust in the server.  This
+        disables SSL authentication of the server to initialise trust in it.
+        Use with caution as this exposes the client to spoofing attacks
+        :return: iterator of file name and decoded file content tuples
+        """
+        with self._request_trustroots(server_url, bootstrap, stream=True) as res:
+            for file_name, file_content in self._iter_parse_trustroots(
+                res.iter_lines(chunk_size=self.__class__.TRUSTROOTS_CHUNK_SIZE)
+            ):
+                yield file_name, file_content
+
+    def sync_trustroots(self, server_url, bootstrap=False, conditional=True):
+        """Stream Certificate authority files into ca_cert_dir. Each file is
+        written as soon as it has been received and decoded so that memory use
+        is bounded by the size of the largest file rather than the whole set.
+        Use in place of get_trustroots with write_to_ca_cert_dir set for large
+        sets of trust roots
+
+        :param server_url: URL for get trust roots endpoint
+        :param bootstrap: set to True to bootstrap trust in the server.  This
+        disables SSL authentication of the server to initialise trust in it.
+        Use with caution as this exposes the client to spoofing attacks
+        :param conditional: send validators saved from the previous download
+        so that the server can respond with 304 Not Modified if the trust
+        roots are unchanged
+        :return: list of names of files added or changed
+        """
+        validators = None
+        if conditional:
+            validators = self._read_trustroots_validators(server_url)
+
+        res = self._request_trustroots(server_url, bootstrap, validators, stream=True)
+        if res is None:
+            if all(
+                os.path.isfile(os.path.join(self.ca_cert_dir, file_name))
+                for file_name in validators["files"]
+            ):
+                return []
+
+            # Files have been removed since the validators were saved
+            res = self._request_trustroots(server_url, bootstrap, stream=True)
+
+        file_names = []
+
+        def _iter_files():
+            for file_name, file_content in self._iter_parse_trustroots(
+                res.iter_lines(chunk_size=self.__class__.TRUSTROOTS_CHUNK_SIZE)
+            ):
+                file_name = _unicode_conv(file_name)
+                file_names.append(file_name)
+                yield file_name, file_content
+
+        with res:
+            written_file_names = sync_trustroots_dir(
+                self.ca_cert_dir,
+                _iter_files(),
+                atomic_swap=self.trustroots_atomic_swap,
+            )
+
+        self._write_trustroots_validators(server_url, res.headers, file_names)
+
+        # Rather than read all the files back now, the SSL context is
+        # re-created from ca_cert_dir when it's next needed
+        self._set_ssl_context(None, None)
+
+        return written_file_names
+
+    def _request_trustroots(
+        self, server_url, bootstrap=False, validators=None, stream=False
+    ):
+        """Make get trust roots request
+
+        :param server_url: URL for get trust roots endpoint
+        :param bootstrap: set to True to disable SSL authentication of the
+        server
+        :param validators: optionally set validators saved from a previous
+        download to make a conditional request
+        :param stream: set to True to defer reading the response body
+        :return: response or None if the trust roots haven't been modified
+        since the validators were saved
+        """
         if bootstrap:
             kwargs = {"verify": False}
         else:
             kwargs = {"verify": self.ca_cert_dir}
 
-        res = requests.get(server_url, **kwargs)
+        if validators is not None:
+            kwargs["headers"] = self._get_conditional_headers(validators)
+
+        res = self.create_http_session().get(server_url, stream=stream, **kwargs)
+        if self._is_trustroots_unmodified(server_url, res.status_code, validators):
+            res.close()
+            return None
+
         if not res.ok:
-            raise OnlineCaClientErrorResponse(
-                "Error retrieving CA trust roots"
-                ": status: {} {}".format(res.status_code, res.reason),
-                res,
-            )
+            res.close()
+            self._raise_trustroots_error_response(res.status_code, res.reason, res)
 
-        files_dict = {}
-        for line in res.content.splitlines():
-            file_name, enc_file_content = line.strip().split(b"=", 1)
-            files_dict[file_name] = base64.b64decode(enc_file_content)
+        return res
 
-        if write_to_ca_cert_dir:
-            # Create the CA directory path if doesn't already exist
-            try:
-                os.makedirs(self.ca_cert_dir)
-            except OSError as e:
-                # Ignore if the path already exists
-                if e.errno != errno.EEXIST:
-                    raise
+    @staticmethod
+    def _is_trustroots_unmodified(server_url, status_code, validators):
+        """Check response to a get trust roots request for 304 Not Modified
+
+        :param server_url: URL for get trust roots endpoint
+        :param status_code: HTTP response status code
+        :param validators: validators sent with the request or None if the
+        request wasn't conditional
+        :return: True if the trust roots are unchanged since the validators
+        were saved
+        """
+        if status_code == requests.codes.not_modified and validators is not None:
+            log.debug("CA trust roots from %r are unchanged", server_url)
+            return True
 
-            for file_name, file_contents in files_dict.items():
-                file_path = os.path.join(self.ca_cert_dir, _unicode_conv(file_name))
-                with open(file_path, "wb") as trustroot_file:
-                    trustroot_file.write(file_contents)
+        return False
+
+    @staticmethod
+    def _raise_trustroots_error_response(status_code, reason, res):
+        """Raise error for a failed get trust roots request"""
+        raise OnlineCaClientErrorResponse(
+            "Error retrieving CA trust roots"
+            ": status: {} {}".format(status_code, reason),
+            res,
+        )
+
+    @classmethod
+    def _parse_trustroots(cls, content):
+        """Parse get trust roots response: each line is a file name and its
+        base64 encoded content separated by '='
+
+        :param content: response body
+        :type content: bytes
+        :return: dictionary of file names and decoded file contents
+        """
+        return dict(cls._iter_parse_trustroots(content.splitlines()))
+
+    @staticmethod
+    def _iter_parse_trustroots(lines):
+        """Parse get trust roots response line by line
+
+        :param lines: iterable of lines from the response body
+        :return: iterator of file name and decoded file content tuples
+        """
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+
+            file_name, enc_file_content = line.split(b"=", 1)
+            yield file_name, base64.b64decode(enc_file_content)
+
+    def _write_trustroots(self, files_dict):
+        """Write CA trust root files to ca_cert_dir. Files whose content is
+        unchanged are not re-written. See trustroots_sync module
+
+        :param files_dict: dictionary of file names and file contents
+        :return: list of names of files added or changed
+        """
+        written_file_names = sync_trustroots_dir(
+            self.ca_cert_dir,
+            [
+                (_unicode_conv(file_name), file_contents)
+                for file_name, file_contents in files_dict.items()
+            ],
+            atomic_swap=self.trustroots_atomic_swap,
+        )
+        self._update_ssl_context(files_dict)
+
+        return written_file_names
+
+    def _save_trustroots(self, server_url, headers, files_dict):
+        """Write CA trust root files to ca_cert_dir along with the validators
+        from the response so that later refreshes can make a conditional
+        request
+
+        :param server_url: URL the trust roots were obtained from
+        :param headers: HTTP response headers
+        :param files_dict: dictionary of file names and file contents
+        :return: list of names of files added or changed
+        """
+        written_file_names = self._write_trustroots(files_dict)
+        self._write_trustroots_validators(server_url, headers, files_dict)
+
+        return written_file_names
+
+    def _read_trustroots(self, file_names):
+        """Read CA trust root files previously written to ca_cert_dir
+
+        :param file_names: names of files to read
+        :return: dictionary of file names and file contents or None if any of
+        the files is missing
+        """
+        files_dict = {}
+        for file_name in file_names:
+            file_path = os.path.join(self.ca_cert_dir, file_name)
+            try:
+                with open(file_path, "rb") as trustroot_file:
+                    files_dict[six.b(file_name)] = trustroot_file.read()
+            except (IOError, OSError):
+                log.debug("CA trust root file %r is missing", file_path)
+                return None
 
         return files_dict
 
+    @property
+    def trustroots_validators_filepath(self):
+        """File holding HTTP cache validators for the trust roots in
+        ca_cert_dir"""
+        if self.ca_cert_dir is None:
+            return None
+
+        return os.path.join(
+            self.ca_cert_dir, self.__class__.TRUSTROOTS_VALIDATORS_FILENAME
+        )
+
+    @staticmethod
+    def _get_conditional_headers(validators):
+        """Make conditional request headers from saved validators"""
+        headers = {}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+
+        return headers
+
+    def _read_trustroots_validators(self, server_url):
+        """Read validators saved from the last download of trust roots from
+        server_url
+
+        :return: dictionary of validators or None if none have been saved or
+        they are for a different server
+        """
+        try:
+            with open(self.trustroots_validators_filepath) as validators_file:
+                validators = json.load(validators_file)
+        except (IOError, OSError, ValueError):
+            return None
+
+        if validators.get("server_url") != server_url or not (
+            validators.get("etag") or validators.get("last_modified")
+        ):
+            return None
+
+        return validators
+
+    def _write_trustroots_validators(self, server_url, headers, file_names):
+        """Save validators from a trust roots response
+
+        :param server_url: URL the trust roots were obtained from
+        :param headers: HTTP response headers
+        :param file_names: names of files written to ca_cert_dir. A dictionary
+        of file names and file contents may also be passed
+        """
+        validators = {
+            "server_url": server_url,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "files": sorted(_unicode_conv(file_name) for file_name in file_names),
+        }
+        validators_filepath = self.trustroots_validators_filepath
+        if not (validators["etag"] or validators["last_modified"]):
+            # Server doesn't support conditional requests - remove any stale
+            # validators
+            try:
+                os.unlink(validators_filepath)
+            except (IOError, OSError):
+                pass
+            return
+
+        _write_file_atomic(
+            validators_filepath, json.dumps(validators, indent=2).encode()
+        )
+
     @classmethod
     def save_oauth_tok(cls, token, tok_filepath=None):
         """Convenience routine - serialise OAuth token for later re-use.
@@ -317,29 +1560,10 @@ class OnlineCaClient(object):
         if tok_filepath is None:
             tok_filepath = cls.DEF_OAUTH_TOK_FILEPATH
 
-        tok_file_content = json.dumps(token)
-
-        # Write file with user-only rw permissions
-        flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL  # Refer to "man 2 open".
-        mode = stat.S_IRUSR | stat.S_IWUSR  # 0o600 mode
-        umask = 0o777 ^ mode  # Prevents always downgrading umask to 0.
-
-        # For security, remove file with potentially elevated mode
-        try:
-            os.remove(tok_filepath)
-        except OSError:
-            pass
-
-        # Open file descriptor
-        umask_original = os.umask(umask)
-
-        try:
-            tok_file_desc = os.open(tok_filepath, flags, mode)
-        finally:
-            os.umask(umask_original)
-
-        with os.fdopen(tok_file_desc, "w") as tok_file:
-            tok_file.write(tok_file_content)
+        # Write file with user-only rw permissions. The file is replaced
+        # atomically so that a token refreshed by one process is never seen
+        # partially written by another
+        _write_file_atomic(tok_filepath, json.dumps(token).encode())
 
     @classmethod
     def read_oauth_tok(cls, tok_filepath=None):
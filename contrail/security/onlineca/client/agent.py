@@ -0,0 +1,258 @@
+"""Online CA service client - credential agent
+
+Long running agent which keeps a delegated credential fresh on disk, renewing
+it part way through its lifetime using a saved OAuth access token. Jobs read
+the credential from file or from the agent over a local Unix socket rather
+than each requesting their own from the Online CA service.
+
+Contrail Project
+"""
+__author__ = "P J Kershaw"
+__date__ = "16/10/26"
+__copyright__ = "Copyright 2026 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level directory"
+__contact__ = "Philip.Kershaw@stfc.ac.uk"
+import os
+import time
+import random
+import signal
+import socket
+import logging
+import threading
+import socketserver
+from typing import Optional
+
+from contrail.security.onlineca.client import OnlineCaClient, _write_file_atomic
+from contrail.security.onlineca.client.openssl_utils import asn1_time_to_timestamp
+
+log = logging.getLogger(__name__)
+
+
+class CredentialAgentError(Exception):
+    """Base class for credential agent errors"""
+
+
+class _CredentialRequestHandler(socketserver.BaseRequestHandler):
+    """Send the current credential to any client connecting to the socket"""
+
+    def handle(self):
+        credential = self.server.agent.credential
+        if credential is not None:
+            self.request.sendall(credential)
+
+
+class _CredentialSocketServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, agent):
+        self.agent = agent
+
+        # Only the user running the agent may connect
+        umask_original = os.umask(0o177)
+        try:
+            super().__init__(socket_path, _CredentialRequestHandler)
+        finally:
+            os.umask(umask_original)
+
+
+class CredentialAgent:
+    """Keep a credential obtained with an OAuth access token fresh on disk.
+    The credential is renewed once a set fraction of its lifetime has elapsed
+    with random jitter added so that agents started together don't all call
+    the Online CA service at the same time.
+
+    >>> agent = CredentialAgent(onlineca_client, server_url, "./credentials.pem",
+    ...                         socket_path="./credentials.sock")
+    >>> agent.run()
+    """
+
+    DEF_RENEW_FRACTION = 0.5
+    DEF_JITTER_FRACTION = 0.05
+    DEF_RETRY_INTERVAL = 60.0
+
+    def __init__(
+        self,
+        onlineca_client: OnlineCaClient,
+        server_url: str,
+        pem_out_filepath: str,
+        tok_filepath: Optional[str] = None,
+        socket_path: Optional[str] = None,
+        renew_fraction: float = DEF_RENEW_FRACTION,
+        jitter_fraction: float = DEF_JITTER_FRACTION,
+        retry_interval: float = DEF_RETRY_INTERVAL,
+    ) -> None:
+        """
+        :param onlineca_client: client for calls to the Online CA service
+        :param server_url: URL for get certificate endpoint
+        :param pem_out_filepath: output path for file containing concatenated
+        private key and certificate issued
+        :param tok_filepath: file containing OAuth access token. Defaults to
+        OnlineCaClient.DEF_OAUTH_TOK_FILEPATH. The file is re-read for each
+        renewal so that it can be updated independently of the agent
+        :param socket_path: optionally set a path for a Unix socket on which to
+        serve the credential
+        :param renew_fraction: fraction of the credential lifetime after which
+        to renew it
+        :param jitter_fraction: maximum random adjustment to the renewal time
+        as a fraction of the credential lifetime
+        :param retry_interval: time in seconds to wait before retrying a
+        failed renewal
+        """
+        if not 0.0 < renew_fraction < 1.0:
+            raise CredentialAgentError(
+                f"Renew fraction must be between 0 and 1; got {renew_fraction!r}"
+            )
+
+        self.onlineca_client = onlineca_client
+        self.server_url = server_url
+        self.pem_out_filepath = pem_out_filepath
+        self.tok_filepath = tok_filepath
+        self.socket_path = socket_path
+        self.renew_fraction = renew_fraction
+        self.jitter_fraction = jitter_fraction
+        self.retry_interval = retry_interval
+
+        self.credential = None
+        self.not_after = None
+        self._stop_event = threading.Event()
+        self._socket_server = None
+
+    def get_renew_time(self, not_before: float, not_after: float) -> float:
+        """Get the time at which to renew a credential
+
+        :param not_before: start of certificate validity as seconds since the
+        epoch
+        :param not_after: end of certificate validity as seconds since the
+        epoch
+        :return: renewal time as seconds since the epoch
+        """
+        jitter = random.uniform(-self.jitter_fraction, self.jitter_fraction)
+        return not_before + (not_after - not_before) * (self.renew_fraction + jitter)
+
+    def renew(self) -> float:
+        """Obtain a new credential and write it out
+
+        :return: delay in seconds until the credential should next be renewed
+        """
+        access_tok = OnlineCaClient.read_oauth_tok(tok_filepath=self.tok_filepath)
+        key_pair, certs = self.onlineca_client.get_delegated_certificate(
+            access_tok, self.server_url
+        )
+
+        credential = OnlineCaClient.serialise_credential(
+            key_pair,
+            certs[0],
+            certs[1:],
+            chain_cache=self.onlineca_client.chain_cache,
+        )
+        _write_file_atomic(self.pem_out_filepath, credential)
+        self.credential = credential
+
+        not_before = asn1_time_to_timestamp(certs[0].get_notBefore())
+        self.not_after = asn1_time_to_timestamp(certs[0].get_notAfter())
+        renew_time = self.get_renew_time(not_before, self.not_after)
+        delay = max(0.0, renew_time - time.time())
+
+        log.info(
+            "Credential written to %r; next renewal in %.0f seconds",
+            self.pem_out_filepath,
+            delay,
+        )
+        return delay
+
+    def start_socket_server(self) -> None:
+        """Serve the credential on the Unix socket if a path has been set"""
+        if self.socket_path is None or self._socket_server is not None:
+            return
+
+        # Remove socket left behind by a previous run
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+
+        self._socket_server = _CredentialSocketServer(self.socket_path, self)
+        threading.Thread(
+            target=self._socket_server.serve_forever,
+            name=f"{self.__class__.__name__}-socket",
+            daemon=True,
+        ).start()
+
+    def stop(self) -> None:
+        """Stop the agent. This may be called from another thread"""
+        self._stop_event.set()
+
+        if self._socket_server is not None:
+            self._socket_server.shutdown()
+            self._socket_server.server_close()
+            self._socket_server = None
+            try:
+                os.unlink(self.socket_path)
+            except FileNotFoundError:
+                pass
+
+    def run(self) -> None:
+        """Renew the credential until stopped. Failed renewals are retried
+        after retry_interval seconds. When run in the main thread, the agent
+        also stops on SIGTERM"""
+        self._stop_event.clear()
+
+        # Signal handlers can only be set from the main thread
+        handle_sigterm = threading.current_thread() is threading.main_thread()
+        if handle_sigterm:
+            sigterm_handler_original = signal.signal(
+                signal.SIGTERM, self._handle_sigterm
+            )
+
+        self.start_socket_server()
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    delay = self.renew()
+                except Exception as e:
+                    log.error("Error renewing credential: %s", e)
+                    delay = self.retry_interval
+                    if self.not_after is not None and self.not_after < time.time():
+                        log.warning(
+                            "Credential at %r has expired", self.pem_out_filepath
+                        )
+
+                self._stop_event.wait(delay)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+            if handle_sigterm:
+                signal.signal(signal.SIGTERM, sigterm_handler_original)
+
+    def _handle_sigterm(self, signum, frame) -> None:
+        # Only set the flag here. The socket server is shut down by run once
+        # the main loop exits
+        log.info("Received SIGTERM: stopping")
+        self._stop_event.set()
+
+
+def get_credential_from_agent(socket_path: str, timeout: float = 10.0) -> bytes:
+    """Read credential served by a CredentialAgent over a Unix socket
+
+    :param socket_path: path to agent's socket
+    :param timeout: socket timeout in seconds
+    :return: PEM encoded private key and certificates
+    """
+    chunks = []
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+
+    credential = b"".join(chunks)
+    if not credential:
+        raise CredentialAgentError(
+            f"No credential available from agent at {socket_path!r}"
+        )
+
+    return credential
@@ -0,0 +1,425 @@
+"""Online CA service client - asyncio client
+
+Requires aiohttp, install with the "async" extra:
+
+$ pip install ContrailOnlineCAClient[async]
+
+Contrail Project
+"""
+__author__ = "P J Kershaw"
+__date__ = "16/10/26"
+__copyright__ = "Copyright 2026 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level directory"
+__contact__ = "Philip.Kershaw@stfc.ac.uk"
+import asyncio
+import base64
+import functools
+import ssl
+import logging
+from concurrent.futures import Executor
+from typing import Optional
+
+import aiohttp
+
+from contrail.security.onlineca.client import (
+    OnlineCaClient,
+    OnlineCaClientErrorResponse,
+    _unicode_conv,
+)
+
+log = logging.getLogger(__name__)
+
+
+def _basic_auth_header(username: str, password: str) -> str:
+    """Make HTTP Basic Auth Authorization header value. Strings are encoded
+    as Latin-1 as for requests.auth.HTTPBasicAuth"""
+    credentials = b":".join(
+        val if isinstance(val, bytes) else val.encode("latin1")
+        for val in (username, password)
+    )
+    return "Basic " + base64.b64encode(credentials).decode("ascii")
+
+
+class AsyncOnlineCaClient(OnlineCaClient):
+    """Asyncio client to Online Certificate Authority Service. Get certificate
+    and get trust roots calls are coroutines mirroring those of OnlineCaClient.
+    Key generation is run in an executor so that it never blocks the event
+    loop. The number of calls in progress at any one time is bounded by
+    max_concurrency. File reads and writes, including the first load of the
+    CA certificates in ca_cert_dir, are also run in the executor. As for
+    OnlineCaClient, credential_cache and oauth_refresh_settings are applied
+    if set.
+
+    The synchronous calls get_certificates, iter_trustroots and
+    sync_trustroots aren't supported. Use asyncio.gather with get_certificate
+    and get_trustroots instead.
+
+    >>> async with AsyncOnlineCaClient(max_concurrency=20) as onlineca_client:
+    ...     onlineca_client.ca_cert_dir = "./ca-trustroots"
+    ...     results = await asyncio.gather(
+    ...         *[onlineca_client.get_certificate(username, password, server_url)
+    ...           for username, password in credentials]
+    ...     )
+    """
+
+    DEF_MAX_CONCURRENCY = 10
+
+    def __init__(
+        self,
+        max_concurrency: int = DEF_MAX_CONCURRENCY,
+        executor: Optional[Executor] = None,
+        http_pool_maxsize: int = OnlineCaClient.DEF_HTTP_POOL_MAXSIZE,
+        **kwargs,
+    ) -> None:
+        """
+        :param max_concurrency: maximum number of calls in progress at once
+        :param executor: executor for running key generation. If omitted, the
+        event loop's default executor is used
+        :param http_pool_maxsize: maximum number of connections kept alive in
+        the pool for each host
+        :param kwargs: additional keywords passed to OnlineCaClient
+        """
+        super().__init__(http_pool_maxsize=http_pool_maxsize, **kwargs)
+
+        self.max_concurrency = max_concurrency
+        self.executor = executor
+        self.http_pool_maxsize = http_pool_maxsize
+
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._http_session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close pooled connections to the Online CA service"""
+        if self._http_session is not None:
+            await self._http_session.close()
+            self._http_session = None
+
+        self.close()
+
+    @property
+    def http_session(self) -> aiohttp.ClientSession:
+        """Session shared by all calls made by this client holding the pool of
+        connections to the Online CA service. Credentials are set per call.
+        It must be accessed from within a running event loop
+        """
+        if self._http_session is None or self._http_session.closed:
+            connector = aiohttp.TCPConnector(limit_per_host=self.http_pool_maxsize)
+            self._http_session = aiohttp.ClientSession(connector=connector)
+
+        return self._http_session
+
+    def _get_ssl(self, bootstrap: bool = False):
+        """SSL setting for aiohttp requests equivalent to the verify keyword
+        used with requests. The first call reads ca_cert_dir so call this in
+        the executor
+
+        :param bootstrap: set to True to disable verification of the server
+        :return: False to disable verification, SSL context for ca_cert_dir or
+        None for aiohttp's default verification
+        """
+        if bootstrap:
+            return False
+
+        if self.ca_cert_dir is None:
+            return None
+
+        # Context built from the trust roots and shared with the synchronous
+        # client. Fall back to the directory if it holds no certificates yet
+        ssl_context = self.ssl_context
+        if ssl_context is None:
+            ssl_context = ssl.create_default_context(capath=self.ca_cert_dir)
+
+        return ssl_context
+
+    async def _run_in_executor(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, functools.partial(func, *args, **kwargs)
+        )
+
+    async def get_certificate_using_session(
+        self,
+        session: aiohttp.ClientSession,
+        server_url: str,
+        pem_out_filepath: Optional[str] = None,
+        key_pair=None,
+        cert_req=None,
+        **request_kwargs,
+    ):
+        """Obtain a create a new key pair and invoke the SLCS service to obtain
+        a certificate using authentication method determined by input session
+        object
+
+        :param session: aiohttp session containing the authentication context
+        e.g. an Authorization header set in its default headers
+        :param server_url: URL for get certificate endpoint
+        :param pem_out_filepath: optionally set output path for file containing
+        concatenated private key and certificate issued
+        :param key_pair: optionally set a key pair generated in advance
+        :param cert_req: PEM encoded certificate request for key_pair
+        :param request_kwargs: additional keywords for the POST request e.g.
+        per-call headers
+        :return: tuple of key pair object and certificate
+        """
+        if not isinstance(session, aiohttp.ClientSession):
+            raise TypeError("Expecting aiohttp.ClientSession type for session object")
+
+        async with self._semaphore:
+            key_pair, cert_req = await self._run_in_executor(
+                self._create_key_pair_and_cert_req, key_pair, cert_req
+            )
+            ssl_setting = await self._run_in_executor(self._get_ssl)
+
+            # Form field values must be strings otherwise aiohttp sends the
+            # request as a multipart file upload
+            req = {
+                _unicode_conv(self.__class__.CERT_REQ_POST_PARAM_KEYNAME): (
+                    _unicode_conv(cert_req)
+                )
+            }
+
+            async with session.post(
+                server_url, data=req, ssl=ssl_setting, **request_kwargs
+            ) as res:
+                content = await res.read()
+                if not res.ok:
+                    raise OnlineCaClientErrorResponse(
+                        "Error getting certificate"
+                        ": status: {} {}".format(res.status, res.reason),
+                        res,
+                    )
+
+        endentity_cert, certchain = self._parse_cert_resp(
+            content, chain_cache=self.chain_cache
+        )
+
+        if pem_out_filepath:
+            await self._run_in_executor(
+                self._write_pem_out,
+                pem_out_filepath,
+                key_pair,
+                endentity_cert,
+                certchain,
+                chain_cache=self.chain_cache,
+            )
+
+        return key_pair, (endentity_cert,) + tuple(certchain)
+
+    async def get_certificate(
+        self,
+        username: str,
+        password: str,
+        server_url: str,
+        pem_out_filepath: Optional[str] = None,
+    ):
+        """Obtain a create a new key pair and invoke the SLCS service to obtain
+        a certificate using username/password with HTTP Basic Auth
+
+        :param username: username for user authentication
+        :param password: password for user authentication
+        :param server_url: URL for get certificate endpoint
+        :param pem_out_filepath: optionally set output path for file containing
+        concatenated private key and certificate issued
+        :return: tuple of key pair object and certificate
+        """
+        cached_credential = await self._run_in_executor(
+            self._get_cached_credential,
+            server_url,
+            username,
+            password,
+            pem_out_filepath,
+        )
+        if cached_credential is not None:
+            return cached_credential
+
+        credential = await self.get_certificate_using_session(
+            self.http_session,
+            server_url,
+            pem_out_filepath=pem_out_filepath,
+            headers={"Authorization": _basic_auth_header(username, password)},
+        )
+        await self._put_cached_credential(
+            server_url, username, password, credential, pem_out_filepath
+        )
+
+        return credential
+
+    async def get_delegated_certificate(
+        self,
+        access_token: dict,
+        server_url: str,
+        pem_out_filepath: Optional[str] = None,
+    ):
+        """Obtain a create a new key pair and invoke the SLCS service to obtain
+        a delegated certificate using an OAuth 2.0 access token
+
+        :param access_token: OAuth 2.0 access token as returned from
+        OnlineCaClient.read_oauth_tok
+        :param server_url: URL for get certificate endpoint
+        :param pem_out_filepath: optionally set output path for file containing
+        concatenated private key and certificate issued
+        :return: tuple of key pair object and certificate
+        """
+        identity = access_token.get("access_token", "")
+        cached_credential = await self._run_in_executor(
+            self._get_cached_credential,
+            server_url,
+            identity,
+            identity,
+            pem_out_filepath,
+        )
+        if cached_credential is not None:
+            return cached_credential
+
+        if self.oauth_refresh_settings is not None:
+            # Refresh request and token file write are blocking
+            access_token = await self._run_in_executor(
+                self.refresh_oauth_tok, access_token
+            )
+
+        identity = access_token.get("access_token", "")
+        credential = await self.get_certificate_using_session(
+            self.http_session,
+            server_url,
+            pem_out_filepath=pem_out_filepath,
+            headers={"Authorization": f"Bearer {identity}"},
+        )
+
+        # Cache against the token used which may have been refreshed
+        await self._put_cached_credential(
+            server_url, identity, identity, credential, pem_out_filepath
+        )
+
+        return credential
+
+    async def _put_cached_credential(
+        self, server_url, identity, secret, credential, pem_out_filepath=None
+    ):
+        """Add credential to the credential cache if one is set"""
+        if self.credential_cache is None:
+            return
+
+        await self._run_in_executor(
+            self.credential_cache.put,
+            server_url,
+            identity,
+            secret,
+            *credential,
+            pem_out_filepath=pem_out_filepath,
+        )
+
+    def get_certificates(self, jobs, server_url, max_workers=None):
+        """Not supported by the asyncio client. Use asyncio.gather with
+        get_certificate or get_delegated_certificate
+
+        :raises NotImplementedError: always
+        """
+        raise NotImplementedError(
+            f"{self.__class__.__name__} doesn't support get_certificates. Use "
+            "asyncio.gather with get_certificate or get_delegated_certificate"
+        )
+
+    async def get_trustroots(
+        self,
+        server_url: str,
+        write_to_ca_cert_dir: bool = False,
+        bootstrap: bool = False,
+        conditional: bool = True,
+    ) -> dict:
+        """Get Certificate authority files to enable client to correctly apply
+        SSL verification of server peer.
+
+        :param server_url: URL for get certificate endpoint
+        :param write_to_ca_cert_dir: optionally set output path for directory
+        to write CA trust root files
+        :param bootstrap: set to True to bootstrap trust in the server.  This
+        disables SSL authentication of the server to initialise trust in it.
+        Use with caution as this exposes the client to spoofing attacks
+        :param conditional: when writing to ca_cert_dir, make a conditional
+        request using validators saved from the previous download
+        :return: dictionary containing CA trust root files as strings
+        """
+        validators = None
+        if write_to_ca_cert_dir and conditional:
+            validators = await self._run_in_executor(
+                self._read_trustroots_validators, server_url
+            )
+
+        response = await self._get_trustroots_response(
+            server_url, bootstrap, validators
+        )
+        if response is None:
+            files_dict = await self._run_in_executor(
+                self._read_trustroots, validators["files"]
+            )
+            if files_dict is not None:
+                return files_dict
+
+            # Files have been removed since the validators were saved
+            response = await self._get_trustroots_response(server_url, bootstrap)
+
+        headers, content = response
+        files_dict = self._parse_trustroots(content)
+
+        if write_to_ca_cert_dir:
+            await self._run_in_executor(
+                self._save_trustroots, server_url, headers, files_dict
+            )
+
+        return files_dict
+
+    def iter_trustroots(self, server_url, bootstrap=False):
+        """Not supported by the asyncio client. Use get_trustroots
+
+        :raises NotImplementedError: always
+        """
+        raise NotImplementedError(
+            f"{self.__class__.__name__} doesn't support iter_trustroots. Use "
+            "get_trustroots"
+        )
+
+    def sync_trustroots(self, server_url, bootstrap=False, conditional=True):
+        """Not supported by the asyncio client. Use get_trustroots with
+        write_to_ca_cert_dir set
+
+        :raises NotImplementedError: always
+        """
+        raise NotImplementedError(
+            f"{self.__class__.__name__} doesn't support sync_trustroots. Use "
+            "get_trustroots with write_to_ca_cert_dir set"
+        )
+
+    async def _get_trustroots_response(
+        self,
+        server_url: str,
+        bootstrap: bool,
+        validators: Optional[dict] = None,
+    ):
+        """Make get trust roots request. Asyncio counterpart of
+        OnlineCaClient._request_trustroots
+
+        :return: tuple of response headers and body or None if the trust roots
+        haven't been modified since the validators were saved
+        """
+        headers = None
+        if validators is not None:
+            headers = self._get_conditional_headers(validators)
+
+        ssl_setting = await self._run_in_executor(self._get_ssl, bootstrap=bootstrap)
+        async with self._semaphore:
+            async with self.http_session.get(
+                server_url, ssl=ssl_setting, headers=headers
+            ) as res:
+                if self._is_trustroots_unmodified(server_url, res.status, validators):
+                    return None
+
+                if not res.ok:
+                    self._raise_trustroots_error_response(res.status, res.reason, res)
+
+                return res.headers, await res.read()
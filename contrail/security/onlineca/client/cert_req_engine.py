@@ -0,0 +1,163 @@
+"""Online CA service client - parallel key pair and certificate request
+generation
+
+Key generation and signing of certificate requests are spread across a pool of
+worker processes so that a host needing many credentials can make use of all
+its cores.
+
+Contrail Project
+"""
+__author__ = "P J Kershaw"
+__date__ = "16/10/26"
+__copyright__ = "Copyright 2026 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level directory"
+__contact__ = "Philip.Kershaw@stfc.ac.uk"
+import os
+import logging
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from collections.abc import Iterator
+from typing import Optional
+
+from OpenSSL import crypto
+from cryptography.hazmat.primitives import serialization
+
+from contrail.security.onlineca.client import OnlineCaClient
+
+log = logging.getLogger(__name__)
+
+
+def _create_key_pair_and_cert_req(
+    n_bits_for_key: int, key_type: str, message_digest: str, crypto_backend: str
+) -> tuple[bytes, bytes]:
+    """Worker process target. Key pair objects can't be pickled so the key
+    pair is passed back to the parent process PEM encoded by the library it
+    was created with
+
+    :return: tuple of PEM encoded private key and certificate request
+    """
+    key_pair = OnlineCaClient.create_key_pair(
+        n_bits_for_key=n_bits_for_key,
+        key_type=key_type,
+        crypto_backend=crypto_backend,
+    )
+    cert_req = OnlineCaClient.create_cert_req(key_pair, message_digest=message_digest)
+
+    if isinstance(key_pair, crypto.PKey):
+        pem_key_pair = crypto.dump_privatekey(crypto.FILETYPE_PEM, key_pair)
+    else:
+        pem_key_pair = key_pair.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+
+    return pem_key_pair, cert_req
+
+
+def _load_key_pair(pem_key_pair: bytes, crypto_backend: str):
+    """Rebuild key pair returned from a worker process as an object of the
+    library selected by crypto_backend"""
+    if crypto_backend == OnlineCaClient.CRYPTO_BACKEND_CRYPTOGRAPHY:
+        return serialization.load_pem_private_key(pem_key_pair, None)
+
+    return crypto.load_privatekey(crypto.FILETYPE_PEM, pem_key_pair)
+
+
+class CertReqEngine:
+    """Generate key pairs and signed certificate requests in parallel over a
+    pool of worker processes
+
+    >>> with CertReqEngine() as engine:
+    ...     for key_pair, cert_req in engine.generate(100):
+    ...         ...
+    """
+
+    # Number of jobs queued per worker process. Bounding the jobs in flight
+    # keeps memory use flat for large batches while keeping the workers busy
+    JOBS_PER_WORKER = 2
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        n_bits_for_key: int = OnlineCaClient.PRIKEY_NBITS,
+        key_type: str = OnlineCaClient.DEF_KEY_TYPE,
+        message_digest: str = OnlineCaClient.MESSAGE_DIGEST_TYPE,
+        crypto_backend: str = OnlineCaClient.DEF_CRYPTO_BACKEND,
+    ) -> None:
+        """
+        :param max_workers: number of worker processes. Defaults to the number
+        of CPUs on the host
+        :param n_bits_for_key: number of bits for private key generation
+        (RSA only)
+        :param key_type: key algorithm, one of OnlineCaClient.KEY_TYPES
+        :param message_digest: message digest type for signing certificate
+        requests
+        :param crypto_backend: library used to create key pairs, one of
+        OnlineCaClient.CRYPTO_BACKENDS. Key pairs are returned as objects of
+        this library
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.n_bits_for_key = n_bits_for_key
+        self.key_type = key_type
+        self.message_digest = message_digest
+        self.crypto_backend = crypto_backend
+        self._executor = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
+    def start(self) -> None:
+        """Start worker processes"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+
+    def shutdown(self) -> None:
+        """Shut down worker processes, cancelling any pending jobs"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def generate(self, n_items: int) -> Iterator[tuple]:
+        """Generate key pairs and certificate requests, yielding each pair as
+        soon as it is ready so that the caller can start posting requests
+        before the whole batch has completed. Results are yielded in order of
+        completion.
+
+        :param n_items: number of key pair, certificate request pairs to
+        generate
+        :return: iterator of tuples of key pair object and PEM encoded
+        certificate request. Key pairs are OpenSSL.crypto.PKey or
+        cryptography private key objects depending on crypto_backend
+        """
+        self.start()
+
+        max_pending = self.max_workers * self.__class__.JOBS_PER_WORKER
+        n_submitted = 0
+        pending = set()
+        try:
+            while n_submitted < n_items or pending:
+                while n_submitted < n_items and len(pending) < max_pending:
+                    pending.add(
+                        self._executor.submit(
+                            _create_key_pair_and_cert_req,
+                            self.n_bits_for_key,
+                            self.key_type,
+                            self.message_digest,
+                            self.crypto_backend,
+                        )
+                    )
+                    n_submitted += 1
+
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pem_key_pair, cert_req = future.result()
+                    yield _load_key_pair(pem_key_pair, self.crypto_backend), cert_req
+        finally:
+            # Generator closed early or an error occurred - don't leave jobs
+            # running for results that will never be collected
+            for future in pending:
+                future.cancel()
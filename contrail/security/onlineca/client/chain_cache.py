@@ -0,0 +1,184 @@
+"""Online CA service client - cache of CA certificates returned in the chain of
+trust with issued certificates
+
+The Online CA service returns the same CA certificates with every certificate
+it issues. Caching them by fingerprint means that they are parsed and PEM
+encoded once only rather than for each certificate issued.
+
+Contrail Project
+"""
+__author__ = "P J Kershaw"
+__date__ = "16/10/26"
+__copyright__ = "Copyright 2026 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level directory"
+__contact__ = "Philip.Kershaw@stfc.ac.uk"
+import os
+import stat
+import hashlib
+import logging
+import threading
+from collections import OrderedDict, namedtuple
+from typing import Optional
+
+from OpenSSL import crypto
+
+from contrail.security.onlineca.client import _write_file_atomic
+
+log = logging.getLogger(__name__)
+
+CachedCertificate = namedtuple("CachedCertificate", ("cert", "pem"))
+
+
+class CertificateChainCache:
+    """Cache of parsed CA certificates and their PEM encodings keyed by
+    SHA-256 fingerprint of the DER encoded certificate. Entries are held in
+    memory and optionally persisted in a directory so that they can be
+    re-used between processes.
+
+    >>> onlineca_client.chain_cache = CertificateChainCache()
+    """
+
+    DEF_MAXSIZE = 64
+    CACHE_FILE_SUFFIX = ".pem"
+
+    def __init__(self, cache_dir: Optional[str] = None, maxsize: int = DEF_MAXSIZE):
+        """
+        :param cache_dir: optionally set a directory in which to persist cached
+        certificates
+        :param maxsize: maximum number of certificates held in memory. The
+        least recently used is discarded when this is exceeded
+        """
+        self.cache_dir = cache_dir
+        self.maxsize = maxsize
+
+        self._entries = OrderedDict()
+
+        # Look up of entries by certificate object so that PEM encodings can be
+        # retrieved for certificates already returned from the cache
+        self._entries_by_cert_id = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def stats(self) -> dict:
+        """Snapshot of cache statistics"""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self)}
+
+    @staticmethod
+    def fingerprint(der: bytes) -> bytes:
+        """Calculate fingerprint used as key for cache entries
+
+        :param der: DER encoded certificate
+        :return: SHA-256 digest of the DER encoding
+        """
+        return hashlib.sha256(der).digest()
+
+    def get(self, fingerprint: bytes) -> Optional[CachedCertificate]:
+        """Get cached certificate
+
+        :param fingerprint: SHA-256 digest of the DER encoded certificate
+        :return: tuple of certificate object and its PEM encoding or None if
+        the certificate isn't cached
+        """
+        with self._lock:
+            entry = self._entries.get(fingerprint)
+            if entry is not None:
+                self._entries.move_to_end(fingerprint)
+                self.hits += 1
+                return entry
+
+        if self.cache_dir is not None:
+            entry = self._read_cache_file(fingerprint)
+            if entry is not None:
+                with self._lock:
+                    self.hits += 1
+                    self._add_entry(fingerprint, entry)
+                return entry
+
+        with self._lock:
+            self.misses += 1
+
+        return None
+
+    def put(self, fingerprint: bytes, cert: crypto.X509) -> CachedCertificate:
+        """Add certificate to the cache
+
+        :param fingerprint: SHA-256 digest of the DER encoded certificate
+        :param cert: certificate to cache
+        :return: cache entry
+        """
+        entry = CachedCertificate(
+            cert, crypto.dump_certificate(crypto.FILETYPE_PEM, cert)
+        )
+        with self._lock:
+            self._add_entry(fingerprint, entry)
+
+        if self.cache_dir is not None:
+            os.makedirs(self.cache_dir, mode=stat.S_IRWXU, exist_ok=True)
+            _write_file_atomic(self._get_cache_filepath(fingerprint), entry.pem)
+
+        return entry
+
+    def get_pem(self, cert: crypto.X509) -> Optional[bytes]:
+        """Get PEM encoding for a certificate object previously returned from
+        the cache
+
+        :param cert: certificate object
+        :return: PEM encoded certificate or None if it isn't cached
+        """
+        entry = self._entries_by_cert_id.get(id(cert))
+        if entry is not None and entry.cert is cert:
+            return entry.pem
+
+        return None
+
+    def clear(self) -> None:
+        """Remove all entries held in memory. Cache files are left in place"""
+        with self._lock:
+            self._entries.clear()
+            self._entries_by_cert_id.clear()
+
+    def _add_entry(self, fingerprint: bytes, entry: CachedCertificate) -> None:
+        # Caller must hold the lock. Any existing entry for the same
+        # certificate is replaced along with its look up by certificate object
+        replaced_entry = self._entries.pop(fingerprint, None)
+        if replaced_entry is not None:
+            del self._entries_by_cert_id[id(replaced_entry.cert)]
+
+        self._entries[fingerprint] = entry
+        self._entries_by_cert_id[id(entry.cert)] = entry
+
+        while len(self._entries) > self.maxsize:
+            _, evicted_entry = self._entries.popitem(last=False)
+            del self._entries_by_cert_id[id(evicted_entry.cert)]
+
+    def _get_cache_filepath(self, fingerprint: bytes) -> str:
+        return os.path.join(
+            self.cache_dir, fingerprint.hex() + self.__class__.CACHE_FILE_SUFFIX
+        )
+
+    def _read_cache_file(self, fingerprint: bytes) -> Optional[CachedCertificate]:
+        try:
+            with open(self._get_cache_filepath(fingerprint), "rb") as cache_file:
+                pem = cache_file.read()
+        except FileNotFoundError:
+            return None
+
+        try:
+            cert = crypto.load_certificate(crypto.FILETYPE_PEM, pem)
+        except crypto.Error as e:
+            log.warning("Ignoring invalid chain cache file: %s", e)
+            return None
+
+        # Guard against a file which has been tampered with or corrupted
+        der = crypto.dump_certificate(crypto.FILETYPE_ASN1, cert)
+        if self.fingerprint(der) != fingerprint:
+            log.warning("Ignoring chain cache file with mismatched fingerprint")
+            return None
+
+        return CachedCertificate(cert, pem)
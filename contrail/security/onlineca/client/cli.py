@@ -6,6 +6,12 @@ Sub commands
 
 ``onlineca-client get-cert`` retrieve a new certificate based on
 user credentials
+
+``onlineca-client get_cert_batch`` retrieve certificates for many identities
+listed in a CSV or JSON lines file
+
+``onlineca-client agent`` keep a delegated certificate obtained with an OAuth
+access token fresh on disk
 """
 
 __author__ = "Philip Kershaw"
@@ -15,7 +21,10 @@ __license__ = __license__ = """BSD - See LICENSE file in top-level directory"""
 __revision__ = "$Id$"
 import os
 import sys
+import csv
+import json
 import logging
+import functools
 import getpass
 import warnings
 from argparse import ArgumentParser, ArgumentError
@@ -23,9 +32,10 @@ from argparse import ArgumentParser, ArgumentError
 from requests.packages.urllib3.exceptions import InsecureRequestWarning
 
 from contrail.security.onlineca.client import OnlineCaClient
-from contrail.security.onlineca.client.oauth2_web_client import (
-    OAuthAuthorisationCodeFlowClient,
-)
+
+# Modules needed by individual sub-commands only are imported by the methods
+# implementing them so that start-up for other sub-commands isn't slowed by
+# them. In particular, the OAuth web client pulls in a web server stack
 
 log = logging.getLogger(__name__)
 
@@ -35,7 +45,14 @@ class OnlineCaClientCLI(object):
 
     GET_TRUSTROOTS_CMD = "get_trustroots"
     GET_CERT_CMD = "get_cert"
+    GET_CERT_BATCH_CMD = "get_cert_batch"
+    AGENT_CMD = "agent"
     GET_ACCESS_TOK_CMD = "get_token"
+    REFRESH_ACCESS_TOK_CMD = "refresh_token"
+
+    # Choices for get_token callback server - see
+    # oauth2_web_client.OAuthAuthorisationCodeFlowClient.CALLBACK_SERVERS
+    CALLBACK_SERVERS = ("asyncio", "uvicorn")
 
     USERNAME_ARGNAMES = ("-l", "--username")
     PASSWD_ARGNAMES = ("-P", "--stdin-password")
@@ -43,6 +60,16 @@ class OnlineCaClientCLI(object):
     DEF_CACERT_DIR = os.path.join(os.path.expanduser("~"), ".onlineca", "certificates")
     PEM_OUT_TO_STDOUT = "-"
     TOK_FILEPATH_DEF_FLAG = "-"
+    DEF_CACHE_MIN_LIFETIME = 3600
+
+    # Defaults for agent sub-command. These match the defaults of
+    # agent.CredentialAgent, which is imported only when the agent is run
+    DEF_AGENT_RENEW_FRACTION = 0.5
+    DEF_AGENT_JITTER_FRACTION = 0.05
+    BATCH_IN_FROM_STDIN = "-"
+    BATCH_FORMAT_CSV = "csv"
+    BATCH_FORMAT_JSONL = "jsonl"
+    BATCH_FORMATS = (BATCH_FORMAT_CSV, BATCH_FORMAT_JSONL)
 
     def __init__(self):
         self.clnt = OnlineCaClient()
@@ -54,6 +81,22 @@ class OnlineCaClientCLI(object):
         :param cmdline_args: command line arguments from argparse
         ArgumentParser
         """
+        self.clnt.key_type = cmdline_args.key_type
+
+        if cmdline_args.reuse_credential:
+            if cmdline_args.pem_out_filepath == self.PEM_OUT_TO_STDOUT:
+                raise ArgumentError(
+                    None, "Set an output file to re-use a credential from"
+                )
+
+            from contrail.security.onlineca.client.credential_cache import (
+                CredentialCache,
+            )
+
+            self.clnt.credential_cache = CredentialCache(
+                min_remaining_lifetime=cmdline_args.min_lifetime
+            )
+
         if cmdline_args.tok_filepath:
             if cmdline_args.username or cmdline_args.stdin_password:
                 raise ArgumentError(
@@ -65,12 +108,17 @@ class OnlineCaClientCLI(object):
                 )
 
             if cmdline_args.tok_filepath == self.TOK_FILEPATH_DEF_FLAG:
-                access_tok = OnlineCaClient.read_oauth_tok()
+                tok_filepath = None
             else:
-                access_tok = OnlineCaClient.read_oauth_tok(
-                    tok_filepath=cmdline_args.tok_filepath
+                tok_filepath = cmdline_args.tok_filepath
+
+            if cmdline_args.settings_filepath:
+                self._set_oauth_refresh_settings(
+                    cmdline_args.settings_filepath, tok_filepath
                 )
 
+            access_tok = OnlineCaClient.read_oauth_tok(tok_filepath=tok_filepath)
+
             self.clnt.get_delegated_certificate(
                 access_tok,
                 cmdline_args.server_url,
@@ -101,6 +149,190 @@ class OnlineCaClientCLI(object):
             pem_out_filepath=cmdline_args.pem_out_filepath,
         )
 
+    def _get_cert_batch(self, cmdline_args):
+        """Issue certificates for jobs read from a CSV or JSON lines file
+
+        :type cmdline_args: argparse.Namespace
+        :param cmdline_args: command line arguments from argparse
+        ArgumentParser
+        """
+        self.clnt.key_type = cmdline_args.key_type
+        self.clnt.ca_cert_dir = cmdline_args.ca_cert_dir
+
+        if cmdline_args.batch_filepath == self.BATCH_IN_FROM_STDIN:
+            batch_file = sys.stdin
+        else:
+            batch_file = open(cmdline_args.batch_filepath, newline="")
+
+        batch_format = cmdline_args.batch_format
+        if batch_format is None:
+            if cmdline_args.batch_filepath.endswith(".csv"):
+                batch_format = self.BATCH_FORMAT_CSV
+            else:
+                batch_format = self.BATCH_FORMAT_JSONL
+
+        n_jobs = 0
+        n_errors = 0
+        try:
+            jobs = self._read_cert_batch_jobs(batch_file, batch_format)
+            for result in self.clnt.get_certificates(
+                jobs, cmdline_args.server_url, max_workers=cmdline_args.n_workers
+            ):
+                n_jobs += 1
+                username, _, pem_out_filepath = result.job
+                if result.error is None:
+                    print(f"{username}: issued {pem_out_filepath or ''}".rstrip())
+                else:
+                    n_errors += 1
+                    print(f"{username}: error: {result.error}", file=sys.stderr)
+        finally:
+            if batch_file is not sys.stdin:
+                batch_file.close()
+
+        if n_errors:
+            raise Exception(f"{n_errors} of {n_jobs} certificate requests failed")
+
+    @classmethod
+    def _read_cert_batch_jobs(cls, batch_file, batch_format):
+        """Read jobs for bulk issuance. Each record has the fields "username",
+        "out" for the output file path and either "password" or "token" for
+        a path to an OAuth token file ('-' for the default location). CSV
+        files must have a header line with these field names.
+
+        Token files are read as each job runs. A record which can't be parsed
+        or has no username, or a CSV row with the wrong number of fields,
+        gives a job which fails with the error, identified by its line number
+        in place of a username, so that the rest of the batch still runs
+
+        :param batch_file: file object to read from
+        :param batch_format: one of BATCH_FORMATS
+        :return: iterator of tuples of username, password or callable
+        returning an OAuth token and output file path as expected by
+        OnlineCaClient.get_certificates
+        """
+        if batch_format == cls.BATCH_FORMAT_CSV:
+            records = csv.DictReader(batch_file)
+            for record in records:
+                try:
+                    # Short rows have None for missing fields and long ones
+                    # have extra fields listed under a None key
+                    if None in record or None in record.values():
+                        raise ValueError(f"expecting {len(records.fieldnames)} fields")
+
+                    cls._check_cert_batch_record(record)
+                except ValueError as e:
+                    yield cls._create_invalid_cert_batch_job(records.line_num, e)
+                else:
+                    yield cls._create_cert_batch_job(record)
+            return
+
+        for line_num, line in enumerate(batch_file, 1):
+            if not line.strip():
+                continue
+
+            try:
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError(
+                        f"expecting a JSON object; got {type(record).__name__}"
+                    )
+
+                cls._check_cert_batch_record(record)
+            except ValueError as e:
+                yield cls._create_invalid_cert_batch_job(line_num, e)
+            else:
+                yield cls._create_cert_batch_job(record)
+
+    @staticmethod
+    def _check_cert_batch_record(record):
+        """Check a record read from a batch file has the fields needed
+
+        :param record: dictionary of record fields
+        :raises ValueError: if the record is invalid
+        """
+        if not record.get("username"):
+            raise ValueError('missing "username"')
+
+    @classmethod
+    def _create_invalid_cert_batch_job(cls, line_num, error):
+        """Make a job which fails with the error from parsing a record. It is
+        identified by the record's line number in place of a username
+
+        :param line_num: line number of the record in the batch file
+        :param error: exception raised parsing the record
+        :return: job tuple as for _create_cert_batch_job
+        """
+        error = ValueError(f"Invalid job record: {error}")
+        return (
+            f"line {line_num}",
+            functools.partial(cls._raise_batch_job_error, error),
+            None,
+        )
+
+    @classmethod
+    def _create_cert_batch_job(cls, record):
+        """Make a job tuple for OnlineCaClient.get_certificates from a
+        record read from a batch file
+
+        :param record: dictionary of record fields
+        :return: tuple of username, password or callable returning an OAuth
+        token and output file path
+        """
+        tok_filepath = record.get("token")
+        if tok_filepath:
+            if tok_filepath == cls.TOK_FILEPATH_DEF_FLAG:
+                tok_filepath = None
+
+            password_or_token = functools.partial(
+                OnlineCaClient.read_oauth_tok, tok_filepath=tok_filepath
+            )
+        else:
+            password_or_token = record.get("password", "")
+
+        return (
+            record.get("username", ""),
+            password_or_token,
+            record.get("out") or None,
+        )
+
+    @staticmethod
+    def _raise_batch_job_error(error):
+        raise error
+
+    def _run_agent(self, cmdline_args):
+        """Run credential agent renewing a delegated certificate until
+        interrupted
+
+        :type cmdline_args: argparse.Namespace
+        :param cmdline_args: command line arguments from argparse
+        ArgumentParser
+        """
+        self.clnt.key_type = cmdline_args.key_type
+        self.clnt.ca_cert_dir = cmdline_args.ca_cert_dir
+
+        if cmdline_args.tok_filepath == self.TOK_FILEPATH_DEF_FLAG:
+            tok_filepath = None
+        else:
+            tok_filepath = cmdline_args.tok_filepath
+
+        if cmdline_args.settings_filepath:
+            self._set_oauth_refresh_settings(
+                cmdline_args.settings_filepath, tok_filepath
+            )
+
+        from contrail.security.onlineca.client.agent import CredentialAgent
+
+        agent = CredentialAgent(
+            self.clnt,
+            cmdline_args.server_url,
+            cmdline_args.pem_out_filepath,
+            tok_filepath=tok_filepath,
+            socket_path=cmdline_args.socket_path,
+            renew_fraction=cmdline_args.renew_fraction,
+            jitter_fraction=cmdline_args.jitter_fraction,
+        )
+        agent.run()
+
     def _get_trustroots(self, cmdline_args):
         """Retrieve Certificate Authority certificates for bootstrapping trust
         with the Online CA service
@@ -110,25 +342,70 @@ class OnlineCaClientCLI(object):
         ArgumentParser
         """
         self.clnt.ca_cert_dir = cmdline_args.ca_cert_dir
-        self.clnt.get_trustroots(
-            cmdline_args.server_url,
-            write_to_ca_cert_dir=True,
-            bootstrap=cmdline_args.bootstrap,
+        self.clnt.sync_trustroots(
+            cmdline_args.server_url, bootstrap=cmdline_args.bootstrap
         )
 
     def _get_access_tok(self, cmdline_args):
         """Get OAuth 2.0 access token invoking authorisation code flow with
         a web server and browser
         """
+        from contrail.security.onlineca.client.oauth2_web_client import (
+            OAuthAuthorisationCodeFlowClient,
+        )
+
         clnt = OAuthAuthorisationCodeFlowClient(
             settings_filepath=cmdline_args.settings_filepath,
             tok_filepath=cmdline_args.tok_filepath,
+            callback_server=cmdline_args.callback_server,
         )
         clnt.get_access_tok()
 
         # completed
         print(f"Access token written to '{clnt.tok_filepath}'")
 
+    def _refresh_access_tok(self, cmdline_args):
+        """Get a new OAuth 2.0 access token using the refresh token saved with
+        the current one. No interaction with a browser is needed
+        """
+        if cmdline_args.tok_filepath == self.TOK_FILEPATH_DEF_FLAG:
+            tok_filepath = None
+        else:
+            tok_filepath = cmdline_args.tok_filepath
+
+        self._set_oauth_refresh_settings(cmdline_args.settings_filepath, tok_filepath)
+
+        access_tok = OnlineCaClient.read_oauth_tok(tok_filepath=tok_filepath)
+        self.clnt.refresh_oauth_tok(access_tok, force=True)
+
+        print(
+            "Access token written to "
+            f"'{tok_filepath or OnlineCaClient.DEF_OAUTH_TOK_FILEPATH}'"
+        )
+
+    def _set_oauth_refresh_settings(self, settings_filepath, tok_filepath):
+        """Set client to refresh OAuth access tokens using the settings for
+        the OAuth 2.0 service read from file
+
+        :param settings_filepath: settings file path as for get_token. If
+        None, the environment variable setting or default is used
+        :param tok_filepath: file to write refreshed tokens to. If None, the
+        default is used
+        """
+        from contrail.security.onlineca.client.oauth2_web_client import (
+            OAuthAuthorisationCodeFlowClient,
+        )
+
+        settings = OAuthAuthorisationCodeFlowClient.read_settings_file(
+            settings_filepath
+        )
+        self.clnt.oauth_refresh_settings = {
+            "token_url": settings["token_url"],
+            "client_id": settings["client_id"],
+            "client_secret": settings["client_secret"],
+            "tok_filepath": tok_filepath,
+        }
+
     def main(self, *args):
         """Main method for parsing arguments from the command line or input
         tuple and calling appropriate command
@@ -222,15 +499,64 @@ class OnlineCaClientCLI(object):
             "-f",
             "--settings",
             dest="settings_filepath",
-            default=OAuthAuthorisationCodeFlowClient.DEF_SETTINGS_FILEPATH,
             metavar="<settings file path>",
             help="Specify YAML format file containing required "
             "settings for interaction with OAuth 2.0 service"
-            " needed to obtain an access token",
+            " needed to obtain an access token. If omitted, the path is "
+            "taken from the ONLINECA_CLNT_SETTINGS_FILEPATH environment "
+            "variable or defaults to ~/.onlinecaclient_idp.yaml",
+        )
+
+        get_access_tok_arg_parser.add_argument(
+            "--callback-server",
+            dest="callback_server",
+            choices=self.__class__.CALLBACK_SERVERS,
+            default=self.__class__.CALLBACK_SERVERS[0],
+            help="Server for receiving the callback from the OAuth 2.0 "
+            "service: a lightweight asyncio listener (default) or the full "
+            "OAuth web application run with uvicorn",
         )
 
         get_access_tok_arg_parser.set_defaults(func=self._get_access_tok)
 
+        # Refresh access token command configuration
+        refresh_access_tok_descr_and_help = (
+            "Obtain a new OAuth access token using the refresh token saved "
+            f"with the current one by the '{self.GET_ACCESS_TOK_CMD}' command. "
+            "No browser session is needed"
+        )
+
+        refresh_access_tok_arg_parser = sub_parsers.add_parser(
+            self.__class__.REFRESH_ACCESS_TOK_CMD,
+            help=refresh_access_tok_descr_and_help,
+            description=refresh_access_tok_descr_and_help,
+        )
+
+        refresh_access_tok_arg_parser.add_argument(
+            "-t",
+            "--token",
+            default=self.__class__.TOK_FILEPATH_DEF_FLAG,
+            metavar="<token file path>",
+            dest="tok_filepath",
+            help="File containing the OAuth access token and refresh token. "
+            "It is replaced with the new token. Defaults to "
+            f"'{OnlineCaClient.DEF_OAUTH_TOK_FILEPATH}'",
+        )
+
+        refresh_access_tok_arg_parser.add_argument(
+            "-f",
+            "--settings",
+            dest="settings_filepath",
+            metavar="<settings file path>",
+            help="Specify YAML format file containing settings for the "
+            "OAuth 2.0 service as for the "
+            f"'{self.GET_ACCESS_TOK_CMD}' command. If omitted, the path is "
+            "taken from the ONLINECA_CLNT_SETTINGS_FILEPATH environment "
+            "variable or defaults to ~/.onlinecaclient_idp.yaml",
+        )
+
+        refresh_access_tok_arg_parser.set_defaults(func=self._refresh_access_tok)
+
         # Get certificate command configuration
         get_cert_descr_and_help = "Obtain a new certificate from an Online CA"
         get_cert_arg_parser = sub_parsers.add_parser(
@@ -302,8 +628,231 @@ class OnlineCaClientCLI(object):
             help="Directory containing CA certificate trustroots " "for trusting",
         )
 
+        get_cert_arg_parser.add_argument(
+            "-k",
+            "--key-type",
+            dest="key_type",
+            choices=OnlineCaClient.KEY_TYPES,
+            default=OnlineCaClient.DEF_KEY_TYPE,
+            help="Key algorithm for the new key pair. Elliptic curve keys "
+            "are much faster to generate than RSA keys but check that the "
+            "Online CA service supports them. Defaults to "
+            f"{OnlineCaClient.DEF_KEY_TYPE!r}",
+        )
+
+        get_cert_arg_parser.add_argument(
+            "--reuse-credential",
+            dest="reuse_credential",
+            action="store_true",
+            help="Re-use the credential in the output file if it was issued "
+            "by the same server for the same user and password or token and "
+            "it is not due to expire. Otherwise a new credential is obtained. "
+            "A metadata file with the suffix '.cache.json' is saved next to "
+            "the output file",
+        )
+
+        get_cert_arg_parser.add_argument(
+            "--min-lifetime",
+            dest="min_lifetime",
+            type=float,
+            default=self.__class__.DEF_CACHE_MIN_LIFETIME,
+            metavar="<seconds>",
+            help="Minimum remaining lifetime in seconds for a cached "
+            "credential to be re-used. Defaults to "
+            f"{self.__class__.DEF_CACHE_MIN_LIFETIME}",
+        )
+
+        get_cert_arg_parser.add_argument(
+            "-f",
+            "--settings",
+            dest="settings_filepath",
+            metavar="<settings file path>",
+            help="Refresh the OAuth access token before it expires using "
+            "the refresh token saved with it. Set to the file containing "
+            "settings for the OAuth 2.0 service as for the "
+            f"'{self.GET_ACCESS_TOK_CMD}' command. The refreshed token is "
+            "written back to the token file",
+        )
+
         get_cert_arg_parser.set_defaults(func=self._get_cert)
 
+        # Get certificates in bulk command configuration
+        get_cert_batch_descr_and_help = (
+            "Obtain new certificates for many identities from an Online CA. "
+            "Jobs are read from a CSV file with a header line or a JSON lines "
+            'file. Each record has the fields "username", "out" for the output '
+            'file path and either "password" or "token" for the path to an '
+            "OAuth token file"
+        )
+        get_cert_batch_arg_parser = sub_parsers.add_parser(
+            self.__class__.GET_CERT_BATCH_CMD,
+            help=get_cert_batch_descr_and_help,
+            description=get_cert_batch_descr_and_help,
+        )
+
+        get_cert_batch_arg_parser.add_argument(
+            "-s",
+            "--server-url",
+            dest="server_url",
+            required=True,
+            metavar="<get certificate URL>",
+            help="Server URL for Get Certificate request",
+        )
+
+        get_cert_batch_arg_parser.add_argument(
+            "-i",
+            "--in",
+            dest="batch_filepath",
+            metavar="<jobs file>",
+            default=self.__class__.BATCH_IN_FROM_STDIN,
+            help="File containing jobs. Defaults to stdin",
+        )
+
+        get_cert_batch_arg_parser.add_argument(
+            "-F",
+            "--format",
+            dest="batch_format",
+            choices=self.__class__.BATCH_FORMATS,
+            help="Format of jobs file. If omitted, files with a '.csv' "
+            "extension are read as CSV and anything else as JSON lines",
+        )
+
+        get_cert_batch_arg_parser.add_argument(
+            "-w",
+            "--workers",
+            dest="n_workers",
+            type=int,
+            default=OnlineCaClient.DEF_N_BATCH_WORKERS,
+            metavar="<number of workers>",
+            help="Number of certificates to request concurrently. Defaults "
+            f"to {OnlineCaClient.DEF_N_BATCH_WORKERS}",
+        )
+
+        get_cert_batch_arg_parser.add_argument(
+            "-c",
+            "--ca-cert-dir",
+            dest="ca_cert_dir",
+            metavar="<CA certificate directory>",
+            default=self.__class__.DEF_CACERT_DIR,
+            help="Directory containing CA certificate trustroots for trusting",
+        )
+
+        get_cert_batch_arg_parser.add_argument(
+            "-k",
+            "--key-type",
+            dest="key_type",
+            choices=OnlineCaClient.KEY_TYPES,
+            default=OnlineCaClient.DEF_KEY_TYPE,
+            help="Key algorithm for new key pairs. Defaults to "
+            f"{OnlineCaClient.DEF_KEY_TYPE!r}",
+        )
+
+        get_cert_batch_arg_parser.set_defaults(func=self._get_cert_batch)
+
+        # Credential agent command configuration
+        agent_descr_and_help = (
+            "Run an agent which keeps a delegated certificate fresh on disk, "
+            "renewing it with an OAuth access token part way through its "
+            "lifetime. Jobs can read the credential file or obtain the "
+            "credential from the agent over a Unix socket"
+        )
+        agent_arg_parser = sub_parsers.add_parser(
+            self.__class__.AGENT_CMD,
+            help=agent_descr_and_help,
+            description=agent_descr_and_help,
+        )
+
+        agent_arg_parser.add_argument(
+            "-s",
+            "--server-url",
+            dest="server_url",
+            required=True,
+            metavar="<get certificate URL>",
+            help="Server URL for Get Certificate request",
+        )
+
+        agent_arg_parser.add_argument(
+            "-t",
+            "--token",
+            dest="tok_filepath",
+            default=self.__class__.TOK_FILEPATH_DEF_FLAG,
+            metavar="<token file path>",
+            help="File containing OAuth access token. Defaults to "
+            f"'{OnlineCaClient.DEF_OAUTH_TOK_FILEPATH}'",
+        )
+
+        agent_arg_parser.add_argument(
+            "-o",
+            "--out",
+            dest="pem_out_filepath",
+            required=True,
+            metavar="<output credential file>",
+            help="Output path for file containing PEM-encoded private key "
+            "and certificate. The file is replaced atomically on renewal",
+        )
+
+        agent_arg_parser.add_argument(
+            "-S",
+            "--socket",
+            dest="socket_path",
+            metavar="<socket path>",
+            help="Serve the credential on a Unix socket at this path",
+        )
+
+        agent_arg_parser.add_argument(
+            "--renew-fraction",
+            dest="renew_fraction",
+            type=float,
+            default=self.__class__.DEF_AGENT_RENEW_FRACTION,
+            metavar="<fraction>",
+            help="Fraction of the certificate lifetime after which to renew "
+            f"it. Defaults to {self.__class__.DEF_AGENT_RENEW_FRACTION}",
+        )
+
+        agent_arg_parser.add_argument(
+            "--jitter",
+            dest="jitter_fraction",
+            type=float,
+            default=self.__class__.DEF_AGENT_JITTER_FRACTION,
+            metavar="<fraction>",
+            help="Maximum random adjustment to the renewal time as a fraction "
+            "of the certificate lifetime. Defaults to "
+            f"{self.__class__.DEF_AGENT_JITTER_FRACTION}",
+        )
+
+        agent_arg_parser.add_argument(
+            "-c",
+            "--ca-cert-dir",
+            dest="ca_cert_dir",
+            metavar="<CA certificate directory>",
+            default=self.__class__.DEF_CACERT_DIR,
+            help="Directory containing CA certificate trustroots for trusting",
+        )
+
+        agent_arg_parser.add_argument(
+            "-k",
+            "--key-type",
+            dest="key_type",
+            choices=OnlineCaClient.KEY_TYPES,
+            default=OnlineCaClient.DEF_KEY_TYPE,
+            help="Key algorithm for new key pairs. Defaults to "
+            f"{OnlineCaClient.DEF_KEY_TYPE!r}",
+        )
+
+        agent_arg_parser.add_argument(
+            "-f",
+            "--settings",
+            dest="settings_filepath",
+            metavar="<settings file path>",
+            help="Refresh the OAuth access token before it expires using "
+            "the refresh token saved with it. Set to the file containing "
+            "settings for the OAuth 2.0 service as for the "
+            f"'{self.GET_ACCESS_TOK_CMD}' command. The refreshed token is "
+            "written back to the token file",
+        )
+
+        agent_arg_parser.set_defaults(func=self._run_agent)
+
         # Parses from arguments input to this method if set, otherwise parses
         # from sys.argv
         if len(args) > 0:
@@ -0,0 +1,315 @@
+"""Online CA service client - cache of issued credentials
+
+Credentials are cached by server URL and identity and re-used for as long as
+the certificate has more than a minimum remaining lifetime. A cache hit avoids
+both key generation and the call to the Online CA service.
+
+Contrail Project
+"""
+__author__ = "P J Kershaw"
+__date__ = "16/10/26"
+__copyright__ = "Copyright 2026 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level directory"
+__contact__ = "Philip.Kershaw@stfc.ac.uk"
+import os
+import hmac
+import json
+import time
+import base64
+import hashlib
+import logging
+import threading
+from collections import namedtuple
+from typing import Optional
+
+from OpenSSL import crypto
+
+from contrail.security.onlineca.client import OnlineCaClient, _write_file_atomic
+from contrail.security.onlineca.client.openssl_utils import asn1_time_to_timestamp
+
+log = logging.getLogger(__name__)
+
+# Credential held in memory. secret_mac binds it to the password or access
+# token used to obtain it. file_stat identifies the version of the output
+# file it was read from or written to or is None for memory only entries
+_CacheEntry = namedtuple(
+    "_CacheEntry", ("secret_mac", "key_pair", "certs", "not_after", "file_stat")
+)
+
+
+class CredentialCache:
+    """Cache of private keys and certificates issued by an Online CA service,
+    keyed by server URL and identity. Each credential is bound to the password
+    or access token used to obtain it and is only returned to a caller
+    presenting the same secret.
+
+    Credentials are held in memory. Where an output file path is given, the
+    credential written there by an earlier call, for example by a previous run
+    of the command line client, is re-used. A metadata file next to it records
+    the server and a salted digest of the secret.
+
+    >>> onlineca_client.credential_cache = CredentialCache(
+    ...     min_remaining_lifetime=3600
+    ... )
+    """
+
+    DEF_MIN_REMAINING_LIFETIME = 3600
+    METADATA_FILE_SUFFIX = ".cache.json"
+
+    # Key derivation settings for the secret digest saved in metadata files.
+    # The digest is deliberately slow to compute so that a password can't
+    # easily be recovered from it
+    SECRET_DIGEST_TYPE = "sha256"
+    SECRET_DIGEST_ITERATIONS = 100000
+    SECRET_SALT_NBYTES = 16
+    CERT_FINGERPRINT_TYPE = "sha256"
+
+    def __init__(
+        self, min_remaining_lifetime: float = DEF_MIN_REMAINING_LIFETIME
+    ) -> None:
+        """
+        :param min_remaining_lifetime: cached credentials are returned only if
+        the certificate remains valid for at least this number of seconds
+        """
+        self.min_remaining_lifetime = min_remaining_lifetime
+
+        self._entries = {}
+        self._lock = threading.Lock()
+
+        # Secrets are held in memory as MACs under a key private to this
+        # cache instance rather than in the clear
+        self._mac_key = os.urandom(32)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(
+        server_url: str, identity: str, pem_out_filepath: Optional[str] = None
+    ) -> tuple:
+        """Make cache key from server URL, identity and output file path"""
+        if pem_out_filepath is not None:
+            pem_out_filepath = os.path.abspath(pem_out_filepath)
+
+        return server_url, identity, pem_out_filepath
+
+    def get(
+        self,
+        server_url: str,
+        identity: str,
+        secret: str,
+        pem_out_filepath: Optional[str] = None,
+    ):
+        """Get cached credential
+
+        :param server_url: URL for get certificate endpoint
+        :param identity: username or access token used to obtain the
+        credential
+        :param secret: password or access token used to obtain the credential
+        :param pem_out_filepath: output file path given when the credential
+        was obtained. If set, a credential previously written to this file is
+        re-used
+        :return: tuple of key pair object and certificates or None if there is
+        no cached credential for the secret with sufficient lifetime remaining
+        """
+        key = self.make_key(server_url, identity, pem_out_filepath)
+        secret_mac = self._mac_secret(secret)
+        with self._lock:
+            entry = self._entries.get(key)
+
+        if pem_out_filepath is not None:
+            file_stat = self._stat(pem_out_filepath)
+            if entry is None or entry.file_stat != file_stat:
+                # Output file has been written since the entry was cached
+                entry = self._read_cache_file(
+                    server_url, identity, secret, pem_out_filepath, file_stat
+                )
+                if entry is not None:
+                    entry = entry._replace(secret_mac=secret_mac)
+                    with self._lock:
+                        self._entries[key] = entry
+
+        if entry is not None and hmac.compare_digest(entry.secret_mac, secret_mac):
+            if entry.not_after - time.time() >= self.min_remaining_lifetime:
+                with self._lock:
+                    self.hits += 1
+
+                return entry.key_pair, entry.certs
+
+            log.debug("Cached credential for %r is due to expire", server_url)
+
+        with self._lock:
+            self.misses += 1
+
+        return None
+
+    def put(
+        self,
+        server_url: str,
+        identity: str,
+        secret: str,
+        key_pair,
+        certs,
+        pem_out_filepath: Optional[str] = None,
+    ) -> None:
+        """Add credential to the cache
+
+        :param server_url: URL for get certificate endpoint
+        :param identity: username or access token used to obtain the
+        credential
+        :param secret: password or access token used to obtain the credential
+        :param key_pair: private key
+        :param certs: tuple of end entity certificate followed by any CA
+        certificates in the chain of trust
+        :param pem_out_filepath: file the credential has been written to. If
+        set, a metadata file is written alongside so that the credential can
+        be re-used from the file by other processes
+        """
+        key = self.make_key(server_url, identity, pem_out_filepath)
+        file_stat = None
+        if pem_out_filepath is not None:
+            file_stat = self._stat(pem_out_filepath)
+            if file_stat is None:
+                log.debug("Not caching credential for non-regular file output")
+                return
+
+            self._write_metadata_file(
+                server_url, identity, secret, certs[0], pem_out_filepath
+            )
+
+        entry = _CacheEntry(
+            self._mac_secret(secret),
+            key_pair,
+            tuple(certs),
+            self.get_not_after(certs[0]),
+            file_stat,
+        )
+        with self._lock:
+            self._entries[key] = entry
+
+    def clear(self) -> None:
+        """Remove all entries held in memory. Files are left in place"""
+        with self._lock:
+            self._entries.clear()
+
+    @staticmethod
+    def get_not_after(cert) -> float:
+        """Get certificate expiry time
+
+        :param cert: certificate
+        :type cert: OpenSSL.crypto.X509
+        :return: expiry time as seconds since the epoch
+        """
+        return asn1_time_to_timestamp(cert.get_notAfter())
+
+    def _mac_secret(self, secret: str) -> bytes:
+        return hmac.new(self._mac_key, secret.encode(), hashlib.sha256).digest()
+
+    @classmethod
+    def _digest_secret(
+        cls, server_url: str, identity: str, secret: str, salt: bytes
+    ) -> bytes:
+        return hashlib.pbkdf2_hmac(
+            cls.SECRET_DIGEST_TYPE,
+            f"{server_url}\0{identity}\0{secret}".encode(),
+            salt,
+            cls.SECRET_DIGEST_ITERATIONS,
+        )
+
+    @classmethod
+    def _get_cert_fingerprint(cls, cert) -> str:
+        return cert.digest(cls.CERT_FINGERPRINT_TYPE).decode()
+
+    @staticmethod
+    def _stat(filepath: str):
+        """Get the version of a file as a tuple of inode, size and
+        modification time. Returns None if it doesn't exist or isn't a
+        regular file
+        """
+        try:
+            file_stat = os.stat(filepath)
+        except OSError:
+            return None
+
+        if not os.path.isfile(filepath):
+            return None
+
+        return file_stat.st_ino, file_stat.st_size, file_stat.st_mtime_ns
+
+    @classmethod
+    def _get_metadata_filepath(cls, pem_out_filepath: str) -> str:
+        return pem_out_filepath + cls.METADATA_FILE_SUFFIX
+
+    def _read_cache_file(
+        self,
+        server_url: str,
+        identity: str,
+        secret: str,
+        pem_out_filepath: str,
+        file_stat,
+    ) -> Optional[_CacheEntry]:
+        """Read credential from an output file if its metadata shows that it
+        was obtained from the same server with the same identity and secret
+        """
+        if file_stat is None:
+            return None
+
+        try:
+            with open(self._get_metadata_filepath(pem_out_filepath)) as metadata_file:
+                metadata = json.load(metadata_file)
+
+            salt = base64.b64decode(metadata["salt"])
+            secret_digest = base64.b64decode(metadata["secret_digest"])
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            log.debug("No credential cache metadata for %r: %s", pem_out_filepath, e)
+            return None
+
+        if metadata.get("server_url") != server_url or not hmac.compare_digest(
+            secret_digest, self._digest_secret(server_url, identity, secret, salt)
+        ):
+            log.debug("Credential in %r is for a different user", pem_out_filepath)
+            return None
+
+        try:
+            with open(pem_out_filepath, "rb") as pem_out_file:
+                content = pem_out_file.read()
+
+            key_pair = crypto.load_privatekey(crypto.FILETYPE_PEM, content)
+            endentity_cert, certchain = OnlineCaClient._parse_cert_resp(content)
+        except Exception as e:
+            log.warning("Ignoring invalid credential file %r: %s", pem_out_filepath, e)
+            return None
+
+        # File may have been replaced since the metadata was written
+        if self._get_cert_fingerprint(endentity_cert) != metadata.get(
+            "cert_fingerprint"
+        ):
+            log.debug("Credential in %r doesn't match its metadata", pem_out_filepath)
+            return None
+
+        certs = (endentity_cert,) + tuple(certchain)
+        return _CacheEntry(
+            None, key_pair, certs, self.get_not_after(endentity_cert), file_stat
+        )
+
+    def _write_metadata_file(
+        self,
+        server_url: str,
+        identity: str,
+        secret: str,
+        endentity_cert,
+        pem_out_filepath: str,
+    ) -> None:
+        salt = os.urandom(self.__class__.SECRET_SALT_NBYTES)
+        metadata = {
+            "server_url": server_url,
+            "cert_fingerprint": self._get_cert_fingerprint(endentity_cert),
+            "salt": base64.b64encode(salt).decode(),
+            "secret_digest": base64.b64encode(
+                self._digest_secret(server_url, identity, secret, salt)
+            ).decode(),
+        }
+        _write_file_atomic(
+            self._get_metadata_filepath(pem_out_filepath),
+            json.dumps(metadata).encode(),
+        )
+
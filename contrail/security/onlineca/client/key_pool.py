@@ -0,0 +1,259 @@
+"""Online CA service client - pool of pre-generated key pairs
+
+Key generation is the slowest step in obtaining a certificate. The pool keeps
+a bounded stock of key pairs topped up by background worker threads so that
+certificate requests can be made without waiting on key generation.
+
+Contrail Project
+"""
+__author__ = "P J Kershaw"
+__date__ = "16/10/26"
+__copyright__ = "Copyright 2026 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level directory"
+__contact__ = "Philip.Kershaw@stfc.ac.uk"
+import functools
+import logging
+import threading
+from queue import Queue, Empty, Full
+from typing import Callable, Optional
+
+from OpenSSL import crypto
+
+from contrail.security.onlineca.client import OnlineCaClient
+
+log = logging.getLogger(__name__)
+
+
+class KeyPairPoolError(Exception):
+    """Base class for key pair pool errors"""
+
+
+class KeyPairPool:
+    """Bounded pool of pre-generated key pairs. Worker threads refill the pool
+    up to the high watermark whenever the number of key pairs held drops below
+    the low watermark. Key generation in OpenSSL releases the GIL so threads
+    give genuine parallelism here.
+
+    The pool can be passed to OnlineCaClient via its key_pair_pool attribute.
+    The client rejects key pairs from a pool whose key_type or crypto_backend
+    differs from its own:
+
+    >>> pool = KeyPairPool(key_type=onlineca_client.key_type)
+    >>> pool.start()
+    >>> onlineca_client.key_pair_pool = pool
+    """
+
+    DEF_LOW_WATERMARK = 2
+    DEF_HIGH_WATERMARK = 8
+    DEF_N_WORKERS = 1
+
+    # Interval at which idle workers wake to check for shut down
+    WORKER_POLL_INTERVAL = 1.0
+
+    def __init__(
+        self,
+        key_pair_factory: Optional[Callable[[], crypto.PKey]] = None,
+        low_watermark: int = DEF_LOW_WATERMARK,
+        high_watermark: int = DEF_HIGH_WATERMARK,
+        n_workers: int = DEF_N_WORKERS,
+        key_type: Optional[str] = None,
+        crypto_backend: Optional[str] = None,
+    ) -> None:
+        """
+        :param key_pair_factory: callable taking no arguments and returning a
+        new key pair. Defaults to OnlineCaClient.create_key_pair called with
+        key_type and crypto_backend
+        :param low_watermark: refill is triggered when the number of key pairs
+        held falls below this level
+        :param high_watermark: maximum number of key pairs held
+        :param n_workers: number of background threads generating key pairs
+        :param key_type: key algorithm of key pairs held, one of
+        OnlineCaClient.KEY_TYPES. Defaults to OnlineCaClient.DEF_KEY_TYPE if
+        key_pair_factory is omitted, otherwise to None - unknown
+        :param crypto_backend: library key pairs held are from, one of
+        OnlineCaClient.CRYPTO_BACKENDS. Defaults in the same way as key_type
+        """
+        if not 0 <= low_watermark <= high_watermark:
+            raise KeyPairPoolError(
+                "Expecting 0 <= low watermark <= high watermark; got "
+                f"{low_watermark!r} and {high_watermark!r}"
+            )
+
+        if high_watermark < 1:
+            raise KeyPairPoolError(
+                f"High watermark must be at least 1; got {high_watermark!r}"
+            )
+
+        if n_workers < 1:
+            raise KeyPairPoolError(
+                f"Number of workers must be at least 1; got {n_workers!r}"
+            )
+
+        if key_pair_factory is None:
+            if key_type is None:
+                key_type = OnlineCaClient.DEF_KEY_TYPE
+
+            if crypto_backend is None:
+                crypto_backend = OnlineCaClient.DEF_CRYPTO_BACKEND
+
+            key_pair_factory = functools.partial(
+                OnlineCaClient.create_key_pair,
+                key_type=key_type,
+                crypto_backend=crypto_backend,
+            )
+
+        if key_type is not None and key_type not in OnlineCaClient.KEY_TYPES:
+            raise KeyPairPoolError(
+                "Expecting one of %r for key_type; got %r"
+                % (OnlineCaClient.KEY_TYPES, key_type)
+            )
+
+        if (
+            crypto_backend is not None
+            and crypto_backend not in OnlineCaClient.CRYPTO_BACKENDS
+        ):
+            raise KeyPairPoolError(
+                "Expecting one of %r for crypto_backend; got %r"
+                % (OnlineCaClient.CRYPTO_BACKENDS, crypto_backend)
+            )
+
+        self.key_pair_factory = key_pair_factory
+        self.key_type = key_type
+        self.crypto_backend = crypto_backend
+        self.low_watermark = low_watermark
+        self.high_watermark = high_watermark
+        self.n_workers = n_workers
+
+        self._key_pairs = Queue(maxsize=high_watermark)
+        self._refill_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._workers = []
+
+        self._stats_lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._refills = 0
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def __len__(self):
+        return self._key_pairs.qsize()
+
+    @property
+    def running(self) -> bool:
+        return any(worker.is_alive() for worker in self._workers)
+
+    @property
+    def stats(self) -> dict:
+        """Snapshot of pool statistics: hits - key pairs served from the pool,
+        misses - key pairs generated inline because the pool was empty,
+        refills - key pairs generated by the background workers and size -
+        number of key pairs currently held
+        """
+        with self._stats_lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "refills": self._refills,
+                "size": len(self),
+            }
+
+    def start(self) -> None:
+        """Start background workers and fill the pool up to the high
+        watermark"""
+        if self.running:
+            return
+
+        self._stop_event.clear()
+        self._workers = [
+            threading.Thread(
+                target=self._run_worker,
+                name=f"{self.__class__.__name__}-worker-{i}",
+                daemon=True,
+            )
+            for i in range(self.n_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+        self._refill_event.set()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop background workers. Key pairs already in the pool are kept and
+        can still be retrieved with get"""
+        self._stop_event.set()
+
+        # Wake any idle workers so that they see the stop flag
+        self._refill_event.set()
+        for worker in self._workers:
+            worker.join(timeout)
+
+        self._workers = []
+
+    def get(self) -> crypto.PKey:
+        """Take a key pair from the pool. If the pool is empty, a key pair is
+        generated on the calling thread instead.
+
+        :return: public/private key pair
+        """
+        try:
+            key_pair = self._key_pairs.get_nowait()
+        except Empty:
+            key_pair = None
+
+        with self._stats_lock:
+            if key_pair is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+
+        if self._key_pairs.qsize() < self.low_watermark:
+            self._refill_event.set()
+
+        if key_pair is None:
+            log.debug("Key pair pool empty: generating key pair inline")
+            key_pair = self.key_pair_factory()
+
+        return key_pair
+
+    def _run_worker(self) -> None:
+        """Worker thread target: generate key pairs whenever a refill has been
+        signalled until the high watermark is reached"""
+        while not self._stop_event.is_set():
+            if not self._refill_event.wait(self.WORKER_POLL_INTERVAL):
+                continue
+
+            if self._stop_event.is_set():
+                break
+
+            if self._key_pairs.qsize() >= self.high_watermark:
+                # Pool is full - wait for the next refill signal. A get may
+                # have taken a key pair and signalled between the size check
+                # and clearing the event so check again to avoid missing it
+                self._refill_event.clear()
+                if self._key_pairs.qsize() >= self.high_watermark:
+                    continue
+
+            try:
+                key_pair = self.key_pair_factory()
+            except Exception:
+                log.exception("Error generating key pair for pool")
+                self._stop_event.wait(self.WORKER_POLL_INTERVAL)
+                continue
+
+            # Count the refill under the same lock as the put so that the
+            # stats never show a key pair in the pool that isn't accounted for
+            with self._stats_lock:
+                try:
+                    self._key_pairs.put_nowait(key_pair)
+                except Full:
+                    # Another worker filled the last slot first. The size
+                    # check at the top of the loop clears the refill signal
+                    continue
+
+                self._refills += 1
@@ -0,0 +1,259 @@
+"""Online CA service client - lightweight listener for the OAuth 2.0
+authorisation code flow callback
+
+A plain asyncio socket server handles the redirect from the Authorisation
+Server, exchanges the authorisation code for an access token and exits. It
+starts in milliseconds as no web framework or ASGI server is needed.
+
+Contrail Project
+"""
+__author__ = "P J Kershaw"
+__date__ = "16/10/26"
+__copyright__ = "Copyright 2026 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level directory"
+__contact__ = "Philip.Kershaw@stfc.ac.uk"
+import asyncio
+import logging
+import webbrowser
+from html import escape
+from http import HTTPStatus
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+
+import requests_oauthlib
+
+log = logging.getLogger(__name__)
+
+
+class OAuthCallbackError(Exception):
+    """Error response or invalid request received by callback listener"""
+
+
+class OAuthCallbackHandler:
+    """Handle the callback which completes the OAuth 2.0 authorisation code
+    flow. This is shared by the callback listener and the OAuth 2.0 web
+    application so that they check callbacks and obtain tokens in the same way
+
+    On completion of the flow, token is set to the access token obtained or
+    error to the reason the flow failed
+    """
+
+    PAGE_TMPL = (
+        "<html><head><title>{title}</title></head>"
+        "<body><p>{message}</p></body></html>"
+    )
+
+    def __init__(self, settings: dict) -> None:
+        """
+        :param settings: OAuth settings - client_id, client_secret,
+        authorization_base_url, token_url, scope and redirect_url
+        """
+        self.settings = settings
+        self.token = None
+        self.error = None
+
+        self._oauth_session = requests_oauthlib.OAuth2Session(
+            settings["client_id"],
+            scope=settings.get("scope"),
+            redirect_uri=settings["redirect_url"],
+        )
+        self.authorization_url, self._state = self._oauth_session.authorization_url(
+            settings["authorization_base_url"]
+        )
+        self._callback_received = False
+
+    @property
+    def finished(self) -> bool:
+        """True once an access token has been obtained or the flow has failed"""
+        return self.token is not None or self.error is not None
+
+    async def handle_callback(
+        self, params: Dict[str, List[str]], authorization_response: str
+    ) -> Tuple[HTTPStatus, str]:
+        """Check a callback request and exchange the authorisation code for an
+        access token. Callbacks with an invalid state parameter are ignored so
+        that the caller can carry on waiting for a valid one
+
+        :param params: callback query parameters, each a list of values as
+        returned by urllib.parse.parse_qs
+        :param authorization_response: full URL of the callback request
+        :return: HTTP status and message for the response page
+        """
+        # The callback is checked and claimed with no await in between so that
+        # only one callback goes on to obtain a token
+        if self._callback_received:
+            return HTTPStatus.CONFLICT, "Callback already received"
+
+        if "error" in params:
+            self._callback_received = True
+            self.error = OAuthCallbackError(
+                "Error response from Authorisation Server: "
+                + " ".join(params["error"] + params.get("error_description", []))
+            )
+            return HTTPStatus.BAD_REQUEST, str(self.error)
+
+        if params.get("state") != [self._state]:
+            # Could be a forged request - ignore and carry on waiting
+            log.warning("Ignoring OAuth callback with invalid state parameter")
+            return HTTPStatus.BAD_REQUEST, "Invalid state"
+
+        self._callback_received = True
+        loop = asyncio.get_running_loop()
+        try:
+            self.token = await loop.run_in_executor(
+                None, self._fetch_token, authorization_response
+            )
+        except Exception as e:
+            self.error = e
+            return HTTPStatus.INTERNAL_SERVER_ERROR, "Error obtaining access token"
+
+        return HTTPStatus.OK, "Access token obtained. You may now close this window."
+
+    def _fetch_token(self, authorization_response: str) -> dict:
+        return self._oauth_session.fetch_token(
+            self.settings["token_url"],
+            client_secret=self.settings["client_secret"],
+            authorization_response=authorization_response,
+        )
+
+    @classmethod
+    def make_page(cls, status: HTTPStatus, message: str) -> str:
+        """Make HTML page for a response to the browser"""
+        return cls.PAGE_TMPL.format(
+            title=escape(f"{status.value} {status.phrase}"), message=escape(message)
+        )
+
+
+class OAuthCallbackListener:
+    """Listen for the single callback request which completes the OAuth 2.0
+    authorisation code flow
+
+    >>> listener = OAuthCallbackListener(settings)
+    >>> token = asyncio.run(listener.run())
+    """
+
+    MAX_REQUEST_HEADER_SIZE = 65536
+    RESPONSE_TMPL = (
+        "HTTP/1.1 {status}\r\n"
+        "Content-Type: text/html; charset=utf-8\r\n"
+        "Content-Length: {content_length}\r\n"
+        "{headers}"
+        "Connection: close\r\n"
+        "\r\n"
+    )
+
+    def __init__(
+        self,
+        settings: dict,
+        on_started: Optional[Callable[[str], None]] = None,
+        timeout: Optional[float] = None,
+    ) -> None:
+        """
+        :param settings: OAuth settings - client_id, client_secret,
+        authorization_base_url, token_url, scope, start_url and redirect_url
+        :param on_started: optionally set a function to call once the listener
+        is ready with the URL to direct the user to. Defaults to opening the
+        URL in a web browser
+        :param timeout: maximum time in seconds to wait for the callback
+        """
+        self.settings = settings
+        self.on_started = on_started or webbrowser.open
+        self.timeout = timeout
+
+        self.start_url = urlparse(settings["start_url"])
+        self.redirect_url = urlparse(settings["redirect_url"])
+
+        self._callback_handler = OAuthCallbackHandler(settings)
+        self.authorization_url = self._callback_handler.authorization_url
+        self._token_future = None
+
+    async def run(self) -> dict:
+        """Start listening, direct the user to the Authorisation Server and
+        wait for the callback
+
+        :return: access token
+        """
+        loop = asyncio.get_running_loop()
+        self._token_future = loop.create_future()
+
+        server = await asyncio.start_server(
+            self._handle_connection,
+            host=self.redirect_url.hostname,
+            port=self.redirect_url.port,
+            limit=self.__class__.MAX_REQUEST_HEADER_SIZE,
+        )
+        async with server:
+            self.on_started(self.authorization_url)
+            return await asyncio.wait_for(self._token_future, self.timeout)
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            request_header = await reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            writer.close()
+            return
+
+        try:
+            method, target = request_header.split(b"\r\n", 1)[0].split()[:2]
+            target = target.decode("ascii")
+        except (ValueError, UnicodeDecodeError):
+            await self._respond(writer, HTTPStatus.BAD_REQUEST, "Invalid request")
+            return
+
+        request_url = urlparse(target)
+        if method != b"GET":
+            await self._respond(
+                writer, HTTPStatus.METHOD_NOT_ALLOWED, "Method not allowed"
+            )
+
+        elif request_url.path == self.redirect_url.path:
+            await self._handle_callback(writer, target, request_url)
+
+        elif request_url.path == self.start_url.path:
+            await self._respond(
+                writer,
+                HTTPStatus.FOUND,
+                "Redirecting to the Authorisation Server",
+                headers={"Location": self.authorization_url},
+            )
+        else:
+            await self._respond(writer, HTTPStatus.NOT_FOUND, "Not found")
+
+    async def _handle_callback(self, writer, target, request_url) -> None:
+        authorization_response = (
+            f"{self.redirect_url.scheme}://{self.redirect_url.netloc}{target}"
+        )
+        status, message = await self._callback_handler.handle_callback(
+            parse_qs(request_url.query), authorization_response
+        )
+        await self._respond(writer, status, message)
+
+        # run may have stopped waiting e.g. on timeout
+        if self._callback_handler.finished and not self._token_future.done():
+            if self._callback_handler.error is not None:
+                self._token_future.set_exception(self._callback_handler.error)
+            else:
+                self._token_future.set_result(self._callback_handler.token)
+
+    async def _respond(
+        self,
+        writer: asyncio.StreamWriter,
+        status: HTTPStatus,
+        message: str,
+        headers: Optional[dict] = None,
+    ) -> None:
+        body = OAuthCallbackHandler.make_page(status, message).encode()
+        header = self.__class__.RESPONSE_TMPL.format(
+            status=f"{status.value} {status.phrase}",
+            content_length=len(body),
+            headers="".join(
+                f"{name}: {value}\r\n" for name, value in (headers or {}).items()
+            ),
+        ).encode()
+        try:
+            writer.write(header + body)
+            await writer.drain()
+        finally:
+            writer.close()
@@ -0,0 +1,209 @@
+"""Online CA service client - settings for the OAuth 2.0 authorisation code
+flow
+
+Settings are validated against a schema when read so that errors are reported
+before any connection is made. Parsed settings are cached keyed by file path
+and modification time so that repeated reads of an unchanged file cost a
+stat call only. A settings file can also be compiled to JSON alongside the
+YAML original so that new processes avoid YAML parsing as well.
+
+Contrail Project
+"""
+__author__ = "P J Kershaw"
+__date__ = "16/10/26"
+__copyright__ = "Copyright 2026 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level directory"
+__contact__ = "Philip.Kershaw@stfc.ac.uk"
+import os
+import json
+import logging
+import threading
+from urllib.parse import urlparse
+
+from . import _write_file_atomic
+
+log = logging.getLogger(__name__)
+
+# Setting name: (expected types, required)
+SETTINGS_SCHEMA = {
+    "client_id": ((str,), True),
+    "client_secret": ((str,), True),
+    "authorization_base_url": ((str,), True),
+    "token_url": ((str,), True),
+    "scope": ((str, list), False),
+    "start_url": ((str,), True),
+    "redirect_url": ((str,), True),
+}
+URL_SETTING_NAMES = (
+    "authorization_base_url",
+    "token_url",
+    "start_url",
+    "redirect_url",
+)
+
+# Start and redirect URLs are served by the client itself
+LOCAL_URL_SETTING_NAMES = ("start_url", "redirect_url")
+
+COMPILED_SETTINGS_FILE_EXT = ".json"
+
+_settings_cache = {}
+_settings_cache_lock = threading.Lock()
+
+
+class OAuthSettingsError(Exception):
+    """Invalid settings for the OAuth 2.0 authorisation code flow"""
+
+
+def validate_settings(settings: dict) -> dict:
+    """Check settings against the schema. All errors found are reported
+    together
+
+    :param settings: OAuth settings
+    :return: the settings passed in
+    :raises OAuthSettingsError: if any settings are missing or invalid
+    """
+    if not isinstance(settings, dict):
+        raise OAuthSettingsError(
+            f"Expecting a mapping of setting names to values; got {settings!r}"
+        )
+
+    errors = []
+    for name, (types, required) in SETTINGS_SCHEMA.items():
+        if name not in settings:
+            if required:
+                errors.append(f"{name!r} is missing")
+            continue
+
+        value = settings[name]
+        if not isinstance(value, types):
+            errors.append(
+                f"{name!r} must be of type "
+                f"{' or '.join(t.__name__ for t in types)}; got {value!r}"
+            )
+
+        elif isinstance(value, list) and not all(isinstance(i, str) for i in value):
+            errors.append(f"{name!r} must be a list of strings; got {value!r}")
+
+    for name in URL_SETTING_NAMES:
+        value = settings.get(name)
+        if not isinstance(value, str):
+            continue
+
+        url = urlparse(value)
+        if url.scheme not in ("http", "https") or not url.hostname:
+            errors.append(f"{name!r} must be an http or https URL; got {value!r}")
+
+        elif name in LOCAL_URL_SETTING_NAMES:
+            try:
+                url.port
+            except ValueError:
+                errors.append(f"{name!r} has an invalid port; got {value!r}")
+
+    if errors:
+        raise OAuthSettingsError("Invalid OAuth settings: " + "; ".join(errors))
+
+    return settings
+
+
+def get_compiled_settings_filepath(filepath: str) -> str:
+    """Get path for the JSON version of a settings file
+
+    :param filepath: settings file path
+    :return: path with the file extension replaced with .json
+    """
+    return os.path.splitext(filepath)[0] + COMPILED_SETTINGS_FILE_EXT
+
+
+def _get_mtime_ns(filepath):
+    try:
+        return os.stat(filepath).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _select_settings_source(filepath):
+    """Choose the file to parse: the settings file itself or a compiled JSON
+    version which is at least as new"""
+    mtime_ns = _get_mtime_ns(filepath)
+    if filepath.endswith(COMPILED_SETTINGS_FILE_EXT):
+        return filepath, mtime_ns
+
+    compiled_filepath = get_compiled_settings_filepath(filepath)
+    compiled_mtime_ns = _get_mtime_ns(compiled_filepath)
+    if compiled_mtime_ns is not None and (
+        mtime_ns is None or compiled_mtime_ns >= mtime_ns
+    ):
+        return compiled_filepath, compiled_mtime_ns
+
+    return filepath, mtime_ns
+
+
+def _parse_settings_file(filepath):
+    with open(filepath, "rb") as settings_file:
+        if filepath.endswith(COMPILED_SETTINGS_FILE_EXT):
+            return json.load(settings_file)
+
+        # Imported here as YAML parsing is needed only when there is no
+        # compiled settings file
+        import yaml
+
+        return yaml.safe_load(settings_file)
+
+
+def read_settings_file(filepath: str, use_cache: bool = True) -> dict:
+    """Read and validate settings from a YAML file or its compiled JSON
+    version if present and up to date
+
+    :param filepath: settings file path
+    :param use_cache: set to False to always re-read the file
+    :return: settings. This is a copy which can be safely modified
+    :raises OAuthSettingsError: if any settings are missing or invalid
+    """
+    filepath = os.path.abspath(os.path.expanduser(filepath))
+    source_filepath, mtime_ns = _select_settings_source(filepath)
+    cache_key = (source_filepath, mtime_ns)
+
+    if use_cache:
+        with _settings_cache_lock:
+            cached = _settings_cache.get(filepath)
+
+        if cached is not None and cached[0] == cache_key:
+            return dict(cached[1])
+
+    log.debug("Reading OAuth settings from %r", source_filepath)
+    settings = validate_settings(_parse_settings_file(source_filepath))
+
+    # Don't cache if modified while being read - it'll be picked up next time
+    if mtime_ns is not None and _get_mtime_ns(source_filepath) == mtime_ns:
+        with _settings_cache_lock:
+            _settings_cache[filepath] = (cache_key, settings)
+
+    return dict(settings)
+
+
+def compile_settings_file(filepath: str) -> str:
+    """Validate a YAML settings file and write it out in JSON format alongside
+    the original. The JSON version is used in preference while it is at
+    least as new as the original
+
+    :param filepath: YAML settings file path
+    :return: path of JSON file written
+    """
+    filepath = os.path.abspath(os.path.expanduser(filepath))
+    if filepath.endswith(COMPILED_SETTINGS_FILE_EXT):
+        raise ValueError(f"Settings file {filepath!r} is already in JSON format")
+
+    settings = validate_settings(_parse_settings_file(filepath))
+
+    # Settings include the client secret so keep permissions as for the
+    # token file
+    compiled_filepath = get_compiled_settings_filepath(filepath)
+    _write_file_atomic(compiled_filepath, json.dumps(settings, indent=2).encode())
+
+    return compiled_filepath
+
+
+def clear_settings_cache() -> None:
+    """Discard all cached settings"""
+    with _settings_cache_lock:
+        _settings_cache.clear()
@@ -0,0 +1,102 @@
+"""Online CA service client - uvicorn web server for the OAuth 2.0
+authorisation code flow
+
+This runs the full OAuth 2.0 web application. See oauth2_callback_listener for
+a lightweight alternative which needs neither uvicorn nor the web application.
+
+Contrail Project
+"""
+__author__ = "P J Kershaw"
+__date__ = "18/02/22"
+__copyright__ = "Copyright 2022 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level directory"
+__contact__ = "Philip.Kershaw@stfc.ac.uk"
+import webbrowser
+from urllib.parse import urlparse
+
+import uvicorn
+from uvicorn.protocols.http.h11_impl import H11Protocol
+
+from .web_server import StoppableWebServer
+from .oauth2_callback_listener import OAuthCallbackError
+from .oauth2_web_app import OAuth2WebApp
+
+
+class OAuthFlowH11Protocol(H11Protocol):
+    """Derive from H11Protocol class and inject into uvicorn as way of managing
+    when to send a signal to the web server that the final callback in the
+    OAuth flow has been completed"""
+
+    def on_response_complete(self):
+        super().on_response_complete()
+
+        # Kill HTTP server once the response to the callback which finished the
+        # flow has been completed. Other callbacks e.g. with an invalid state
+        # parameter are ignored so that the server carries on waiting
+        if (
+            self.scope.get("path") == self.config.oauth_callback_path
+            and self.config.app.finished
+        ):
+            # Signal to server via queue object
+            self.config.shutdown_queue.put(True)
+
+
+class OAuthFlowStoppableWebServer(StoppableWebServer):
+    """Extend web server to allow launch of browser window on start-up"""
+
+    def __init__(self, config: uvicorn.Config, callback_path: str) -> None:
+        super().__init__(config)
+        self.config.oauth_callback_path = callback_path
+        self.launched_browser = False
+
+    def on_started(self):
+        """Invoke browser once web server is started and ready to receive
+        client requests
+        """
+        if not self.launched_browser:
+            webbrowser.open(f"http://{self.config.host}:{self.config.port}")
+            self.launched_browser = True
+
+
+def run_oauth_flow_web_server(settings: dict, tok_filepath: str = None) -> None:
+    """Run OAuth 2.0 web application until the final callback in the flow has
+    been completed. The web application writes out the access token obtained
+
+    :param settings: OAuth settings
+    :param tok_filepath: output path for access token file
+    :raises OAuthCallbackError: error response from the Authorisation Server
+    or the web server stopped before an access token was obtained
+    """
+    # These two settings must match what has been used configured at the OAuth
+    # Authorisation Server as the callback url for this client
+    redirect_url = urlparse(settings["redirect_url"])
+    start_url = urlparse(settings["start_url"])
+
+    web_app = OAuth2WebApp(settings, __name__, tok_filepath=tok_filepath)
+
+    config = uvicorn.Config(
+        web_app,
+        host=start_url.hostname,
+        port=start_url.port,
+        http=OAuthFlowH11Protocol,
+        log_level="error",
+    )
+
+    server = OAuthFlowStoppableWebServer(config, redirect_url.path)
+
+    with server.run_in_thread():
+        # Server started.
+        print(
+            f"Loading page {settings['start_url']} in your "
+            "default browser. If this doesn't work, please paste this "
+            "address in a new browser window and follow the "
+            "instructions ..."
+        )
+
+    if web_app.error is not None:
+        raise web_app.error
+
+    if web_app.token is None:
+        raise OAuthCallbackError(
+            "Web server stopped before an access token was obtained"
+        )
@@ -0,0 +1,90 @@
+"""Online CA service client - Quart web application for the OAuth 2.0
+authorisation code flow
+
+The application is served by uvicorn - see oauth2_uvicorn_server. The start
+URL redirects the user to the Authorisation Server. The redirect URL receives
+the callback, exchanges the authorisation code for an access token and writes
+it out.
+
+Contrail Project
+"""
+__author__ = "P J Kershaw"
+__date__ = "16/10/26"
+__copyright__ = "Copyright 2026 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level directory"
+__contact__ = "Philip.Kershaw@stfc.ac.uk"
+from http import HTTPStatus
+from typing import Optional
+from urllib.parse import urlparse
+
+from quart import Quart, redirect, request
+
+from . import OnlineCaClient
+from .oauth2_callback_listener import OAuthCallbackHandler
+
+
+class OAuth2WebApp(Quart):
+    """Web application which obtains an access token with the OAuth 2.0
+    authorisation code flow. Once the flow is finished, token is set to the
+    access token written out or error to the reason the flow failed
+
+    >>> web_app = OAuth2WebApp(settings, __name__, tok_filepath=tok_filepath)
+    """
+
+    def __init__(
+        self, settings: dict, import_name: str, tok_filepath: str = None, **kwargs
+    ) -> None:
+        """
+        :param settings: OAuth settings - client_id, client_secret,
+        authorization_base_url, token_url, scope, start_url and redirect_url
+        :param import_name: name of the application package as for Quart
+        :param tok_filepath: output path for access token file
+        :param kwargs: additional keywords passed to Quart
+        """
+        super().__init__(import_name, **kwargs)
+
+        self.settings = settings
+        self.tok_filepath = tok_filepath
+        self.token = None
+
+        self._callback_handler = OAuthCallbackHandler(settings)
+        self.authorization_url = self._callback_handler.authorization_url
+        self._save_error = None
+
+        self.add_url_rule(urlparse(settings["start_url"]).path, "start", self.start)
+        self.add_url_rule(
+            urlparse(settings["redirect_url"]).path, "callback", self.callback
+        )
+
+    @property
+    def error(self) -> Optional[Exception]:
+        """Reason the flow failed or None"""
+        return self._callback_handler.error or self._save_error
+
+    @property
+    def finished(self) -> bool:
+        """True once the access token has been written out or the flow has
+        failed"""
+        return self.token is not None or self.error is not None
+
+    async def start(self):
+        """Redirect the user to the Authorisation Server"""
+        return redirect(self.authorization_url)
+
+    async def callback(self):
+        """Handle the redirect back from the Authorisation Server"""
+        status, message = await self._callback_handler.handle_callback(
+            request.args.to_dict(flat=False), request.url
+        )
+        if status == HTTPStatus.OK:
+            token = self._callback_handler.token
+            try:
+                OnlineCaClient.save_oauth_tok(token, tok_filepath=self.tok_filepath)
+            except Exception as e:
+                self._save_error = e
+                status = HTTPStatus.INTERNAL_SERVER_ERROR
+                message = "Error writing access token"
+            else:
+                self.token = token
+
+        return OAuthCallbackHandler.make_page(status, message), status
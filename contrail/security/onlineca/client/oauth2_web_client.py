@@ -9,45 +9,24 @@ __copyright__ = "Copyright 2022 United Kingdom Research and Innovation"
 __license__ = "BSD - see LICENSE file in top-level directory"
 __contact__ = "Philip.Kershaw@stfc.ac.uk"
 import os
+import asyncio
 import webbrowser
-from urllib.parse import urlparse
 
-import yaml
-import uvicorn
-from uvicorn.protocols.http.h11_impl import H11Protocol
+from . import OnlineCaClient
+from . import oauth2_settings
 
-from .web_server import StoppableWebServer
-from .oauth2_web_app import OAuth2WebApp
+# uvicorn based web server classes are imported on first access only so that
+# the lightweight callback listener doesn't need to load uvicorn
+_UVICORN_SERVER_ATTR_NAMES = ("OAuthFlowH11Protocol", "OAuthFlowStoppableWebServer")
 
 
-class OAuthFlowH11Protocol(H11Protocol):
-    """Derive from H11Protocol class and inject into uvicorn as way of managing
-    when to send a signal to the web server that the final callback in the
-    OAuth flow has been completed"""
+def __getattr__(name):
+    if name in _UVICORN_SERVER_ATTR_NAMES:
+        from . import oauth2_uvicorn_server
 
-    def on_response_complete(self):
-        super().on_response_complete()
+        return getattr(oauth2_uvicorn_server, name)
 
-        # Kill HTTP server once callback response has been completed
-        if self.scope.get("path") == self.config.oauth_callback_path:
-            # Signal to server via queue object
-            self.config.shutdown_queue.put(True)
-
-
-class OAuthFlowStoppableWebServer(StoppableWebServer):
-    """Extend web server to allow launch of browser window on start-up"""
-
-    def __init__(self, config: uvicorn.Config, callback_path: str) -> None:
-        super().__init__(config)
-        self.config.oauth_callback_path = callback_path
-
-    def thread_callback(self):
-        """Invoke browser once web server is started and ready to receive
-        client requests
-        """
-        if self.started and not getattr(self, "launched_browser", False):
-            webbrowser.open(f"http://{self.config.host}:{self.config.port}")
-            self.launched_browser = True
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class OAuthAuthorisationCodeFlowClient:
@@ -59,24 +38,41 @@ class OAuthAuthorisationCodeFlowClient:
     DEF_SETTINGS_FILEPATH = os.path.join(os.environ["HOME"], DEF_SETTINGS_FILENAME)
     SETTINGS_FILEPATH_ENVVARNAME = "ONLINECA_CLNT_SETTINGS_FILEPATH"
 
+    # Server used to receive the callback from the Authorisation Server:
+    # a lightweight asyncio listener or the full web application run by
+    # uvicorn
+    CALLBACK_SERVER_ASYNCIO = "asyncio"
+    CALLBACK_SERVER_UVICORN = "uvicorn"
+    CALLBACK_SERVERS = (CALLBACK_SERVER_ASYNCIO, CALLBACK_SERVER_UVICORN)
+    DEF_CALLBACK_SERVER = CALLBACK_SERVER_ASYNCIO
+
     def __init__(
         self,
         settings: dict = None,
         settings_filepath: str = None,
         tok_filepath: str = None,
+        callback_server: str = DEF_CALLBACK_SERVER,
     ):
+        if callback_server not in self.__class__.CALLBACK_SERVERS:
+            raise ValueError(
+                f"Expecting one of {self.__class__.CALLBACK_SERVERS!r} for "
+                f"callback_server; got {callback_server!r}"
+            )
+
         if settings is None:
             self.settings = self.read_settings_file(filepath=settings_filepath)
         else:
-            self.settings = settings
+            self.settings = oauth2_settings.validate_settings(settings)
 
         self.tok_filepath = tok_filepath
+        self.callback_server = callback_server
 
     @classmethod
     def read_settings_file(cls, filepath: str = None) -> dict:
         """Read settings for OAuth connections from YAML file. YAML file
         path is set via an environment variable. If this is not set, it's
-        taken from a default"""
+        taken from a default. Settings are validated and cached - see
+        oauth2_settings.read_settings_file"""
 
         # Follow an order of precedence for where to get file from
         if filepath is None:
@@ -84,49 +80,48 @@ class OAuthAuthorisationCodeFlowClient:
             if filepath is None:
                 filepath = cls.DEF_SETTINGS_FILEPATH
 
-        with open(filepath) as settings_file:
-            settings = yaml.safe_load(settings_file)
-
-        return settings
+        return oauth2_settings.read_settings_file(filepath)
 
     def get_access_tok(self) -> None:
         """Obtain access token by starting a client web server ready for the
         user to authenticate with the OAuth Authorisation Server and grant
         permission for the client
-        """
-
-        # These two settings must match what has been used configured at the OAuth
-        # Authorisation Server as the callback url for this client
-        redirect_url = urlparse(self.settings["redirect_url"])
-        start_url = urlparse(self.settings["start_url"])
 
+        :raises OAuthCallbackError: error response from the Authorisation
+        Server or no access token obtained
+        """
         # This allows us to use a plain HTTP callback
         oauthlib_insecure_transport = os.environ.get("OAUTHLIB_INSECURE_TRANSPORT")
         os.environ["OAUTHLIB_INSECURE_TRANSPORT"] = "1"
 
-        web_app = OAuth2WebApp(self.settings, __name__, tok_filepath=self.tok_filepath)
-
         try:
-            config = uvicorn.Config(
-                web_app,
-                host=start_url.hostname,
-                port=start_url.port,
-                http=OAuthFlowH11Protocol,
-                log_level="error",
-            )
-
-            server = OAuthFlowStoppableWebServer(config, redirect_url.path)
+            if self.callback_server == self.__class__.CALLBACK_SERVER_UVICORN:
+                from .oauth2_uvicorn_server import run_oauth_flow_web_server
 
-            with server.run_in_thread():
-                # Server started.
-                print(
-                    f"Loading page {self.settings['start_url']} in your "
-                    "default browser. If this doesn't work, please paste this "
-                    "address in a new browser window and follow the "
-                    "instructions ..."
-                )
+                run_oauth_flow_web_server(self.settings, tok_filepath=self.tok_filepath)
+            else:
+                self._get_access_tok_with_listener()
         finally:
             if oauthlib_insecure_transport is None:
                 del os.environ["OAUTHLIB_INSECURE_TRANSPORT"]
             else:
                 os.environ["OAUTHLIB_INSECURE_TRANSPORT"] = oauthlib_insecure_transport
+
+    def _get_access_tok_with_listener(self) -> None:
+        """Receive the callback with a lightweight asyncio listener and write
+        out the access token obtained"""
+        from .oauth2_callback_listener import OAuthCallbackListener
+
+        listener = OAuthCallbackListener(self.settings, on_started=self._on_started)
+        token = asyncio.run(listener.run())
+
+        OnlineCaClient.save_oauth_tok(token, tok_filepath=self.tok_filepath)
+
+    def _on_started(self, authorization_url: str) -> None:
+        print(
+            f"Loading page {self.settings['start_url']} in your "
+            "default browser. If this doesn't work, please paste this "
+            "address in a new browser window and follow the "
+            "instructions ..."
+        )
+        webbrowser.open(authorization_url)
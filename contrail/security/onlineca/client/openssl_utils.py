@@ -8,10 +8,92 @@ __copyright__ = "Copyright 2019 United Kingdom Research and Innovation"
 __license__ = "BSD - see LICENSE file in top-level directory"
 __contact__ = "Philip.Kershaw@stfc.ac.uk"
 __revision__ = "$Id$"
+import os
 import re
+import time
+import logging
+import binascii
+from calendar import timegm
+from collections.abc import Mapping
+from functools import lru_cache
+from operator import itemgetter
 
 from OpenSSL import crypto
 
+log = logging.getLogger(__name__)
+
+PEM_CERT_LABEL = b"CERTIFICATE"
+
+# Format of times returned by OpenSSL.crypto.X509 get_notBefore and
+# get_notAfter
+ASN1_TIME_FORMAT = "%Y%m%d%H%M%SZ"
+
+
+class PemParseError(Exception):
+    """Error parsing PEM encoded content"""
+
+
+def iter_pem_der(data, label=PEM_CERT_LABEL):
+    """Walk PEM encoded content in a single pass yielding the DER encoding of
+    each block with the given label. Block boundaries are found by offset
+    into the original buffer so no intermediate copies of the content are
+    made. Any data before, between or after blocks is skipped.
+
+    :param data: PEM encoded content e.g. a certificate chain
+    :type data: bytes
+    :param label: PEM label for blocks to select
+    :type label: bytes
+    :return: iterator of DER encoded blocks
+    """
+    begin_delim = b"-----BEGIN " + label + b"-----"
+    end_delim = b"-----END " + label + b"-----"
+    data_view = memoryview(data)
+
+    offset = 0
+    while True:
+        begin = data.find(begin_delim, offset)
+        if begin < 0:
+            return
+
+        body_begin = begin + len(begin_delim)
+        body_end = data.find(end_delim, body_begin)
+        if body_end < 0:
+            raise PemParseError(
+                "No end delimiter found for PEM block starting at offset %d" % begin
+            )
+
+        try:
+            yield binascii.a2b_base64(data_view[body_begin:body_end])
+        except binascii.Error as e:
+            raise PemParseError(
+                "Error decoding PEM block starting at offset %d: %s" % (begin, e)
+            )
+
+        offset = body_end + len(end_delim)
+
+
+def asn1_time_to_timestamp(asn1_time):
+    """Convert certificate validity time to seconds since the epoch
+
+    :param asn1_time: time as returned by OpenSSL.crypto.X509 get_notBefore
+    or get_notAfter
+    :type asn1_time: bytes
+    :return: seconds since the epoch
+    :rtype: int
+    """
+    return timegm(time.strptime(asn1_time.decode(), ASN1_TIME_FORMAT))
+
+
+def iter_pem_certificates(data):
+    """Load each certificate in PEM encoded content
+
+    :param data: PEM encoded content e.g. a certificate chain
+    :type data: bytes
+    :return: iterator of OpenSSL.crypto.X509 objects
+    """
+    for der in iter_pem_der(data):
+        yield crypto.load_certificate(crypto.FILETYPE_ASN1, der)
+
 
 class X509SubjectNameError(Exception):
     """Base class for X509SubjectName class errors"""
@@ -26,7 +108,13 @@ class X509SubjectNameConfigError(X509SubjectNameError):
 
 
 class X509SubjectName(object):
-    """Class to handle X.509 subject names"""
+    """Class to handle X.509 subject names. Field names and values are held
+    in two tuples in the order in which fields first appear. Where multiple
+    entries exist for a field, its value is a tuple. Names tuples are shared
+    between instances with the same fields
+    """
+
+    __slots__ = ("_names", "_values")
 
     SHORT_NAME_LOOKUP: dict[str, str] = {
         "commonName": "CN",
@@ -40,26 +128,117 @@ class X509SubjectName(object):
         "domainComponent": "DC",
         "userid": "UID",
     }
-    SLASH_PARSER_RE_STR = "/(%s)=" % "|".join(
-        list(SHORT_NAME_LOOKUP.keys()) + list(SHORT_NAME_LOOKUP.values())
-    )
+    FIELD_NAMES = tuple(SHORT_NAME_LOOKUP.keys()) + tuple(SHORT_NAME_LOOKUP.values())
+
+    # Field layouts keyed by the sequence of field names parsed from a DN. A
+    # layout is the names tuple shared by all instances with these fields
+    # and, if any fields are repeated, a getter for each field's value or
+    # values from the values parsed. Size is limited in case of input with
+    # many different combinations of fields
+    _field_layout_cache = {}
+    FIELD_LAYOUT_CACHE_MAX_SIZE = 1024
+
+    SLASH_PARSER_RE_STR = "/(%s)=" % "|".join(FIELD_NAMES)
     SLASH_PARSER_RE = re.compile(SLASH_PARSER_RE_STR)
 
-    COMMA_PARSER_RE_STR = "[,]?\s*(%s)=" % "|".join(
-        list(SHORT_NAME_LOOKUP.keys()) + list(SHORT_NAME_LOOKUP.values())
-    )
+    COMMA_PARSER_RE_STR = r"[,]?\s*(%s)=" % "|".join(FIELD_NAMES)
     COMMA_PARSER_RE = re.compile(COMMA_PARSER_RE_STR)
 
     VALID_SEPARATORS = ("/", ",")
 
-    def __init__(self):
-        self._dn = {}
+    # Maximum number of entries in each of the caches of parsed and
+    # serialised subject names. Set the environment variable to change it for
+    # the process or call set_cache_maxsize
+    DEF_CACHE_MAXSIZE = 256
+    CACHE_MAXSIZE_ENVVARNAME = "ONLINECA_CLNT_DN_CACHE_MAXSIZE"
+
+    def __init__(self, dn=()):
+        """
+        :param dn: fields as a mapping or iterable of (name, value) pairs
+        as returned from parse
+        """
+        if isinstance(dn, Mapping):
+            dn = dn.items()
+
+        dn = tuple(dn)
+        names, values = zip(*dn) if dn else ((), ())
+        self._names = self._get_field_layout(names)[0]
+        self._values = values
+
+    def __repr__(self):
+        return "<%s %r>" % (self.__class__.__name__, self.serialize(sort=False))
+
+    def __eq__(self, other):
+        if not isinstance(other, X509SubjectName):
+            return NotImplemented
+
+        return self._names == other._names and self._values == other._values
+
+    def __hash__(self):
+        return hash((self._names, self._values))
+
+    def __getitem__(self, name):
+        try:
+            return self._values[self._names.index(name)]
+        except ValueError:
+            raise KeyError(name) from None
+
+    def items(self):
+        """@return: iterator of field (name, value) pairs"""
+        return zip(self._names, self._values)
 
     @classmethod
-    def from_string(cls, dn, separator=None):
-        obj = cls()
-        obj._dn = cls.parse(dn, separator)
+    def set_cache_maxsize(cls, maxsize):
+        """Set the maximum number of entries in each of the caches of parsed
+        and serialised subject names. Cached entries are discarded. The
+        caches are shared by all subject name classes
+
+        :param maxsize: maximum number of entries. Set to 0 to disable caching
+        """
+        if not isinstance(maxsize, int) or maxsize < 0:
+            raise X509SubjectNameConfigError(
+                "Expecting non-negative integer for cache maximum size; got %r"
+                % maxsize
+            )
 
+        X509SubjectName._cached_parse_fields = staticmethod(
+            lru_cache(maxsize=maxsize)(_parse_dn_fields)
+        )
+        X509SubjectName._cached_serialize = staticmethod(
+            lru_cache(maxsize=maxsize)(_serialize_dn)
+        )
+
+    @classmethod
+    def cache_stats(cls):
+        """Snapshot of statistics for the caches of parsed and serialised
+        subject names
+
+        :return: dictionary of hits, misses, size and maxsize for each of the
+        "parse" and "serialize" caches
+        """
+        return {
+            name: {
+                "hits": cache_info.hits,
+                "misses": cache_info.misses,
+                "size": cache_info.currsize,
+                "maxsize": cache_info.maxsize,
+            }
+            for name, cache_info in (
+                ("parse", cls._cached_parse_fields.cache_info()),
+                ("serialize", cls._cached_serialize.cache_info()),
+            )
+        }
+
+    @classmethod
+    def cache_clear(cls):
+        """Discard all cached parsed and serialised subject names"""
+        cls._cached_parse_fields.cache_clear()
+        cls._cached_serialize.cache_clear()
+
+    @classmethod
+    def from_string(cls, dn, separator=None):
+        obj = cls.__new__(cls)
+        obj._names, obj._values = cls._cached_parse_fields(cls, dn, separator)
         return obj
 
     @classmethod
@@ -67,43 +246,119 @@ class X509SubjectName(object):
         """Parse string distinguished name into a dictionary for fields.  Where
         multiple entries exist for a field, values are set as a tuple
         """
+        return dict(zip(*cls._cached_parse_fields(cls, dn, separator)))
+
+    @classmethod
+    def parse_many(cls, dns, separator=None, ignore_errors=False):
+        """Parse distinguished names in bulk e.g. from log files
+
+        :param dns: iterable of DN strings. Lines read from a file need their
+        line endings removed
+        :param separator: field separator, '/' or ','. Defaults to '/'
+        :param ignore_errors: set to True to yield None in place of any DN
+        which can't be parsed instead of raising an exception
+        :return: iterator of X509SubjectName objects in the same order as
+        the input
+        """
+        # Check separator up front in case there are no DNs
+        cls._get_parser_re(separator)
+
+        cached_parse_fields = cls._cached_parse_fields
+        for dn in dns:
+            obj = cls.__new__(cls)
+            try:
+                obj._names, obj._values = cached_parse_fields(cls, dn, separator)
+            except X509SubjectNameError:
+                if not ignore_errors:
+                    raise
+
+                obj = None
+
+            yield obj
+
+    @classmethod
+    def _get_parser_re(cls, separator):
         if separator in ("/", None):
-            parser_re = cls.SLASH_PARSER_RE
+            return cls.SLASH_PARSER_RE
         elif separator == ",":
-            parser_re = cls.COMMA_PARSER_RE
+            return cls.COMMA_PARSER_RE
         else:
             raise X509SubjectNameConfigError("Invalid field separator %r" % separator)
 
+    @classmethod
+    def _parse_fields(cls, dn, parser_re):
+        """Parse DN string into tuples of field names and values"""
         dn_fields = parser_re.split(dn)
         if len(dn_fields) < 2:
             raise X509SubjectNameConfigError('Error parsing DN string: "%s"' % dn)
 
-        items = zip(dn_fields[1::2], dn_fields[2::2])
+        names = tuple(dn_fields[1::2])
+        field_layout = cls._field_layout_cache.get(names)
+        if field_layout is None:
+            field_layout = cls._get_field_layout(names)
 
-        # Strip leading and trailing space chars and convert into a
-        # dictionary
-        parsed_dn = {}
-        for key, val in items:
-            key = key.strip()
-            if key in parsed_dn:
-                if isinstance(parsed_dn[key], tuple):
-                    parsed_dn[key] = tuple(list(parsed_dn[key]) + [val])
-                else:
-                    parsed_dn[key] = (parsed_dn[key], val)
+        names, value_getters = field_layout
+        values = dn_fields[2::2]
+        if value_getters is None:
+            return names, tuple(values)
+
+        return names, tuple([value_getter(values) for value_getter in value_getters])
+
+    @classmethod
+    def _get_field_layout(cls, names):
+        """Get the field layout for a sequence of field names, creating and
+        caching it if it isn't already cached. Indices for repeated fields are
+        collected in lists and converted to getters once at the end so that
+        the time taken is linear in the number of fields
+        """
+        field_layout = cls._field_layout_cache.get(names)
+        if field_layout is not None:
+            return field_layout
+
+        indices_by_name = {}
+        for i, name in enumerate(names):
+            if name in indices_by_name:
+                indices_by_name[name].append(i)
             else:
-                parsed_dn[key] = val
+                indices_by_name[name] = [i]
+
+        if len(indices_by_name) == len(names):
+            field_layout = (tuple(names), None)
+        else:
+            # Share names with instances with the same fields not repeated.
+            # itemgetter with more than one index returns a tuple
+            field_layout = (
+                cls._get_field_layout(tuple(indices_by_name))[0],
+                tuple(itemgetter(*indices) for indices in indices_by_name.values()),
+            )
+
+        if len(cls._field_layout_cache) < cls.FIELD_LAYOUT_CACHE_MAX_SIZE:
+            cls._field_layout_cache[names] = field_layout
 
-        return parsed_dn
+        return field_layout
 
     def serialize(self, *args, **kwargs):
         """Serialize subject name iterable into a string"""
-        return self.__class__.Serialize(self._dn, *args, **kwargs)
+        return self.__class__.Serialize(tuple(self.items()), *args, **kwargs)
 
     @classmethod
     def Serialize(cls, dn, separator="/", sort=True):
         """Classmethod implementation - Serialize subject name iterable into a
-        string"""
+        string. dn may be a mapping or iterable of (name, value) pairs"""
+        if isinstance(dn, Mapping):
+            dn = dn.items()
 
+        frozen_dn = tuple(dn)
+        try:
+            hash(frozen_dn)
+        except TypeError:
+            # Values which can't be cached e.g. lists
+            return cls._serialize(frozen_dn, separator, sort)
+
+        return cls._cached_serialize(cls, frozen_dn, separator, sort)
+
+    @classmethod
+    def _serialize(cls, dn, separator, sort):
         if separator not in cls.VALID_SEPARATORS:
             raise X509SubjectNameConfigError("Invalid field separator %r" % separator)
 
@@ -114,7 +369,7 @@ class X509SubjectName(object):
             s_dn = ""
 
         dn_list = []
-        for key, val in dn.items():
+        for key, val in dn:
             if val:
                 if isinstance(val, tuple):
                     kv_pairs = ["%s=%s" % (key, val_sub) for val_sub in val]
@@ -134,7 +389,7 @@ class X509SubjectName(object):
         @rtype: OpenSSL.crypto.X509Name
         """
         subject_name = crypto.X509().get_subject()
-        for k, v in self._dn.items():
+        for k, v in self.items():
             if isinstance(v, tuple):
                 # Ugly hack to get around problem that PyOpenSSL X509Name
                 # interface doesn't allowing the setting of multiple values for
@@ -145,3 +400,38 @@ class X509SubjectName(object):
                 setattr(subject_name, k, v)
 
         return subject_name
+
+
+def _parse_dn_fields(cls, dn, separator):
+    return cls._parse_fields(dn, cls._get_parser_re(separator))
+
+
+def _serialize_dn(cls, dn, separator, sort):
+    return cls._serialize(dn, separator, sort)
+
+
+def _get_cache_maxsize_setting():
+    """Get subject name cache maximum size from the environment. An invalid
+    setting is ignored with a warning rather than preventing import"""
+    envvar_name = X509SubjectName.CACHE_MAXSIZE_ENVVARNAME
+    maxsize = os.environ.get(envvar_name)
+    if maxsize is None:
+        return X509SubjectName.DEF_CACHE_MAXSIZE
+
+    try:
+        maxsize = int(maxsize)
+        if maxsize < 0:
+            raise ValueError("negative cache size")
+    except ValueError:
+        log.warning(
+            "Ignoring invalid setting %r for %s: using default of %d",
+            maxsize,
+            envvar_name,
+            X509SubjectName.DEF_CACHE_MAXSIZE,
+        )
+        return X509SubjectName.DEF_CACHE_MAXSIZE
+
+    return maxsize
+
+
+X509SubjectName.set_cache_maxsize(_get_cache_maxsize_setting())
@@ -0,0 +1,51 @@
+"""Benchmarks for Online CA web service client functionality. Each module can
+be run directly e.g.
+
+$ python -m contrail.security.onlineca.client.test.benchmark.bench_key_types
+"""
+__author__ = "P J Kershaw"
+__date__ = "16/10/26"
+__copyright__ = "Copyright 2026 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level directory"
+__contact__ = "Philip.Kershaw@stfc.ac.uk"
+import time
+import statistics
+
+
+def time_callable(func, n_repeats=20):
+    """Time repeated calls to a function
+
+    :param func: callable taking no arguments
+    :param n_repeats: number of calls to make
+    :return: dictionary of timing statistics in seconds
+    """
+    timings = []
+    for _ in range(n_repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    return {
+        "n": n_repeats,
+        "mean": statistics.mean(timings),
+        "median": statistics.median(timings),
+        "min": min(timings),
+        "max": max(timings),
+    }
+
+
+def print_results(title, results):
+    """Print table of timing statistics
+
+    :param title: heading for table
+    :param results: dictionary of benchmark names and timing statistics as
+    returned from time_callable
+    """
+    width = max([24] + [len(name) + 2 for name in results])
+    print(title)
+    print(f"{'':<{width}}{'mean (ms)':>12}{'median (ms)':>14}{'min (ms)':>12}")
+    for name, stats in results.items():
+        print(
+            f"{name:<{width}}{stats['mean'] * 1e3:>12.3f}"
+            f"{stats['median'] * 1e3:>14.3f}{stats['min'] * 1e3:>12.3f}"
+        )
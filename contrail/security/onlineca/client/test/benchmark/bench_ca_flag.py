@@ -0,0 +1,89 @@
+"""Benchmark classification of certificates as CA or end entity certificates
+comparing the current OnlineCaClient._is_ca_certificate implementation with
+the previous one which decoded each extension with asn1crypto
+"""
+__author__ = "P J Kershaw"
+__date__ = "16/10/26"
+__copyright__ = "Copyright 2026 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level directory"
+__contact__ = "Philip.Kershaw@stfc.ac.uk"
+import os
+import sys
+
+from OpenSSL import crypto
+from cryptography import x509
+
+from contrail.security.onlineca.client import OnlineCaClient
+from contrail.security.onlineca.client.test import TEST_CA_DIR, TEST_DIR
+from contrail.security.onlineca.client.test.benchmark import (
+    time_callable,
+    print_results,
+)
+
+CERT_FILEPATHS = (
+    os.path.join(TEST_DIR, "localhost.crt"),
+    os.path.join(TEST_CA_DIR, "ffc3d59b.0"),
+    os.path.join(TEST_CA_DIR, "98ef0ee5.0"),
+)
+
+
+def is_ca_certificate_asn1crypto(cert):
+    """Previous implementation of OnlineCaClient._is_ca_certificate"""
+    from asn1crypto.x509 import BasicConstraints
+
+    for i in range(cert.get_extension_count()):
+        ext = cert.get_extension(i)
+        if ext.get_short_name() == OnlineCaClient.X509_BASIC_CONSTR_FIELDNAME:
+            parsed_ext_dat = BasicConstraints.load(ext.get_data())
+            if (
+                parsed_ext_dat.native.get(
+                    OnlineCaClient.X509_BASIC_CONSTR_CAFLAG_FIELDNAME, False
+                )
+                is True
+            ):
+                return True
+
+    return False
+
+
+def load_certs():
+    certs = []
+    for cert_filepath in CERT_FILEPATHS:
+        with open(cert_filepath, "rb") as cert_file:
+            certs.append(crypto.load_certificate(crypto.FILETYPE_PEM, cert_file.read()))
+
+    return certs
+
+
+def bench_ca_flag(n_repeats=1000):
+    """Time classification of a chain of end entity + two CA certificates"""
+    certs = load_certs()
+    ders = [crypto.dump_certificate(crypto.FILETYPE_ASN1, cert) for cert in certs]
+
+    def classify(is_ca_certificate):
+        return lambda: [is_ca_certificate(cert) for cert in certs]
+
+    def classify_der():
+        for der in ders:
+            OnlineCaClient._is_ca_certificate(x509.load_der_x509_certificate(der))
+
+    results = {}
+    try:
+        import asn1crypto  # noqa: F401
+    except ImportError:
+        print("asn1crypto not installed - skipping previous implementation")
+    else:
+        results["asn1crypto"] = time_callable(
+            classify(is_ca_certificate_asn1crypto), n_repeats
+        )
+
+    results["cryptography"] = time_callable(
+        classify(OnlineCaClient._is_ca_certificate), n_repeats
+    )
+    results["cryptography from DER"] = time_callable(classify_der, n_repeats)
+    return results
+
+
+if __name__ == "__main__":
+    n_repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    print_results("Certificate chain CA flag classification", bench_ca_flag(n_repeats))
@@ -0,0 +1,92 @@
+"""Benchmark key generation and certificate request creation with each of the
+crypto backends supported by OnlineCaClient. Per-request latency and Python
+memory allocations are compared for each key type
+"""
+__author__ = "P J Kershaw"
+__date__ = "16/10/26"
+__copyright__ = "Copyright 2026 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level directory"
+__contact__ = "Philip.Kershaw@stfc.ac.uk"
+import sys
+import tracemalloc
+
+from contrail.security.onlineca.client import OnlineCaClient
+from contrail.security.onlineca.client.test.benchmark import (
+    time_callable,
+    print_results,
+)
+
+# RSA key generation is much slower so fewer repeats are made
+N_RSA_REPEATS_DIVISOR = 10
+
+
+def _make_create_key_pair_and_cert_req(key_type, crypto_backend):
+    def create_key_pair_and_cert_req():
+        key_pair = OnlineCaClient.create_key_pair(
+            key_type=key_type, crypto_backend=crypto_backend
+        )
+        OnlineCaClient.create_cert_req(key_pair)
+
+    return create_key_pair_and_cert_req
+
+
+def _iter_benchmarks():
+    for key_type in OnlineCaClient.KEY_TYPES:
+        for crypto_backend in OnlineCaClient.CRYPTO_BACKENDS:
+            yield (
+                key_type,
+                f"{key_type} {crypto_backend}",
+                _make_create_key_pair_and_cert_req(key_type, crypto_backend),
+            )
+
+
+def bench_latency(n_repeats=200):
+    """Time key pair generation plus signing of a certificate request for
+    each key type and crypto backend"""
+    results = {}
+    for key_type, name, func in _iter_benchmarks():
+        if key_type == OnlineCaClient.KEY_TYPE_RSA:
+            n = max(n_repeats // N_RSA_REPEATS_DIVISOR, 1)
+        else:
+            n = n_repeats
+
+        results[name] = time_callable(func, n)
+
+    return results
+
+
+def measure_allocations(n_repeats=20):
+    """Measure peak Python memory allocated during a request for each key
+    type and crypto backend. Allocations made by OpenSSL itself aren't traced
+
+    :return: dictionary of names and mean peak bytes allocated
+    """
+    results = {}
+    for _, name, func in _iter_benchmarks():
+        # Warm up so that one-off allocations e.g. on import aren't counted
+        func()
+
+        peak_sizes = []
+        tracemalloc.start()
+        try:
+            for _ in range(n_repeats):
+                size_before = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+                func()
+                peak_sizes.append(tracemalloc.get_traced_memory()[1] - size_before)
+        finally:
+            tracemalloc.stop()
+
+        results[name] = sum(peak_sizes) / n_repeats
+
+    return results
+
+
+if __name__ == "__main__":
+    n_repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    print_results("Key generation + certificate request", bench_latency(n_repeats))
+
+    print("Peak Python memory allocated per request")
+    print(f"{'':<24}{'bytes':>12}")
+    for name, peak_size in measure_allocations().items():
+        print(f"{name:<24}{peak_size:>12.0f}")
@@ -0,0 +1,142 @@
+"""Benchmark import time of the command line client and package using the
+interpreter's -X importtime option. Each measurement is made in a new
+interpreter so that modules already imported don't hide the cost. The exit
+status is 1 if the command line client takes longer than the budget to
+import e.g.
+
+$ python -m contrail.security.onlineca.client.test.benchmark.bench_import_time \
+    --budget 0.5
+"""
+__author__ = "P J Kershaw"
+__date__ = "16/10/26"
+__copyright__ = "Copyright 2026 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level directory"
+__contact__ = "Philip.Kershaw@stfc.ac.uk"
+import os
+import re
+import sys
+import json
+import argparse
+import subprocess
+
+CLI_MODULE_NAME = "contrail.security.onlineca.client.cli"
+MODULE_NAMES = ("contrail.security.onlineca.client", CLI_MODULE_NAME)
+
+# Maximum time in seconds for import of the command line client. Generous to
+# allow for slow machines
+DEF_IMPORT_TIME_BUDGET = 1.0
+
+# Lines written to stderr by -X importtime:
+# "import time: <self us> | <cumulative us> | <indented module name>"
+IMPORT_TIME_LINE_PAT = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+# Directory containing the contrail package so that the package being
+# tested is the one imported whether or not it has been installed
+PKG_PARENT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), *[".."] * 6))
+
+
+def _run_python(*args):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, (PKG_PARENT_DIR, env.get("PYTHONPATH")))
+    )
+    return subprocess.run(
+        (sys.executable,) + args, capture_output=True, text=True, check=True, env=env
+    )
+
+
+def measure_import_time(module_name):
+    """Import a module in a new interpreter with -X importtime set
+
+    :param module_name: name of module to import
+    :return: dictionary of names of all modules imported and their
+    cumulative import times in seconds
+    """
+    proc = _run_python("-X", "importtime", "-c", f"import {module_name}")
+
+    import_times = {}
+    for line in proc.stderr.splitlines():
+        match = IMPORT_TIME_LINE_PAT.match(line)
+        if match is not None:
+            import_times[match.group(4)] = int(match.group(2)) * 1e-6
+
+    return import_times
+
+
+def get_min_import_time(module_name, n_repeats=5):
+    """Get the fastest of repeated measurements of module import time to
+    minimise the effect of a cold file system cache and other noise
+
+    :param module_name: name of module to import
+    :param n_repeats: number of measurements to make
+    :return: cumulative import time in seconds
+    """
+    return min(
+        measure_import_time(module_name)[module_name] for _ in range(n_repeats)
+    )
+
+
+def get_imported_modules(module_name):
+    """Get names of all modules loaded as a result of importing a module
+
+    :param module_name: name of module to import
+    :return: set of module names
+    """
+    proc = _run_python(
+        "-c",
+        f"import sys, json, {module_name}; print(json.dumps(list(sys.modules)))",
+    )
+    return set(json.loads(proc.stdout))
+
+
+def print_top_imports(module_name, n_top=15):
+    """Print modules with the largest cumulative import times"""
+    import_times = measure_import_time(module_name)
+    print(f"Import of {module_name}")
+    print(f"{'':<48}{'cumulative (ms)':>16}")
+    for name, import_time in sorted(
+        import_times.items(), key=lambda item: item[1], reverse=True
+    )[:n_top]:
+        print(f"{name:<48}{import_time * 1e3:>16.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "-n",
+        "--repeats",
+        type=int,
+        default=5,
+        help="Number of measurements for each module (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=DEF_IMPORT_TIME_BUDGET,
+        help="Maximum import time in seconds for the command line client "
+        "(default: %(default)s)",
+    )
+    args = parser.parse_args(argv)
+
+    import_times = {}
+    for module_name in MODULE_NAMES:
+        import_times[module_name] = get_min_import_time(module_name, args.repeats)
+        print(
+            f"{module_name}: minimum of {args.repeats} runs "
+            f"{import_times[module_name] * 1e3:.1f} ms"
+        )
+
+    print_top_imports(CLI_MODULE_NAME)
+
+    if import_times[CLI_MODULE_NAME] > args.budget:
+        print(
+            f"Import of {CLI_MODULE_NAME} exceeds the budget of "
+            f"{args.budget * 1e3:.1f} ms"
+        )
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,37 @@
+"""Benchmark key generation and certificate request creation time for each of
+the key algorithms supported by OnlineCaClient
+"""
+__author__ = "P J Kershaw"
+__date__ = "16/10/26"
+__copyright__ = "Copyright 2026 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level directory"
+__contact__ = "Philip.Kershaw@stfc.ac.uk"
+import sys
+
+from contrail.security.onlineca.client import OnlineCaClient
+from contrail.security.onlineca.client.test.benchmark import (
+    time_callable,
+    print_results,
+)
+
+
+def bench_key_types(n_repeats=20):
+    """Time key pair generation plus signing of a certificate request for
+    each supported key type"""
+    results = {}
+    for key_type in OnlineCaClient.KEY_TYPES:
+
+        def create_key_pair_and_cert_req():
+            key_pair = OnlineCaClient.create_key_pair(key_type=key_type)
+            OnlineCaClient.create_cert_req(key_pair)
+
+        results[key_type] = time_callable(create_key_pair_and_cert_req, n_repeats)
+
+    return results
+
+
+if __name__ == "__main__":
+    n_repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    print_results(
+        "Key generation + certificate request", bench_key_types(n_repeats)
+    )
@@ -0,0 +1,141 @@
+"""Benchmark parsing of X.509 subject names with each field separator, for
+names with and without many repeated fields e.g. domain components, and the
+effect of caching when the same few names are parsed and serialised
+"""
+__author__ = "P J Kershaw"
+__date__ = "16/10/26"
+__copyright__ = "Copyright 2026 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level directory"
+__contact__ = "Philip.Kershaw@stfc.ac.uk"
+import sys
+import tracemalloc
+
+from contrail.security.onlineca.client.openssl_utils import X509SubjectName
+from contrail.security.onlineca.client.test.benchmark import (
+    time_callable,
+    print_results,
+)
+
+N_DNS = 10000
+N_REPEATED_FIELDS = 200
+
+# Number of distinct DNs for cache benchmark
+N_CACHED_DNS = 20
+
+# Field name, value pairs for a typical DN and one with many repeated fields
+DN_FIELDS = {
+    "typical": (
+        ("DC", "uk"),
+        ("DC", "ac"),
+        ("O", "Science"),
+        ("OU", "Users"),
+        ("CN", "jbloggs"),
+    ),
+    "repeated": tuple(("DC", f"dc{i}") for i in range(N_REPEATED_FIELDS))
+    + (("CN", "jbloggs"),),
+}
+
+
+def make_dns(fields, separator, n_dns=N_DNS):
+    """Make distinct DN strings with the given fields
+
+    :param fields: tuple of field name, value pairs
+    :param separator: field separator
+    :param n_dns: number of DNs to make
+    :return: list of DN strings
+    """
+    if separator == "/":
+        fmt = "/" + "/".join(f"{k}={v}" for k, v in fields)
+    else:
+        fmt = ", ".join(f"{k}={v}" for k, v in fields)
+
+    return [f"{fmt}{i}" for i in range(n_dns)]
+
+
+def bench_parse(n_repeats=5):
+    """Time parsing of a batch of DNs for each separator and DN type. The
+    batch of DNs with many repeated fields is smaller to keep run time down.
+    Caching is disabled as every DN is different
+    """
+    X509SubjectName.set_cache_maxsize(0)
+    results = {}
+    for separator in X509SubjectName.VALID_SEPARATORS:
+        for dn_type, fields in DN_FIELDS.items():
+            n_dns = N_DNS if dn_type == "typical" else N_DNS // 20
+            dns = make_dns(fields, separator, n_dns)
+
+            def parse():
+                for dn in dns:
+                    X509SubjectName.from_string(dn, separator=separator)
+
+            results[f"'{separator}' {dn_type}"] = time_callable(parse, n_repeats)
+
+            def parse_many():
+                for _ in X509SubjectName.parse_many(dns, separator=separator):
+                    pass
+
+            results[f"'{separator}' {dn_type} batch"] = time_callable(
+                parse_many, n_repeats
+            )
+
+    X509SubjectName.set_cache_maxsize(X509SubjectName.DEF_CACHE_MAXSIZE)
+    return results
+
+
+def bench_cache(n_repeats=5):
+    """Time parsing and serialisation of the same few DNs over and over with
+    and without caching"""
+    dns = make_dns(DN_FIELDS["typical"], "/", N_CACHED_DNS) * (N_DNS // N_CACHED_DNS)
+
+    def parse_and_serialize():
+        for dn in dns:
+            X509SubjectName.from_string(dn).serialize(separator=",")
+
+    results = {}
+    for maxsize in (0, X509SubjectName.DEF_CACHE_MAXSIZE):
+        X509SubjectName.set_cache_maxsize(maxsize)
+        results[f"cache maxsize {maxsize}"] = time_callable(
+            parse_and_serialize, n_repeats
+        )
+
+    return results
+
+
+def measure_memory(n_dns=N_DNS):
+    """Measure memory allocated per parsed subject name
+
+    :return: mean bytes allocated per instance
+    """
+    dns = make_dns(DN_FIELDS["typical"], "/", n_dns)
+    X509SubjectName.set_cache_maxsize(0)
+
+    tracemalloc.start()
+    try:
+        snapshot_before = tracemalloc.take_snapshot()
+        subject_names = [X509SubjectName.from_string(dn) for dn in dns]
+        snapshot_after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+        X509SubjectName.set_cache_maxsize(X509SubjectName.DEF_CACHE_MAXSIZE)
+
+    n_bytes = sum(
+        stat.size_diff
+        for stat in snapshot_after.compare_to(snapshot_before, "filename")
+    )
+    del subject_names
+
+    return n_bytes / n_dns
+
+
+if __name__ == "__main__":
+    n_repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print_results(
+        f"Subject name parsing - {N_DNS} typical DNs, {N_DNS // 20} with "
+        f"{N_REPEATED_FIELDS} repeated fields",
+        bench_parse(n_repeats),
+    )
+    print_results(
+        f"Parse + serialize {N_DNS} DNs - {N_CACHED_DNS} distinct",
+        bench_cache(n_repeats),
+    )
+    print(f"Memory per parsed subject name: {measure_memory():.0f} bytes")
@@ -0,0 +1,255 @@
+"""Load test the Online CA service by making get certificate calls with
+OnlineCaClient at a target rate and report throughput and latency
+percentiles. If no server URL is set, requests are made to a stand-in server
+run in the same process e.g.
+
+$ python -m contrail.security.onlineca.client.test.benchmark.load_test \
+    -r 50 -n 1000 -k ec-p256 --latency 0.02
+
+Requests are started on a fixed schedule whether or not earlier requests have
+completed. Latencies are measured from the scheduled start time so that
+queueing delays in the client are included when the target rate can't be met
+"""
+__author__ = "P J Kershaw"
+__date__ = "16/10/26"
+__copyright__ = "Copyright 2026 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level directory"
+__contact__ = "Philip.Kershaw@stfc.ac.uk"
+import argparse
+import concurrent.futures
+import contextlib
+import json
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from contrail.security.onlineca.client import OnlineCaClient
+from contrail.security.onlineca.client.test.stand_in_server import (
+    StandInOnlineCaServer,
+)
+
+DEF_RATE = 20.0
+DEF_N_REQUESTS = 200
+DEF_N_WORKERS = 16
+DEF_USERNAME = "loadtest"
+DEF_PASSWORD = "changeme"
+PERCENTILES = (50, 95, 99)
+
+
+def run_load(
+    onlineca_client,
+    server_url,
+    rate=DEF_RATE,
+    n_requests=DEF_N_REQUESTS,
+    n_workers=DEF_N_WORKERS,
+    username=DEF_USERNAME,
+    password=DEF_PASSWORD,
+):
+    """Make get certificate calls at a target rate
+
+    :param onlineca_client: client to make calls with
+    :param server_url: URL for get certificate endpoint
+    :param rate: target number of calls started per second
+    :param n_requests: total number of calls to make
+    :param n_workers: maximum number of calls in progress at once
+    :param username: username for HTTP Basic Auth
+    :param password: password for HTTP Basic Auth
+    :return: dictionary of statistics as returned by get_load_stats
+    """
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def get_certificate(scheduled_time):
+        try:
+            onlineca_client.get_certificate(username, password, server_url)
+        except Exception as e:
+            with lock:
+                errors.append(e)
+        else:
+            latency = time.perf_counter() - scheduled_time
+            with lock:
+                latencies.append(latency)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=n_workers) as executor:
+        start_time = time.perf_counter()
+        for i in range(n_requests):
+            scheduled_time = start_time + i / rate
+            delay = scheduled_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+            executor.submit(get_certificate, scheduled_time)
+
+    duration = time.perf_counter() - start_time
+
+    return get_load_stats(latencies, errors, duration, rate)
+
+
+def get_load_stats(latencies, errors, duration, rate):
+    """Calculate throughput and latency statistics
+
+    :param latencies: latencies in seconds of successful calls
+    :param errors: exceptions raised by failed calls
+    :param duration: elapsed time in seconds for all calls
+    :param rate: target rate
+    :return: dictionary of statistics. Times are in seconds
+    """
+    n_ok = len(latencies)
+    stats = {
+        "target_rate": rate,
+        "n_requests": n_ok + len(errors),
+        "n_errors": len(errors),
+        "duration": duration,
+        "throughput": n_ok / duration if duration else 0.0,
+    }
+    if n_ok > 1:
+        # Cut points for each percentile from 1 to 99
+        quantiles = statistics.quantiles(latencies, n=100, method="inclusive")
+        for percentile in PERCENTILES:
+            stats[f"p{percentile}"] = quantiles[percentile - 1]
+    else:
+        for percentile in PERCENTILES:
+            stats[f"p{percentile}"] = latencies[0] if latencies else None
+
+    stats["mean"] = statistics.mean(latencies) if latencies else None
+    stats["max"] = max(latencies) if latencies else None
+
+    error_types = {}
+    for e in errors:
+        error_type = type(e).__name__
+        error_types[error_type] = error_types.get(error_type, 0) + 1
+
+    stats["error_types"] = error_types
+
+    return stats
+
+
+def print_load_stats(stats):
+    """Print load test statistics
+
+    :param stats: dictionary returned by run_load
+    """
+    print(
+        f"{stats['n_requests']} requests in {stats['duration']:.2f} s, "
+        f"{stats['n_errors']} errors"
+    )
+    print(
+        f"Throughput: {stats['throughput']:.1f} requests/s "
+        f"(target {stats['target_rate']:.1f})"
+    )
+    for name in [f"p{percentile}" for percentile in PERCENTILES] + ["mean", "max"]:
+        if stats[name] is not None:
+            print(f"{name:<8}{stats[name] * 1e3:>12.3f} ms")
+
+    for error_type, n_errors in stats["error_types"].items():
+        print(f"{error_type}: {n_errors}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "-s",
+        "--server",
+        dest="server_url",
+        help="URL for get certificate endpoint. If omitted, a stand-in server "
+        "is started",
+    )
+    parser.add_argument(
+        "-c",
+        "--ca-cert-dir",
+        help="Directory of CA certificates for verifying the server",
+    )
+    parser.add_argument("-l", "--username", default=DEF_USERNAME)
+    parser.add_argument("-p", "--password", default=DEF_PASSWORD)
+    parser.add_argument(
+        "-r",
+        "--rate",
+        type=float,
+        default=DEF_RATE,
+        help="Target requests per second (default: %(default)s)",
+    )
+    parser.add_argument(
+        "-n",
+        "--requests",
+        dest="n_requests",
+        type=int,
+        default=DEF_N_REQUESTS,
+        help="Number of requests (default: %(default)s)",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        dest="n_workers",
+        type=int,
+        default=DEF_N_WORKERS,
+        help="Maximum concurrent requests (default: %(default)s)",
+    )
+    parser.add_argument(
+        "-k",
+        "--key-type",
+        choices=OnlineCaClient.KEY_TYPES,
+        default=OnlineCaClient.DEF_KEY_TYPE,
+    )
+    parser.add_argument(
+        "--crypto-backend",
+        choices=OnlineCaClient.CRYPTO_BACKENDS,
+        default=OnlineCaClient.DEF_CRYPTO_BACKEND,
+    )
+    parser.add_argument("-o", "--output", help="Write statistics to this JSON file")
+
+    stand_in_group = parser.add_argument_group("stand-in server")
+    stand_in_group.add_argument("--latency", type=float, default=0.0)
+    stand_in_group.add_argument("--latency-jitter", type=float, default=0.0)
+    stand_in_group.add_argument("--error-rate", type=float, default=0.0)
+    stand_in_group.add_argument("--tls", dest="use_tls", action="store_true")
+    args = parser.parse_args(argv)
+
+    with contextlib.ExitStack() as stack:
+        onlineca_client = stack.enter_context(
+            OnlineCaClient(http_pool_maxsize=args.n_workers)
+        )
+        onlineca_client.key_type = args.key_type
+        onlineca_client.crypto_backend = args.crypto_backend
+
+        server_url = args.server_url
+        ca_cert_dir = args.ca_cert_dir
+        if server_url is None:
+            server = StandInOnlineCaServer(
+                port=0,
+                latency=args.latency,
+                latency_jitter=args.latency_jitter,
+                error_rate=args.error_rate,
+                use_tls=args.use_tls,
+            )
+            stack.enter_context(server.run_in_thread())
+            server_url = server.certificate_url
+            if args.use_tls and ca_cert_dir is None:
+                ca_cert_dir = stack.enter_context(tempfile.TemporaryDirectory())
+                server.write_ca_cert(ca_cert_dir)
+
+        if ca_cert_dir is not None:
+            onlineca_client.ca_cert_dir = ca_cert_dir
+
+        stats = run_load(
+            onlineca_client,
+            server_url,
+            rate=args.rate,
+            n_requests=args.n_requests,
+            n_workers=args.n_workers,
+            username=args.username,
+            password=args.password,
+        )
+
+    print_load_stats(stats)
+    if args.output:
+        with open(args.output, "w") as stats_file:
+            json.dump(stats, stats_file, indent=2)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,384 @@
+"""Benchmark suite for the OnlineCaClient hot paths. Results are written as
+JSON and can be compared against a baseline to catch regressions. Timings
+are specific to the machine they were recorded on so no baseline is
+distributed. Record one locally first and then compare with it e.g.
+
+$ python -m contrail.security.onlineca.client.test.benchmark.suite \
+    --save-baseline
+$ python -m contrail.security.onlineca.client.test.benchmark.suite \
+    -o results.json -b
+"""
+__author__ = "P J Kershaw"
+__date__ = "16/10/26"
+__copyright__ = "Copyright 2026 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level directory"
+__contact__ = "Philip.Kershaw@stfc.ac.uk"
+import argparse
+import base64
+import contextlib
+import datetime
+import fnmatch
+import json
+import os
+import platform
+import sys
+import tempfile
+
+from OpenSSL import crypto
+
+from contrail.security.onlineca.client import OnlineCaClient
+from contrail.security.onlineca.client.chain_cache import CertificateChainCache
+from contrail.security.onlineca.client.openssl_utils import X509SubjectName
+from contrail.security.onlineca.client.test import TEST_CA_DIR, TEST_DIR
+from contrail.security.onlineca.client.test.benchmark import (
+    time_callable,
+    print_results,
+)
+
+# Baseline recorded on this machine with --save-baseline
+DEF_BASELINE_FILENAME = ".onlinecaclient_benchmark_baseline.json"
+DEF_BASELINE_FILEPATH = os.path.join(os.path.expanduser("~"), DEF_BASELINE_FILENAME)
+
+# Maximum fractional increase in minimum time over the baseline before a
+# benchmark is reported as a regression
+DEF_REGRESSION_THRESHOLD = 0.25
+
+# Statistic compared with the baseline. The minimum is least affected by
+# other load on the machine
+COMPARISON_STAT = "min"
+
+CERT_RESP_FILEPATHS = (
+    os.path.join(TEST_DIR, "localhost.crt"),
+    os.path.join(TEST_CA_DIR, "ffc3d59b.0"),
+    os.path.join(TEST_CA_DIR, "98ef0ee5.0"),
+)
+
+# Number of files in trust roots response - typical of a federation's bundle
+N_TRUSTROOT_FILES = 100
+
+SUBJECT_NAME = "/DC=uk/DC=ac/O=Science/OU=Users/CN=jbloggs"
+
+OAUTH_TOK = {
+    "access_token": "a" * 64,
+    "refresh_token": "r" * 64,
+    "token_type": "Bearer",
+    "expires_in": 3600,
+    "expires_at": 1792166400.0,
+    "scope": ["https://slcs.somewhere.ac.uk/onlineca/certificate/"],
+}
+
+# Benchmark names and factories with the number of times each is repeated
+BENCHMARKS = {}
+
+
+def benchmark(name, n_repeats):
+    """Register a benchmark. The decorated function is a generator which
+    makes any fixtures, yields the callable to be timed and then cleans up
+
+    :param name: benchmark name
+    :param n_repeats: number of times the callable is timed
+    """
+
+    def decorator(func):
+        BENCHMARKS[name] = (contextlib.contextmanager(func), n_repeats)
+        return func
+
+    return decorator
+
+
+def _read_file(filepath):
+    with open(filepath, "rb") as file_:
+        return file_.read()
+
+
+@contextlib.contextmanager
+def _subject_name_cache_maxsize(maxsize):
+    """Set the subject name cache size for the duration of a benchmark"""
+    orig_maxsize = X509SubjectName.cache_stats()["parse"]["maxsize"]
+    X509SubjectName.set_cache_maxsize(maxsize)
+    try:
+        yield
+    finally:
+        X509SubjectName.set_cache_maxsize(orig_maxsize)
+
+
+def _register_key_pair_benchmarks():
+    # RSA key generation is much slower so fewer repeats are made
+    for key_type in OnlineCaClient.KEY_TYPES:
+        n_repeats = 20 if key_type == OnlineCaClient.KEY_TYPE_RSA else 200
+
+        def bench_create_key_pair(key_type=key_type):
+            yield lambda: OnlineCaClient.create_key_pair(key_type=key_type)
+
+        def bench_create_cert_req(key_type=key_type):
+            key_pair = OnlineCaClient.create_key_pair(key_type=key_type)
+            yield lambda: OnlineCaClient.create_cert_req(key_pair)
+
+        benchmark(f"create_key_pair[{key_type}]", n_repeats)(bench_create_key_pair)
+        benchmark(f"create_cert_req[{key_type}]", 200)(bench_create_cert_req)
+
+
+_register_key_pair_benchmarks()
+
+
+@benchmark("parse_cert_resp", 500)
+def bench_parse_cert_resp():
+    content = b"".join(_read_file(filepath) for filepath in CERT_RESP_FILEPATHS)
+
+    yield lambda: OnlineCaClient._parse_cert_resp(content)
+
+
+@benchmark("parse_cert_resp[chain_cache]", 500)
+def bench_parse_cert_resp_chain_cache():
+    content = b"".join(_read_file(filepath) for filepath in CERT_RESP_FILEPATHS)
+    chain_cache = CertificateChainCache()
+    yield lambda: OnlineCaClient._parse_cert_resp(content, chain_cache=chain_cache)
+
+
+@benchmark("is_ca_certificate", 1000)
+def bench_is_ca_certificate():
+    certs = [
+        crypto.load_certificate(crypto.FILETYPE_PEM, _read_file(filepath))
+        for filepath in CERT_RESP_FILEPATHS
+    ]
+
+    def is_ca_certificate():
+        for cert in certs:
+            OnlineCaClient._is_ca_certificate(cert)
+
+    yield is_ca_certificate
+
+
+@benchmark("parse_trustroots", 200)
+def bench_parse_trustroots():
+    ca_certs = [
+        _read_file(os.path.join(TEST_CA_DIR, file_name))
+        for file_name in sorted(os.listdir(TEST_CA_DIR))
+    ]
+    content = b"\n".join(
+        b"%08x.0=%s" % (i, base64.b64encode(ca_certs[i % len(ca_certs)]))
+        for i in range(N_TRUSTROOT_FILES)
+    )
+    yield lambda: OnlineCaClient._parse_trustroots(content)
+
+
+@benchmark("subject_name_parse", 2000)
+def bench_subject_name_parse():
+    with _subject_name_cache_maxsize(0):
+        yield lambda: X509SubjectName.parse(SUBJECT_NAME)
+
+
+@benchmark("subject_name_parse[cached]", 2000)
+def bench_subject_name_parse_cached():
+    with _subject_name_cache_maxsize(X509SubjectName.DEF_CACHE_MAXSIZE):
+        yield lambda: X509SubjectName.parse(SUBJECT_NAME)
+
+
+@benchmark("subject_name_serialize", 2000)
+def bench_subject_name_serialize():
+    with _subject_name_cache_maxsize(0):
+        dn = X509SubjectName.parse(SUBJECT_NAME)
+        yield lambda: X509SubjectName.Serialize(dn)
+
+
+@benchmark("subject_name_serialize[cached]", 2000)
+def bench_subject_name_serialize_cached():
+    with _subject_name_cache_maxsize(X509SubjectName.DEF_CACHE_MAXSIZE):
+        dn = X509SubjectName.parse(SUBJECT_NAME)
+        yield lambda: X509SubjectName.Serialize(dn)
+
+
+@benchmark("save_oauth_tok", 200)
+def bench_save_oauth_tok():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tok_filepath = os.path.join(tmp_dir, "oauth_tok.json")
+        yield lambda: OnlineCaClient.save_oauth_tok(OAUTH_TOK, tok_filepath)
+
+
+@benchmark("read_oauth_tok", 1000)
+def bench_read_oauth_tok():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tok_filepath = os.path.join(tmp_dir, "oauth_tok.json")
+        OnlineCaClient.save_oauth_tok(OAUTH_TOK, tok_filepath)
+        yield lambda: OnlineCaClient.read_oauth_tok(tok_filepath)
+
+
+def run_suite(patterns=None, repeat_scale=1.0):
+    """Run benchmarks
+
+    :param patterns: optional list of shell-style patterns. Only benchmarks
+    whose names match one of them are run
+    :param repeat_scale: factor applied to the number of repeats for each
+    benchmark e.g. set < 1 for a quick run
+    :return: dictionary of benchmark names and timing statistics
+    """
+    results = {}
+    for name, (factory, n_repeats) in BENCHMARKS.items():
+        if patterns and not any(fnmatch.fnmatch(name, pat) for pat in patterns):
+            continue
+
+        with factory() as func:
+            # Warm up so that one-off costs e.g. on import aren't counted
+            func()
+            results[name] = time_callable(func, max(int(n_repeats * repeat_scale), 1))
+
+    return results
+
+
+def save_results(results, filepath):
+    """Write results to a JSON file with details of the platform they were
+    obtained on
+
+    :param results: dictionary of timing statistics as returned by run_suite
+    :param filepath: output file path
+    """
+    content = {
+        "metadata": {
+            "created": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+        },
+        "results": results,
+    }
+    with open(filepath, "w") as results_file:
+        json.dump(content, results_file, indent=2, sort_keys=True)
+
+
+def load_results(filepath):
+    """Read results saved with save_results
+
+    :param filepath: input file path
+    :return: dictionary of benchmark names and timing statistics
+    """
+    with open(filepath) as results_file:
+        return json.load(results_file)["results"]
+
+
+def compare_results(results, baseline, threshold=DEF_REGRESSION_THRESHOLD):
+    """Compare results with a baseline. Benchmarks missing from either are
+    skipped
+
+    :param results: dictionary of timing statistics as returned by run_suite
+    :param baseline: baseline results in the same form
+    :param threshold: maximum fractional increase in time over the baseline
+    before a benchmark is flagged as a regression
+    :return: dictionary of benchmark names and tuples of baseline time,
+    time and whether it is a regression
+    """
+    comparison = {}
+    for name, stats in results.items():
+        if name not in baseline:
+            continue
+
+        baseline_time = baseline[name][COMPARISON_STAT]
+        time_ = stats[COMPARISON_STAT]
+        comparison[name] = (
+            baseline_time,
+            time_,
+            time_ > baseline_time * (1.0 + threshold),
+        )
+
+    return comparison
+
+
+def print_comparison(comparison):
+    """Print table comparing results with the baseline
+
+    :param comparison: dictionary returned by compare_results
+    """
+    print(f"Comparison with baseline ({COMPARISON_STAT})")
+    print(f"{'':<32}{'baseline (ms)':>14}{'current (ms)':>14}{'change':>10}")
+    for name, (baseline_time, time_, is_regression) in comparison.items():
+        change = (time_ - baseline_time) / baseline_time
+        print(
+            f"{name:<32}{baseline_time * 1e3:>14.3f}{time_ * 1e3:>14.3f}"
+            f"{change:>+10.1%}{'  REGRESSION' if is_regression else ''}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "-k",
+        "--filter",
+        dest="patterns",
+        action="append",
+        help="Run only benchmarks matching this shell-style pattern. May be "
+        "repeated",
+    )
+    parser.add_argument(
+        "-s",
+        "--repeat-scale",
+        type=float,
+        default=1.0,
+        help="Factor applied to the number of repeats for each benchmark",
+    )
+    parser.add_argument("-o", "--output", help="Write results to this JSON file")
+    parser.add_argument(
+        "-b",
+        "--compare",
+        action="store_true",
+        help="Compare results with the baseline. Exit with status 1 if any "
+        "benchmark has regressed",
+    )
+    parser.add_argument(
+        "--baseline",
+        default=DEF_BASELINE_FILEPATH,
+        help="Baseline results file (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Save results as the new baseline",
+    )
+    parser.add_argument(
+        "-t",
+        "--threshold",
+        type=float,
+        default=DEF_REGRESSION_THRESHOLD,
+        help="Fractional increase in time over the baseline reported as a "
+        "regression (default: %(default)s)",
+    )
+    parser.add_argument(
+        "-l", "--list", action="store_true", help="List benchmarks and exit"
+    )
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name in BENCHMARKS:
+            print(name)
+        return 0
+
+    baseline = None
+    if args.compare:
+        try:
+            baseline = load_results(args.baseline)
+        except FileNotFoundError:
+            parser.error(
+                f"No baseline found at {args.baseline!r}. Record one on this "
+                "machine with --save-baseline"
+            )
+
+    results = run_suite(patterns=args.patterns, repeat_scale=args.repeat_scale)
+    print_results("OnlineCaClient benchmark suite", results)
+
+    if args.output:
+        save_results(results, args.output)
+
+    status = 0
+    if baseline is not None:
+        comparison = compare_results(results, baseline, threshold=args.threshold)
+        print_comparison(comparison)
+        if any(is_regression for _, _, is_regression in comparison.values()):
+            status = 1
+
+    if args.save_baseline:
+        save_results(results, args.baseline)
+
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
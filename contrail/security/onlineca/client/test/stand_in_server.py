@@ -0,0 +1,530 @@
+"""Online CA service client - local stand-in for the Online CA service for
+load and integration testing without a ContrailOnlineCAService deployment
+
+Certificate requests posted to any path ending in /certificate/ are signed
+and a bundle of base64 encoded CA certificates is returned from any path
+ending in /trustroots/. The private keys for the test CA certificates under
+test/ca aren't available so a signing CA is created when the server starts.
+Its certificate is returned with each certificate issued and is added to the
+trust roots bundle. Response latency and errors can be injected e.g.
+
+$ python -m contrail.security.onlineca.client.test.stand_in_server \
+    --latency 0.05 --error-rate 0.01
+
+Contrail Project
+"""
+__author__ = "P J Kershaw"
+__date__ = "16/10/26"
+__copyright__ = "Copyright 2026 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level directory"
+__contact__ = "Philip.Kershaw@stfc.ac.uk"
+import argparse
+import base64
+import contextlib
+import datetime
+import email.utils
+import hashlib
+import ipaddress
+import logging
+import os
+import random
+import ssl
+import tempfile
+import threading
+import time
+from collections.abc import Generator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from OpenSSL import crypto
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+
+from contrail.security.onlineca.client.test import TEST_CA_DIR
+
+log = logging.getLogger(__name__)
+
+
+class StandInOnlineCaRequestHandler(BaseHTTPRequestHandler):
+    """Handle get certificate and get trust roots requests"""
+
+    # Keep connections open between requests as the Online CA service does so
+    # that client connection pooling is exercised
+    protocol_version = "HTTP/1.1"
+
+    # Headers and body are written separately. Send them immediately rather
+    # than waiting on the client's delayed acknowledgement
+    disable_nagle_algorithm = True
+
+    def do_GET(self) -> None:
+        if not urlparse(self.path).path.endswith(self.server.TRUSTROOTS_PATH_SUFFIX):
+            self._send_error(404)
+            return
+
+        if self.server.inject_fault(self):
+            return
+
+        self.server.record_trustroots_request(self.headers)
+        headers = {
+            "ETag": self.server.trustroots_etag,
+            "Last-Modified": self.server.trustroots_last_modified,
+        }
+        if self.server.is_trustroots_unmodified(self.headers):
+            self._send_response(304, b"", headers=headers)
+            return
+
+        self._send_response(200, self.server.trustroots, headers=headers)
+
+    def do_POST(self) -> None:
+        # Read the body before responding so that the connection can be
+        # re-used whatever the response
+        content_length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(content_length)
+
+        if not urlparse(self.path).path.endswith(
+            self.server.CERTIFICATE_PATH_SUFFIX
+        ):
+            self._send_error(404)
+            return
+
+        if self.server.inject_fault(self):
+            return
+
+        try:
+            cert_req = parse_qs(body.decode("ascii"))[
+                self.server.CERT_REQ_POST_PARAM_KEYNAME
+            ][0]
+            content = self.server.issue_certificate(
+                cert_req.encode(), self._get_username()
+            )
+        except (KeyError, UnicodeDecodeError, ValueError):
+            self._send_error(400)
+            return
+
+        self._send_response(200, content)
+
+    def _get_username(self) -> str:
+        auth_type, _, credentials = self.headers.get("Authorization", "").partition(
+            " "
+        )
+        if auth_type.lower() == "basic":
+            return base64.b64decode(credentials).decode().partition(":")[0]
+
+        return self.server.DEF_USERNAME
+
+    def _send_response(
+        self, status: int, content: bytes, headers: Optional[dict] = None
+    ) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(content)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def _send_error(self, status: int) -> None:
+        self.server.record_error()
+        self._send_response(status, b"")
+
+    def log_message(self, format: str, *args) -> None:
+        log.debug(format, *args)
+
+
+class StandInOnlineCaServer(ThreadingHTTPServer):
+    """Stand-in Online CA service. Requests are handled in a new thread for
+    each connection
+
+    >>> server = StandInOnlineCaServer(port=0, latency=0.05)
+    >>> with server.run_in_thread():
+    ...     onlineca_client.get_certificate(username, password, server.certificate_url)
+    """
+
+    daemon_threads = True
+
+    CERTIFICATE_PATH_SUFFIX = "/certificate/"
+    TRUSTROOTS_PATH_SUFFIX = "/trustroots/"
+    CERT_REQ_POST_PARAM_KEYNAME = "certificate_request"
+
+    # Defaults match the URIs in test_onlineca_client.cfg
+    DEF_HOST = "localhost"
+    DEF_PORT = 10443
+    DEF_PATH_PREFIX = "/onlineca"
+    DEF_CERT_LIFETIME = datetime.timedelta(days=1)
+    DEF_USERNAME = "anonymous"
+    CA_SUBJECT_NAME = "Stand-in Online CA"
+
+    def __init__(
+        self,
+        host: str = DEF_HOST,
+        port: int = DEF_PORT,
+        latency: float = 0.0,
+        latency_jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 500,
+        use_tls: bool = False,
+        ca_cert_dir: Optional[str] = TEST_CA_DIR,
+        cert_lifetime: datetime.timedelta = DEF_CERT_LIFETIME,
+        seed: Optional[int] = None,
+    ) -> None:
+        """
+        :param host: host name or address to listen on
+        :param port: port to listen on. Set to 0 to use any free port
+        :param latency: delay in seconds added to each response
+        :param latency_jitter: maximum random delay in seconds added to the
+        latency
+        :param error_rate: fraction of requests to respond to with an error
+        :param error_status: HTTP status code for injected errors
+        :param use_tls: set to True to serve HTTPS with a certificate issued
+        by the signing CA
+        :param ca_cert_dir: directory of CA certificates to include in the
+        trust roots bundle in addition to the signing CA certificate
+        :param cert_lifetime: lifetime of certificates issued
+        :param seed: optionally seed the random number generator used for
+        latency jitter and error injection to make runs repeatable
+        """
+        if not 0.0 <= error_rate <= 1.0:
+            raise ValueError(f"Expecting error rate between 0 and 1; got {error_rate}")
+
+        if latency < 0.0 or latency_jitter < 0.0:
+            raise ValueError("Latency must not be negative")
+
+        super().__init__((host, port), StandInOnlineCaRequestHandler)
+
+        self.host = host
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.use_tls = use_tls
+        self.cert_lifetime = cert_lifetime
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.n_requests = 0
+        self.n_errors = 0
+
+        self.ca_key, self.ca_cert = self._create_ca()
+        self.ca_cert_pem = self.ca_cert.public_bytes(serialization.Encoding.PEM)
+        self.ca_cert_file_name = "%08x.0" % (
+            crypto.X509.from_cryptography(self.ca_cert).subject_name_hash()
+        )
+
+        self.trustroots = self._create_trustroots(ca_cert_dir)
+        self.trustroots_etag = '"%s"' % hashlib.sha256(self.trustroots).hexdigest()
+        self.trustroots_last_modified = email.utils.formatdate(usegmt=True)
+
+        # Conditional request headers sent with each get trust roots request
+        self.trustroots_request_headers = []
+
+        if use_tls:
+            self.socket = self._create_ssl_context().wrap_socket(
+                self.socket, server_side=True, do_handshake_on_connect=False
+            )
+
+    @property
+    def base_url(self) -> str:
+        scheme = "https" if self.use_tls else "http"
+        port = self.server_address[1]
+        return f"{scheme}://{self.host}:{port}{self.__class__.DEF_PATH_PREFIX}"
+
+    @property
+    def certificate_url(self) -> str:
+        return self.base_url + self.__class__.CERTIFICATE_PATH_SUFFIX
+
+    @property
+    def trustroots_url(self) -> str:
+        return self.base_url + self.__class__.TRUSTROOTS_PATH_SUFFIX
+
+    @classmethod
+    def _create_ca(cls) -> Tuple[ec.EllipticCurvePrivateKey, x509.Certificate]:
+        """Create a self-signed CA. An elliptic curve key is used so that
+        signing certificates adds little to response times"""
+        ca_key = ec.generate_private_key(ec.SECP256R1())
+        name = x509.Name(
+            [x509.NameAttribute(NameOID.COMMON_NAME, cls.CA_SUBJECT_NAME)]
+        )
+        now = datetime.datetime.now(datetime.timezone.utc)
+        ca_cert = (
+            x509.CertificateBuilder()
+            .subject_name(name)
+            .issuer_name(name)
+            .public_key(ca_key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(now - datetime.timedelta(minutes=5))
+            .not_valid_after(now + datetime.timedelta(days=30))
+            .add_extension(
+                x509.BasicConstraints(ca=True, path_length=None), critical=True
+            )
+            .add_extension(
+                x509.KeyUsage(
+                    digital_signature=True,
+                    content_commitment=False,
+                    key_encipherment=False,
+                    data_encipherment=False,
+                    key_agreement=False,
+                    key_cert_sign=True,
+                    crl_sign=True,
+                    encipher_only=False,
+                    decipher_only=False,
+                ),
+                critical=True,
+            )
+            .sign(ca_key, hashes.SHA256())
+        )
+        return ca_key, ca_cert
+
+    def _create_trustroots(self, ca_cert_dir: Optional[str]) -> bytes:
+        """Make get trust roots response content: each line is a file name
+        and its base64 encoded content separated by '='"""
+        files = {}
+        if ca_cert_dir is not None:
+            for file_name in sorted(os.listdir(ca_cert_dir)):
+                with open(os.path.join(ca_cert_dir, file_name), "rb") as ca_file:
+                    files[file_name] = ca_file.read()
+
+        files[self.ca_cert_file_name] = self.ca_cert_pem
+
+        return b"".join(
+            b"%s=%s\n" % (file_name.encode(), base64.b64encode(content))
+            for file_name, content in files.items()
+        )
+
+    def _create_ssl_context(self) -> ssl.SSLContext:
+        """Create SSL context with a certificate for the host issued by the
+        signing CA"""
+        key = ec.generate_private_key(ec.SECP256R1())
+        try:
+            host_name = x509.IPAddress(ipaddress.ip_address(self.host))
+        except ValueError:
+            host_name = x509.DNSName(self.host)
+
+        now = datetime.datetime.now(datetime.timezone.utc)
+        cert = (
+            x509.CertificateBuilder()
+            .subject_name(
+                x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, self.host)])
+            )
+            .issuer_name(self.ca_cert.subject)
+            .public_key(key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(now - datetime.timedelta(minutes=5))
+            .not_valid_after(now + datetime.timedelta(days=30))
+            .add_extension(
+                x509.SubjectAlternativeName([host_name]),
+                critical=False,
+            )
+            .sign(self.ca_key, hashes.SHA256())
+        )
+
+        # The ssl module only loads certificates and keys from files
+        ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cert_filepath = os.path.join(tmp_dir, "host.pem")
+            with open(cert_filepath, "wb") as cert_file:
+                cert_file.write(
+                    key.private_bytes(
+                        serialization.Encoding.PEM,
+                        serialization.PrivateFormat.PKCS8,
+                        serialization.NoEncryption(),
+                    )
+                )
+                cert_file.write(cert.public_bytes(serialization.Encoding.PEM))
+
+            ssl_context.load_cert_chain(cert_filepath)
+
+        return ssl_context
+
+    def write_ca_cert(self, ca_cert_dir: str) -> str:
+        """Write signing CA certificate to a directory so that clients can
+        verify the server when TLS is used
+
+        :param ca_cert_dir: CA certificate directory
+        :return: path of file written
+        """
+        ca_cert_filepath = os.path.join(ca_cert_dir, self.ca_cert_file_name)
+        with open(ca_cert_filepath, "wb") as ca_cert_file:
+            ca_cert_file.write(self.ca_cert_pem)
+
+        return ca_cert_filepath
+
+    def inject_fault(self, handler: StandInOnlineCaRequestHandler) -> bool:
+        """Delay the response by the configured latency and respond with an
+        error for the configured fraction of requests
+
+        :param handler: handler for the current request
+        :return: True if an error response was sent
+        """
+        with self._lock:
+            self.n_requests += 1
+            delay = self.latency + self._random.uniform(0.0, self.latency_jitter)
+            is_error = self._random.random() < self.error_rate
+
+        if delay:
+            time.sleep(delay)
+
+        if is_error:
+            handler._send_error(self.error_status)
+
+        return is_error
+
+    def record_trustroots_request(self, headers) -> None:
+        with self._lock:
+            self.trustroots_request_headers.append(
+                {
+                    name: headers[name]
+                    for name in ("If-None-Match", "If-Modified-Since")
+                    if name in headers
+                }
+            )
+
+    def is_trustroots_unmodified(self, headers) -> bool:
+        """Evaluate conditional request headers for get trust roots. As
+        specified in RFC 9110, If-Modified-Since is ignored when
+        If-None-Match is present
+
+        :param headers: request headers
+        :return: True if a 304 Not Modified response should be sent
+        """
+        if "If-None-Match" in headers:
+            return headers["If-None-Match"] == self.trustroots_etag
+
+        if "If-Modified-Since" in headers:
+            try:
+                modified_since = email.utils.parsedate_to_datetime(
+                    headers["If-Modified-Since"]
+                )
+            except (TypeError, ValueError):
+                return False
+
+            return modified_since >= email.utils.parsedate_to_datetime(
+                self.trustroots_last_modified
+            )
+
+        return False
+
+    def record_error(self) -> None:
+        with self._lock:
+            self.n_errors += 1
+
+    def issue_certificate(self, cert_req_pem: bytes, username: str) -> bytes:
+        """Sign certificate request
+
+        :param cert_req_pem: PEM encoded certificate request
+        :param username: common name for the certificate subject
+        :return: PEM encoded certificate issued followed by the signing CA
+        certificate
+        :raise ValueError: invalid certificate request
+        """
+        cert_req = x509.load_pem_x509_csr(cert_req_pem)
+        if not cert_req.is_signature_valid:
+            raise ValueError("Invalid certificate request signature")
+
+        now = datetime.datetime.now(datetime.timezone.utc)
+        cert = (
+            x509.CertificateBuilder()
+            .subject_name(
+                x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, username)])
+            )
+            .issuer_name(self.ca_cert.subject)
+            .public_key(cert_req.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(now - datetime.timedelta(minutes=5))
+            .not_valid_after(now + self.cert_lifetime)
+            .add_extension(
+                x509.BasicConstraints(ca=False, path_length=None), critical=True
+            )
+            .sign(self.ca_key, hashes.SHA256())
+        )
+        return cert.public_bytes(serialization.Encoding.PEM) + self.ca_cert_pem
+
+    @contextlib.contextmanager
+    def run_in_thread(self) -> Generator[None, None, None]:
+        """Serve requests in a new thread for the duration of the with
+        statement"""
+        thread = threading.Thread(target=self.serve_forever)
+        thread.start()
+        try:
+            yield
+        finally:
+            self.shutdown()
+            thread.join()
+            self.server_close()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Local stand-in for the Online CA service"
+    )
+    parser.add_argument("--host", default=StandInOnlineCaServer.DEF_HOST)
+    parser.add_argument(
+        "-p", "--port", type=int, default=StandInOnlineCaServer.DEF_PORT
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.0,
+        help="Delay in seconds added to each response",
+    )
+    parser.add_argument(
+        "--latency-jitter",
+        type=float,
+        default=0.0,
+        help="Maximum random delay in seconds added to the latency",
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of requests to respond to with an error",
+    )
+    parser.add_argument(
+        "--error-status",
+        type=int,
+        default=500,
+        help="HTTP status code for injected errors",
+    )
+    parser.add_argument(
+        "--tls",
+        dest="use_tls",
+        action="store_true",
+        help="Serve HTTPS. The signing CA certificate is written to the "
+        "directory set with --ca-cert-out so that clients can verify the server",
+    )
+    parser.add_argument(
+        "--ca-cert-out",
+        dest="ca_cert_out_dir",
+        help="Directory to write the signing CA certificate to",
+    )
+    parser.add_argument("-d", "--debug", action="store_true")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.DEBUG if args.debug else logging.INFO)
+
+    server = StandInOnlineCaServer(
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        latency_jitter=args.latency_jitter,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        use_tls=args.use_tls,
+    )
+    if args.ca_cert_out_dir:
+        server.write_ca_cert(args.ca_cert_out_dir)
+
+    log.info("Get certificate URL: %s", server.certificate_url)
+    log.info("Get trust roots URL: %s", server.trustroots_url)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
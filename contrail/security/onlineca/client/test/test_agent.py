@@ -0,0 +1,190 @@
+"""Online CA service client - credential agent unit tests
+
+Contrail Project
+"""
+__author__ = "P J Kershaw"
+__date__ = "16/10/26"
+__copyright__ = "Copyright 2026 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level directory"
+__contact__ = "Philip.Kershaw@stfc.ac.uk"
+import json
+import os
+import signal
+import stat
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from OpenSSL import crypto
+
+from contrail.security.onlineca.client import OnlineCaClient, _write_file_atomic
+from contrail.security.onlineca.client.agent import (
+    CredentialAgent,
+    CredentialAgentError,
+    get_credential_from_agent,
+)
+from contrail.security.onlineca.client.openssl_utils import asn1_time_to_timestamp
+from contrail.security.onlineca.client.test.stand_in_server import (
+    StandInOnlineCaServer,
+)
+
+
+class CredentialAgentTestCase(unittest.TestCase):
+    """Test renewal of a delegated credential by the credential agent"""
+
+    def setUp(self):
+        self.server = StandInOnlineCaServer(port=0)
+        server_context = self.server.run_in_thread()
+        server_context.__enter__()
+        self.addCleanup(server_context.__exit__, None, None, None)
+
+        # Allow the access token to be sent to the plain HTTP stand-in server
+        env_patcher = mock.patch.dict(
+            os.environ, {"OAUTHLIB_INSECURE_TRANSPORT": "1"}
+        )
+        env_patcher.start()
+        self.addCleanup(env_patcher.stop)
+
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.tmp_dir = tmp_dir.name
+        self.pem_out_filepath = os.path.join(self.tmp_dir, "credentials.pem")
+        self.socket_path = os.path.join(self.tmp_dir, "credentials.sock")
+        self.tok_filepath = os.path.join(self.tmp_dir, "token.json")
+        with open(self.tok_filepath, "w") as tok_file:
+            json.dump({"access_token": "abc123", "token_type": "Bearer"}, tok_file)
+
+    def _create_agent(self, **kwargs):
+        onlineca_client = OnlineCaClient()
+        onlineca_client.key_type = OnlineCaClient.KEY_TYPE_EC_P256
+        self.addCleanup(onlineca_client.close)
+
+        kwargs.setdefault("tok_filepath", self.tok_filepath)
+        return CredentialAgent(
+            onlineca_client,
+            self.server.certificate_url,
+            self.pem_out_filepath,
+            **kwargs,
+        )
+
+    def _wait_for(self, condition, timeout=10.0):
+        timeout_time = time.monotonic() + timeout
+        while not condition():
+            self.assertLess(time.monotonic(), timeout_time, "Timed out waiting")
+            time.sleep(0.01)
+
+    def test01_renew_time(self):
+        with self.assertRaises(CredentialAgentError):
+            self._create_agent(renew_fraction=1.5)
+
+        agent = self._create_agent(renew_fraction=0.5, jitter_fraction=0.0)
+        self.assertEqual(agent.get_renew_time(1000.0, 2000.0), 1500.0)
+
+        # Jitter spreads renewal times within the set fraction of the lifetime
+        agent = self._create_agent(renew_fraction=0.5, jitter_fraction=0.1)
+        renew_times = [agent.get_renew_time(1000.0, 2000.0) for _ in range(100)]
+        self.assertTrue(all(1400.0 <= t <= 1600.0 for t in renew_times))
+        self.assertGreater(len(set(renew_times)), 1)
+
+    def test02_renew(self):
+        agent = self._create_agent(renew_fraction=0.25, jitter_fraction=0.0)
+        delay = agent.renew()
+
+        with open(self.pem_out_filepath, "rb") as pem_out_file:
+            credential = pem_out_file.read()
+
+        self.assertEqual(credential, agent.credential)
+        self.assertEqual(stat.S_IMODE(os.stat(self.pem_out_filepath).st_mode), 0o600)
+
+        cert = crypto.load_certificate(crypto.FILETYPE_PEM, credential)
+        not_before = asn1_time_to_timestamp(cert.get_notBefore())
+        self.assertEqual(agent.not_after, asn1_time_to_timestamp(cert.get_notAfter()))
+
+        expected_delay = (
+            not_before + (agent.not_after - not_before) * 0.25 - time.time()
+        )
+        self.assertAlmostEqual(delay, expected_delay, delta=5.0)
+
+    def test03_socket(self):
+        agent = self._create_agent(socket_path=self.socket_path)
+        agent.start_socket_server()
+        try:
+            self.assertEqual(
+                stat.S_IMODE(os.stat(self.socket_path).st_mode) & 0o077, 0
+            )
+
+            # Nothing to serve until the credential has been obtained
+            with self.assertRaises(CredentialAgentError):
+                get_credential_from_agent(self.socket_path)
+
+            agent.renew()
+            self.assertEqual(
+                get_credential_from_agent(self.socket_path), agent.credential
+            )
+        finally:
+            agent.stop()
+
+        self.assertFalse(os.path.exists(self.socket_path))
+
+    @unittest.skipUnless(
+        threading.current_thread() is threading.main_thread(),
+        "Signal handlers can only be set from the main thread",
+    )
+    def test04_stop_on_sigterm(self):
+        sigterm_handler_original = signal.getsignal(signal.SIGTERM)
+        agent = self._create_agent(socket_path=self.socket_path)
+
+        def send_sigterm():
+            self._wait_for(lambda: agent.credential is not None)
+            os.kill(os.getpid(), signal.SIGTERM)
+
+        sender = threading.Thread(target=send_sigterm)
+        sender.start()
+        agent.run()
+        sender.join()
+
+        self.assertTrue(os.path.isfile(self.pem_out_filepath))
+        self.assertFalse(os.path.exists(self.socket_path))
+        self.assertIs(signal.getsignal(signal.SIGTERM), sigterm_handler_original)
+
+    def test05_retry_failed_renewal(self):
+        agent = self._create_agent(
+            tok_filepath=os.path.join(self.tmp_dir, "missing.json"),
+            retry_interval=0.01,
+        )
+        with mock.patch.object(agent, "renew", wraps=agent.renew) as renew:
+            # Run off the main thread where no signal handler is installed
+            runner = threading.Thread(target=agent.run)
+            runner.start()
+            self._wait_for(lambda: renew.call_count >= 3)
+            agent.stop()
+            runner.join(10.0)
+
+        self.assertFalse(runner.is_alive())
+        self.assertIsNone(agent.credential)
+        self.assertFalse(os.path.exists(self.pem_out_filepath))
+
+    def test06_write_file_atomic(self):
+        filepath = os.path.join(self.tmp_dir, "out.pem")
+        _write_file_atomic(filepath, b"first")
+        _write_file_atomic(filepath, b"second")
+
+        with open(filepath, "rb") as out_file:
+            self.assertEqual(out_file.read(), b"second")
+
+        self.assertEqual(stat.S_IMODE(os.stat(filepath).st_mode), 0o600)
+
+        # A failed write leaves the original file and no temporary file
+        with self.assertRaises(TypeError):
+            _write_file_atomic(filepath, "not bytes")
+
+        with open(filepath, "rb") as out_file:
+            self.assertEqual(out_file.read(), b"second")
+
+        self.assertEqual(sorted(os.listdir(self.tmp_dir)), ["out.pem", "token.json"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+"""Online CA service client - benchmark suite unit tests
+
+Contrail Project
+"""
+__author__ = "P J Kershaw"
+__date__ = "16/10/26"
+__copyright__ = "Copyright 2026 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level directory"
+__contact__ = "Philip.Kershaw@stfc.ac.uk"
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from contrail.security.onlineca.client.test.benchmark import suite
+
+
+class BenchmarkSuiteTestCase(unittest.TestCase):
+    """Test benchmark suite runner, results file output and comparison with
+    a baseline"""
+
+    # Skip RSA key generation to keep tests fast
+    PATTERNS = ["*ec-p256*", "parse_*", "is_ca_certificate", "*oauth_tok"]
+
+    def test01_run_suite(self):
+        results = suite.run_suite(patterns=self.PATTERNS, repeat_scale=0.01)
+        self.assertIn("create_key_pair[ec-p256]", results)
+        self.assertIn("read_oauth_tok", results)
+        self.assertNotIn("create_key_pair[rsa]", results)
+        for stats in results.values():
+            self.assertGreaterEqual(stats["n"], 1)
+            self.assertLessEqual(stats["min"], stats["max"])
+
+    def test02_save_and_load_results(self):
+        results = suite.run_suite(patterns=["subject_name_*"], repeat_scale=0.01)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            results_filepath = os.path.join(tmp_dir, "results.json")
+            suite.save_results(results, results_filepath)
+            self.assertEqual(suite.load_results(results_filepath), results)
+
+    def test03_compare_results(self):
+        baseline = {
+            "a": {"min": 1.0},
+            "b": {"min": 1.0},
+            "c": {"min": 1.0},
+        }
+        results = {
+            "a": {"min": 1.1},
+            "b": {"min": 1.5},
+            "d": {"min": 1.0},
+        }
+        comparison = suite.compare_results(results, baseline, threshold=0.25)
+        self.assertEqual(sorted(comparison), ["a", "b"])
+        self.assertFalse(comparison["a"][2])
+        self.assertTrue(comparison["b"][2])
+
+    def test04_main_regression_status(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            baseline_filepath = os.path.join(tmp_dir, "baseline.json")
+            args = [
+                "-k",
+                "subject_name_parse",
+                "-s",
+                "0.01",
+                "--baseline",
+                baseline_filepath,
+            ]
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.assertEqual(suite.main(args + ["--save-baseline"]), 0)
+
+                # Make the baseline impossibly fast so that the benchmark
+                # is reported as a regression
+                baseline = suite.load_results(baseline_filepath)
+                baseline["subject_name_parse"]["min"] = 1e-12
+                suite.save_results(baseline, baseline_filepath)
+                self.assertEqual(suite.main(args + ["-b"]), 1)
+
+    def test05_main_missing_baseline(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            baseline_filepath = os.path.join(tmp_dir, "baseline.json")
+            stderr = io.StringIO()
+            with contextlib.redirect_stderr(stderr), self.assertRaises(SystemExit):
+                suite.main(["-b", "--baseline", baseline_filepath])
+
+        self.assertIn("--save-baseline", stderr.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,252 @@
+"""Online CA service client - bulk certificate issuance unit tests
+
+Contrail Project
+"""
+__author__ = "P J Kershaw"
+__date__ = "16/10/26"
+__copyright__ = "Copyright 2026 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level directory"
+__contact__ = "Philip.Kershaw@stfc.ac.uk"
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from OpenSSL import crypto
+
+from contrail.security.onlineca.client import OnlineCaClient
+from contrail.security.onlineca.client.cli import OnlineCaClientCLI
+from contrail.security.onlineca.client.test import TEST_CA_DIR
+from contrail.security.onlineca.client.test.stand_in_server import (
+    StandInOnlineCaServer,
+)
+
+
+class CertBatchTestCase(unittest.TestCase):
+    """Test issuing certificates for many identities with
+    OnlineCaClient.get_certificates and the get_cert_batch command"""
+
+    PASSWORD = "changeme"
+    N_JOBS = 6
+    MAX_WORKERS = 3
+
+    def setUp(self):
+        self.server = StandInOnlineCaServer(port=0)
+        server_context = self.server.run_in_thread()
+        server_context.__enter__()
+        self.addCleanup(server_context.__exit__, None, None, None)
+
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(self._remove_tmp_dir)
+
+        self.onlineca_client = OnlineCaClient()
+        self.onlineca_client.key_type = OnlineCaClient.KEY_TYPE_EC_P256
+        self.addCleanup(self.onlineca_client.close)
+
+    def _remove_tmp_dir(self):
+        for file_name in os.listdir(self.tmp_dir):
+            os.unlink(os.path.join(self.tmp_dir, file_name))
+        os.rmdir(self.tmp_dir)
+
+    def _write_tok_file(self):
+        tok_filepath = os.path.join(self.tmp_dir, "token.json")
+        with open(tok_filepath, "w") as tok_file:
+            json.dump({"access_token": "abc123", "token_type": "Bearer"}, tok_file)
+
+        return tok_filepath
+
+    def _get_certificates(self, jobs):
+        return list(
+            self.onlineca_client.get_certificates(
+                jobs, self.server.certificate_url, max_workers=self.MAX_WORKERS
+            )
+        )
+
+    def test01_get_certificates(self):
+        jobs = [
+            (f"user{i}", self.PASSWORD, os.path.join(self.tmp_dir, f"user{i}.pem"))
+            for i in range(self.N_JOBS)
+        ]
+        results = self._get_certificates(iter(jobs))
+
+        # Results are in order of completion but each carries its own job
+        self.assertEqual(sorted(result.job for result in results), jobs)
+        for result in results:
+            self.assertIsNone(result.error)
+            username, _, pem_out_filepath = result.job
+            self.assertEqual(result.certs[0].get_subject().CN, username)
+            with open(pem_out_filepath, "rb") as pem_out_file:
+                cert = crypto.load_certificate(crypto.FILETYPE_PEM, pem_out_file.read())
+            self.assertEqual(cert.get_subject().CN, username)
+
+        self.assertEqual(self.server.n_requests, self.N_JOBS)
+
+    def test02_failing_jobs(self):
+        def fail_to_read_token():
+            raise IOError("No such token file")
+
+        tok_filepath = self._write_tok_file()
+        jobs = [
+            ("user0", self.PASSWORD, None),
+            None,
+            ("user1", fail_to_read_token, None),
+            ("user2", lambda: OnlineCaClient.read_oauth_tok(tok_filepath), None),
+            ("user3", self.PASSWORD, None),
+        ]
+        # Allow the access token to be sent to the plain HTTP stand-in server
+        with mock.patch.dict(os.environ, {"OAUTHLIB_INSECURE_TRANSPORT": "1"}):
+            results = {
+                result.job[0] if result.job else None: result
+                for result in self._get_certificates(jobs)
+            }
+
+        # A failing job doesn't stop the jobs after it
+        self.assertEqual(len(results), len(jobs))
+        self.assertIsInstance(results[None].error, TypeError)
+        self.assertIsInstance(results["user1"].error, IOError)
+        for username in ("user0", "user3"):
+            self.assertEqual(results[username].certs[0].get_subject().CN, username)
+
+        # Token jobs are identified by username only
+        self.assertEqual(
+            results["user2"].certs[0].get_subject().CN,
+            StandInOnlineCaServer.DEF_USERNAME,
+        )
+        self.assertEqual(self.server.n_requests, 3)
+
+    def test03_jobs_iterator_error(self):
+        def generate_jobs():
+            yield ("user0", self.PASSWORD, None)
+            yield ("user1", self.PASSWORD, None)
+            raise ValueError("Error reading jobs")
+
+        results = []
+        with self.assertRaises(ValueError):
+            for result in self.onlineca_client.get_certificates(
+                generate_jobs(), self.server.certificate_url
+            ):
+                results.append(result)
+
+        # Jobs already read are completed before the error is raised
+        self.assertEqual(
+            sorted(result.job[0] for result in results), ["user0", "user1"]
+        )
+        self.assertTrue(all(result.error is None for result in results))
+
+    def test04_read_cert_batch_jobs(self):
+        tok_filepath = self._write_tok_file()
+        batch_file = io.StringIO(
+            json.dumps({"username": "user0", "password": self.PASSWORD, "out": ""})
+            + "\n{not JSON\n\n"
+            + json.dumps(["user1"])
+            + "\n"
+            + json.dumps({"username": "user2", "token": tok_filepath})
+            + "\n"
+            + json.dumps({"username": "user3", "token": "/no/such/token.json"})
+            + "\n"
+            + json.dumps({"password": self.PASSWORD})
+            + "\n"
+        )
+        jobs = list(
+            OnlineCaClientCLI._read_cert_batch_jobs(
+                batch_file, OnlineCaClientCLI.BATCH_FORMAT_JSONL
+            )
+        )
+
+        self.assertEqual(
+            [job[0] for job in jobs],
+            ["user0", "line 2", "line 4", "user2", "user3", "line 7"],
+        )
+        self.assertEqual(jobs[0], ("user0", self.PASSWORD, None))
+
+        # Errors are deferred until the job is run
+        for job in jobs[1:3] + jobs[5:]:
+            with self.assertRaises(ValueError):
+                job[1]()
+
+        self.assertEqual(jobs[3][1]()["access_token"], "abc123")
+        with self.assertRaises(IOError):
+            jobs[4][1]()
+
+    def test05_read_cert_batch_jobs_csv(self):
+        batch_file = io.StringIO(
+            "username,password,out\n"
+            f"user0,{self.PASSWORD},\n"
+            f"user1,{self.PASSWORD},user1.pem\n"
+        )
+        jobs = list(
+            OnlineCaClientCLI._read_cert_batch_jobs(
+                batch_file, OnlineCaClientCLI.BATCH_FORMAT_CSV
+            )
+        )
+        self.assertEqual(
+            jobs,
+            [("user0", self.PASSWORD, None), ("user1", self.PASSWORD, "user1.pem")],
+        )
+
+    def test06_read_cert_batch_jobs_csv_invalid_rows(self):
+        batch_file = io.StringIO(
+            "username,password,out\n"
+            f"user0,{self.PASSWORD}\n"
+            ",,\n"
+            "\n"
+            f"user1,{self.PASSWORD},user1.pem,extra\n"
+            f"user2,{self.PASSWORD},user2.pem\n"
+        )
+        jobs = list(
+            OnlineCaClientCLI._read_cert_batch_jobs(
+                batch_file, OnlineCaClientCLI.BATCH_FORMAT_CSV
+            )
+        )
+
+        # Blank lines are skipped. Other invalid rows give jobs which fail
+        # when run, identified by line number
+        self.assertEqual(
+            [job[0] for job in jobs], ["line 2", "line 3", "line 5", "user2"]
+        )
+        for job in jobs[:3]:
+            with self.assertRaisesRegex(ValueError, "^Invalid job record: "):
+                job[1]()
+
+        self.assertEqual(jobs[3], ("user2", self.PASSWORD, "user2.pem"))
+
+    def test07_get_cert_batch_cmd(self):
+        batch_filepath = os.path.join(self.tmp_dir, "jobs.jsonl")
+        pem_out_filepath = os.path.join(self.tmp_dir, "user0.pem")
+        with open(batch_filepath, "w") as batch_file:
+            for record in (
+                {"username": "user0", "password": self.PASSWORD},
+                {"username": "user1", "token": "/no/such/token.json"},
+            ):
+                record["out"] = os.path.join(self.tmp_dir, f"{record['username']}.pem")
+                batch_file.write(json.dumps(record) + "\n")
+            batch_file.write("{not JSON\n")
+
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            with self.assertRaises(SystemExit):
+                OnlineCaClientCLI().main(
+                    OnlineCaClientCLI.GET_CERT_BATCH_CMD,
+                    "-s",
+                    self.server.certificate_url,
+                    "-i",
+                    batch_filepath,
+                    "-c",
+                    TEST_CA_DIR,
+                    "-k",
+                    OnlineCaClient.KEY_TYPE_EC_P256,
+                )
+
+        self.assertEqual(stdout.getvalue(), f"user0: issued {pem_out_filepath}\n")
+        self.assertIn("user1: error:", stderr.getvalue())
+        self.assertIn("line 3: error: Invalid job record", stderr.getvalue())
+        self.assertIn("2 of 3 certificate requests failed", stderr.getvalue())
+        self.assertTrue(os.path.isfile(pem_out_filepath))
+
+
+if __name__ == "__main__":
+    unittest.main()
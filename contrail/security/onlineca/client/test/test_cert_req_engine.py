@@ -0,0 +1,124 @@
+"""Online CA service client - parallel key pair and certificate request
+generation unit tests
+
+Contrail Project
+"""
+__author__ = "P J Kershaw"
+__date__ = "16/10/26"
+__copyright__ = "Copyright 2026 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level directory"
+__contact__ = "Philip.Kershaw@stfc.ac.uk"
+import unittest
+
+from OpenSSL import crypto
+from cryptography import x509
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+
+from contrail.security.onlineca.client import OnlineCaClient
+from contrail.security.onlineca.client.cert_req_engine import CertReqEngine
+
+
+class CertReqEngineTestCase(unittest.TestCase):
+    """Test generation of key pairs and certificate requests over a pool of
+    worker processes"""
+
+    # Smaller RSA keys to keep tests fast
+    N_BITS_FOR_KEY = 1024
+    MAX_WORKERS = 2
+
+    def _assert_cert_req_matches(self, key_pair, cert_req):
+        if isinstance(key_pair, crypto.PKey):
+            key_pair = key_pair.to_cryptography_key()
+
+        csr = x509.load_pem_x509_csr(cert_req)
+        self.assertTrue(csr.is_signature_valid)
+        self.assertEqual(
+            csr.public_key().public_bytes(
+                serialization.Encoding.DER,
+                serialization.PublicFormat.SubjectPublicKeyInfo,
+            ),
+            key_pair.public_key().public_bytes(
+                serialization.Encoding.DER,
+                serialization.PublicFormat.SubjectPublicKeyInfo,
+            ),
+        )
+
+    def test01_generate(self):
+        n_items = 5
+        with CertReqEngine(
+            max_workers=self.MAX_WORKERS, n_bits_for_key=self.N_BITS_FOR_KEY
+        ) as engine:
+            results = list(engine.generate(n_items))
+
+        self.assertEqual(len(results), n_items)
+        for key_pair, cert_req in results:
+            self.assertIsInstance(key_pair, crypto.PKey)
+            self.assertEqual(key_pair.bits(), self.N_BITS_FOR_KEY)
+            self._assert_cert_req_matches(key_pair, cert_req)
+
+        # Each item has its own key pair
+        self.assertEqual(len({cert_req for _, cert_req in results}), n_items)
+
+    def test02_key_types(self):
+        with CertReqEngine(
+            max_workers=self.MAX_WORKERS, n_bits_for_key=self.N_BITS_FOR_KEY
+        ) as engine:
+            for key_type in OnlineCaClient.KEY_TYPES:
+                with self.subTest(key_type=key_type):
+                    engine.key_type = key_type
+                    ((key_pair, cert_req),) = engine.generate(1)
+                    self._assert_cert_req_matches(key_pair, cert_req)
+
+                    # Key pair object is rebuilt in the parent from the same
+                    # algorithm create_key_pair uses for the key type
+                    expected_key_pair = OnlineCaClient.create_key_pair(
+                        n_bits_for_key=self.N_BITS_FOR_KEY, key_type=key_type
+                    )
+                    self.assertEqual(key_pair.type(), expected_key_pair.type())
+
+    def test03_generate_nothing(self):
+        with CertReqEngine(max_workers=1) as engine:
+            self.assertEqual(list(engine.generate(0)), [])
+
+    def test04_close_early_and_shutdown(self):
+        engine = CertReqEngine(
+            max_workers=self.MAX_WORKERS, n_bits_for_key=self.N_BITS_FOR_KEY
+        )
+        results = engine.generate(100)
+        key_pair, cert_req = next(results)
+        self._assert_cert_req_matches(key_pair, cert_req)
+
+        # Closing the generator cancels jobs not yet started but leaves the
+        # engine usable
+        results.close()
+        self.assertEqual(len(list(engine.generate(2))), 2)
+
+        engine.shutdown()
+        self.assertIsNone(engine._executor)
+
+        # Shut down is idempotent and the engine restarts on demand
+        engine.shutdown()
+        self.assertEqual(len(list(engine.generate(1))), 1)
+        engine.shutdown()
+
+    def test05_crypto_backends(self):
+        key_pair_classes = {
+            OnlineCaClient.CRYPTO_BACKEND_PYOPENSSL: crypto.PKey,
+            OnlineCaClient.CRYPTO_BACKEND_CRYPTOGRAPHY: ec.EllipticCurvePrivateKey,
+        }
+        for crypto_backend, key_pair_class in key_pair_classes.items():
+            with self.subTest(crypto_backend=crypto_backend):
+                with CertReqEngine(
+                    max_workers=1,
+                    key_type=OnlineCaClient.KEY_TYPE_EC_P256,
+                    crypto_backend=crypto_backend,
+                ) as engine:
+                    ((key_pair, cert_req),) = engine.generate(1)
+
+                self.assertIsInstance(key_pair, key_pair_class)
+                self._assert_cert_req_matches(key_pair, cert_req)
+
+
+if __name__ == "__main__":
+    unittest.main()
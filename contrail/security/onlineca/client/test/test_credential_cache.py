@@ -0,0 +1,157 @@
+"""Online CA service client - credential cache unit tests
+
+Contrail Project
+"""
+__author__ = "P J Kershaw"
+__date__ = "16/10/26"
+__copyright__ = "Copyright 2026 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level directory"
+__contact__ = "Philip.Kershaw@stfc.ac.uk"
+import datetime
+import os
+import stat
+import tempfile
+import unittest
+
+from contrail.security.onlineca.client import OnlineCaClient
+from contrail.security.onlineca.client.credential_cache import CredentialCache
+from contrail.security.onlineca.client.test.stand_in_server import (
+    StandInOnlineCaServer,
+)
+
+
+class CredentialCacheTestCase(unittest.TestCase):
+    """Test re-use of issued credentials from memory and from the output
+    file"""
+
+    USERNAME = "testuser"
+    PASSWORD = "changeme"
+
+    def setUp(self):
+        self.server = StandInOnlineCaServer(port=0)
+        server_context = self.server.run_in_thread()
+        server_context.__enter__()
+        self.addCleanup(server_context.__exit__, None, None, None)
+
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.pem_out_filepath = os.path.join(tmp_dir.name, "credentials.pem")
+
+    def _create_client(self, **kwargs):
+        onlineca_client = OnlineCaClient()
+        onlineca_client.key_type = OnlineCaClient.KEY_TYPE_EC_P256
+        onlineca_client.credential_cache = CredentialCache(**kwargs)
+        self.addCleanup(onlineca_client.close)
+        return onlineca_client
+
+    def _get_certificate(self, onlineca_client, password=PASSWORD, **kwargs):
+        return onlineca_client.get_certificate(
+            self.USERNAME, password, self.server.certificate_url, **kwargs
+        )
+
+    def test01_memory_hit(self):
+        onlineca_client = self._create_client()
+        key_pair, certs = self._get_certificate(onlineca_client)
+        cached_key_pair, cached_certs = self._get_certificate(onlineca_client)
+
+        self.assertIs(cached_key_pair, key_pair)
+        self.assertEqual(cached_certs, certs)
+        self.assertEqual(self.server.n_requests, 1)
+        self.assertEqual(onlineca_client.credential_cache.hits, 1)
+        self.assertEqual(onlineca_client.credential_cache.misses, 1)
+
+    def test02_file_hit(self):
+        key_pair, certs = self._get_certificate(
+            self._create_client(), pem_out_filepath=self.pem_out_filepath
+        )
+        metadata_filepath = self.pem_out_filepath + ".cache.json"
+        with open(metadata_filepath) as metadata_file:
+            self.assertNotIn(self.PASSWORD, metadata_file.read())
+
+        self.assertEqual(stat.S_IMODE(os.stat(metadata_filepath).st_mode), 0o600)
+
+        # A new client, as in a new process, re-uses the credential in the file
+        onlineca_client = self._create_client()
+        for _ in range(2):
+            cached_key_pair, cached_certs = self._get_certificate(
+                onlineca_client, pem_out_filepath=self.pem_out_filepath
+            )
+            self.assertEqual(
+                cached_certs[0].digest("sha256"), certs[0].digest("sha256")
+            )
+
+        self.assertEqual(self.server.n_requests, 1)
+        self.assertEqual(onlineca_client.credential_cache.hits, 2)
+
+        # Credential from a different server isn't re-used
+        onlineca_client.get_certificate(
+            self.USERNAME,
+            self.PASSWORD,
+            self.server.certificate_url + "?other",
+            pem_out_filepath=self.pem_out_filepath,
+        )
+        self.assertEqual(self.server.n_requests, 2)
+
+    def test03_wrong_password(self):
+        onlineca_client = self._create_client()
+        for kwargs in ({}, {"pem_out_filepath": self.pem_out_filepath}):
+            with self.subTest(**kwargs):
+                n_requests = self.server.n_requests
+                key_pair, certs = self._get_certificate(onlineca_client, **kwargs)
+
+                # The credential isn't returned for a different password
+                other_key_pair, other_certs = self._get_certificate(
+                    onlineca_client, password="wrong", **kwargs
+                )
+                self.assertIsNot(other_key_pair, key_pair)
+                self.assertEqual(self.server.n_requests, n_requests + 2)
+
+        # Nor by a new client reading the file
+        self._get_certificate(
+            self._create_client(),
+            password="also wrong",
+            pem_out_filepath=self.pem_out_filepath,
+        )
+        self.assertEqual(self.server.n_requests, 5)
+
+    def test04_min_remaining_lifetime(self):
+        self.server.cert_lifetime = datetime.timedelta(hours=1)
+        onlineca_client = self._create_client(min_remaining_lifetime=7200)
+        for _ in range(2):
+            self._get_certificate(
+                onlineca_client, pem_out_filepath=self.pem_out_filepath
+            )
+
+        self.assertEqual(self.server.n_requests, 2)
+        self.assertEqual(onlineca_client.credential_cache.hits, 0)
+
+        onlineca_client.credential_cache.min_remaining_lifetime = 1800
+        self._get_certificate(onlineca_client, pem_out_filepath=self.pem_out_filepath)
+        self.assertEqual(self.server.n_requests, 2)
+
+    def test05_file_replaced(self):
+        self._get_certificate(
+            self._create_client(), pem_out_filepath=self.pem_out_filepath
+        )
+
+        # Output file is overwritten by another client without a cache. Its
+        # metadata no longer matches the credential so it isn't re-used
+        other_client = OnlineCaClient()
+        other_client.key_type = OnlineCaClient.KEY_TYPE_EC_P256
+        self.addCleanup(other_client.close)
+        other_client.get_certificate(
+            "otheruser",
+            self.PASSWORD,
+            self.server.certificate_url,
+            pem_out_filepath=self.pem_out_filepath,
+        )
+
+        key_pair, certs = self._get_certificate(
+            self._create_client(), pem_out_filepath=self.pem_out_filepath
+        )
+        self.assertEqual(certs[0].get_subject().CN, self.USERNAME)
+        self.assertEqual(self.server.n_requests, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+"""Online CA service client - HTTP connection pooling unit tests
+
+Contrail Project
+"""
+__author__ = "P J Kershaw"
+__date__ = "16/10/26"
+__copyright__ = "Copyright 2026 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level directory"
+__contact__ = "Philip.Kershaw@stfc.ac.uk"
+import os
+import shutil
+import tempfile
+import unittest
+
+import requests
+
+from contrail.security.onlineca.client import OnlineCaClient
+from contrail.security.onlineca.client.test import TEST_CA_DIR
+from contrail.security.onlineca.client.test.stand_in_server import (
+    StandInOnlineCaServer,
+)
+
+
+class HttpPoolTestCase(unittest.TestCase):
+    """Test connection pools shared by the sessions an OnlineCaClient creates"""
+
+    USERNAME = "testuser"
+    PASSWORD = "changeme"
+
+    def _create_client(self):
+        onlineca_client = OnlineCaClient()
+        onlineca_client.key_type = OnlineCaClient.KEY_TYPE_EC_P256
+        onlineca_client.ca_cert_dir = TEST_CA_DIR
+        return onlineca_client
+
+    def _get_certificate(self, onlineca_client, server):
+        return onlineca_client.get_certificate(
+            self.USERNAME, self.PASSWORD, server.certificate_url
+        )
+
+    @staticmethod
+    def _get_pools(onlineca_client, verify):
+        return onlineca_client.http_adapter.get_adapter(verify).poolmanager.pools
+
+    def test01_pool_reuse(self):
+        server = StandInOnlineCaServer(port=0)
+        with server.run_in_thread(), self._create_client() as onlineca_client:
+            for _ in range(3):
+                self._get_certificate(onlineca_client, server)
+
+            # All calls are made over a single connection held in one pool
+            pools = self._get_pools(onlineca_client, TEST_CA_DIR)
+            (pool_key,) = pools.keys()
+            self.assertEqual(pools[pool_key].num_connections, 1)
+
+        self.assertEqual(server.n_requests, 3)
+
+    def test02_close(self):
+        server = StandInOnlineCaServer(port=0)
+        with server.run_in_thread():
+            onlineca_client = self._create_client()
+            self._get_certificate(onlineca_client, server)
+            adapter = onlineca_client.http_adapter.get_adapter(TEST_CA_DIR)
+            self.assertEqual(len(adapter.poolmanager.pools), 1)
+
+            onlineca_client.close()
+            self.assertEqual(len(adapter.poolmanager.pools), 0)
+
+            # A closed client opens new connections on demand
+            self._get_certificate(onlineca_client, server)
+            self.assertEqual(len(self._get_pools(onlineca_client, TEST_CA_DIR)), 1)
+            onlineca_client.close()
+
+        self.assertEqual(server.n_requests, 2)
+
+    def test03_context_manager(self):
+        server = StandInOnlineCaServer(port=0)
+        with server.run_in_thread():
+            with self._create_client() as onlineca_client:
+                self._get_certificate(onlineca_client, server)
+                adapter = onlineca_client.http_adapter.get_adapter(TEST_CA_DIR)
+                self.assertEqual(len(adapter.poolmanager.pools), 1)
+
+            self.assertEqual(len(adapter.poolmanager.pools), 0)
+
+    def test04_separate_pools_for_verify_settings(self):
+        server = StandInOnlineCaServer(port=0, use_tls=True)
+        with server.run_in_thread(), tempfile.TemporaryDirectory() as tmp_dir:
+            # CA directory doesn't hold the server's CA certificate
+            ca_cert_dir = os.path.join(tmp_dir, "ca")
+            shutil.copytree(TEST_CA_DIR, ca_cert_dir)
+
+            with self._create_client() as onlineca_client:
+                onlineca_client.ca_cert_dir = ca_cert_dir
+
+                # Trust roots are bootstrapped over an unverified connection
+                onlineca_client.get_trustroots(server.trustroots_url, bootstrap=True)
+                self.assertEqual(len(self._get_pools(onlineca_client, False)), 1)
+
+                # The unverified connection mustn't be re-used for a call which
+                # verifies the server
+                with self.assertRaises(requests.exceptions.SSLError):
+                    self._get_certificate(onlineca_client, server)
+
+                self.assertIsNot(
+                    onlineca_client.http_adapter.get_adapter(False),
+                    onlineca_client.http_adapter.get_adapter(ca_cert_dir),
+                )
+
+        self.assertEqual(server.n_requests, 1)
+
+    def test05_ssl_context_used(self):
+        server = StandInOnlineCaServer(port=0, use_tls=True)
+        with server.run_in_thread(), tempfile.TemporaryDirectory() as tmp_dir:
+            ca_cert_dir = os.path.join(tmp_dir, "ca")
+            os.makedirs(ca_cert_dir)
+            ca_cert_filepath = server.write_ca_cert(ca_cert_dir)
+
+            with self._create_client() as onlineca_client:
+                onlineca_client.ca_cert_dir = ca_cert_dir
+                ssl_context = onlineca_client.ssl_context
+
+                # The server's CA certificate is now held in the SSL context
+                # only. The call fails if it's verified against the directory
+                os.unlink(ca_cert_filepath)
+                key_pair, certs = self._get_certificate(onlineca_client, server)
+
+                pools = self._get_pools(onlineca_client, ca_cert_dir)
+                (pool_key,) = pools.keys()
+                self.assertIs(pools[pool_key].conn_kw["ssl_context"], ssl_context)
+
+        self.assertEqual(certs[0].get_subject().CN, self.USERNAME)
+
+
+if __name__ == "__main__":
+    unittest.main()
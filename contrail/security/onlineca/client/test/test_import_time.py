@@ -0,0 +1,41 @@
+"""Online CA service client - import time unit tests
+
+Contrail Project
+"""
+__author__ = "P J Kershaw"
+__date__ = "16/10/26"
+__copyright__ = "Copyright 2026 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level directory"
+__contact__ = "Philip.Kershaw@stfc.ac.uk"
+import unittest
+
+from contrail.security.onlineca.client.test.benchmark.bench_import_time import (
+    CLI_MODULE_NAME,
+    get_imported_modules,
+)
+
+
+class ImportTimeTestCase(unittest.TestCase):
+    """Check that command line client start-up isn't slowed by modules needed
+    by a few sub-commands only. The import time itself is measured by the
+    bench_import_time benchmark"""
+
+    LAZY_MODULE_NAMES = (
+        "requests_oauthlib",
+        "oauthlib",
+        "uvicorn",
+        "yaml",
+        "webbrowser",
+        "aiohttp",
+        "asn1crypto",
+        "contrail.security.onlineca.client.agent",
+    )
+
+    def test01_lazy_imports(self):
+        imported_module_names = get_imported_modules(CLI_MODULE_NAME)
+        for module_name in self.__class__.LAZY_MODULE_NAMES:
+            self.assertNotIn(module_name, imported_module_names)
+
+
+if __name__ == "__main__":
+    unittest.main()
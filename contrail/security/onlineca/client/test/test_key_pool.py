@@ -0,0 +1,117 @@
+"""Online CA service client - key pair pool unit tests
+
+Contrail Project
+"""
+__author__ = "P J Kershaw"
+__date__ = "16/10/26"
+__copyright__ = "Copyright 2026 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level directory"
+__contact__ = "Philip.Kershaw@stfc.ac.uk"
+import time
+import unittest
+
+from cryptography.hazmat.primitives.asymmetric import ec
+from OpenSSL import crypto
+
+from contrail.security.onlineca.client import (
+    OnlineCaClient,
+    OnlineCaClientError,
+)
+from contrail.security.onlineca.client.key_pool import (
+    KeyPairPool,
+    KeyPairPoolError,
+)
+
+
+class KeyPairPoolTestCase(unittest.TestCase):
+    """Test pool of pre-generated key pairs"""
+
+    # Small keys keep the tests quick
+    N_BITS = 1024
+    FILL_TIMEOUT = 30.0
+
+    @classmethod
+    def _create_key_pair(cls):
+        return OnlineCaClient.create_key_pair(n_bits_for_key=cls.N_BITS)
+
+    def _wait_for_size(self, pool, size):
+        timeout = time.monotonic() + self.__class__.FILL_TIMEOUT
+        while len(pool) < size:
+            self.assertLess(time.monotonic(), timeout, "Timed out filling pool")
+            time.sleep(0.01)
+
+    def test01_invalid_watermarks(self):
+        with self.assertRaises(KeyPairPoolError):
+            KeyPairPool(self._create_key_pair, low_watermark=4, high_watermark=2)
+
+        with self.assertRaises(KeyPairPoolError):
+            KeyPairPool(self._create_key_pair, low_watermark=0, high_watermark=0)
+
+    def test02_miss_when_not_started(self):
+        pool = KeyPairPool(self._create_key_pair)
+        key_pair = pool.get()
+
+        self.assertIsInstance(key_pair, crypto.PKey)
+        self.assertEqual(pool.stats["misses"], 1)
+        self.assertEqual(pool.stats["hits"], 0)
+
+    def test03_fill_and_refill(self):
+        with KeyPairPool(
+            self._create_key_pair, low_watermark=2, high_watermark=4, n_workers=2
+        ) as pool:
+            self._wait_for_size(pool, 4)
+            self.assertEqual(pool.stats["refills"], 4)
+
+            for _ in range(3):
+                self.assertIsInstance(pool.get(), crypto.PKey)
+
+            self.assertEqual(pool.stats["hits"], 3)
+
+            # Dropping below the low watermark triggers a refill
+            self._wait_for_size(pool, 4)
+            self.assertEqual(pool.stats["refills"], 7)
+
+        self.assertFalse(pool.running)
+
+    def test04_client_uses_pool(self):
+        onlineca_client = OnlineCaClient()
+        with self.assertRaises(TypeError):
+            onlineca_client.key_pair_pool = object()
+
+        pool = KeyPairPool(self._create_key_pair)
+        onlineca_client.key_pair_pool = pool
+        self.assertIs(onlineca_client.key_pair_pool, pool)
+
+    def test05_key_type_and_crypto_backend(self):
+        with self.assertRaises(KeyPairPoolError):
+            KeyPairPool(key_type="dsa")
+
+        with self.assertRaises(KeyPairPoolError):
+            KeyPairPool(crypto_backend="nss")
+
+        pool = KeyPairPool(
+            key_type=OnlineCaClient.KEY_TYPE_EC_P256,
+            crypto_backend=OnlineCaClient.CRYPTO_BACKEND_CRYPTOGRAPHY,
+        )
+        key_pair = pool.get()
+        self.assertIsInstance(key_pair, ec.EllipticCurvePrivateKey)
+
+        onlineca_client = OnlineCaClient()
+        onlineca_client.key_pair_pool = pool
+
+        # Client settings don't match the pool
+        with self.assertRaises(OnlineCaClientError):
+            onlineca_client._create_key_pair_and_cert_req()
+
+        onlineca_client.key_type = OnlineCaClient.KEY_TYPE_EC_P256
+        with self.assertRaises(OnlineCaClientError):
+            onlineca_client._create_key_pair_and_cert_req()
+
+        onlineca_client.crypto_backend = OnlineCaClient.CRYPTO_BACKEND_CRYPTOGRAPHY
+        key_pair, cert_req = onlineca_client._create_key_pair_and_cert_req()
+        self.assertIsInstance(key_pair, ec.EllipticCurvePrivateKey)
+        self.assertEqual(pool.stats["misses"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+"""Online CA service client - key type unit tests
+
+Contrail Project
+"""
+__author__ = "P J Kershaw"
+__date__ = "16/10/26"
+__copyright__ = "Copyright 2026 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level directory"
+__contact__ = "Philip.Kershaw@stfc.ac.uk"
+import unittest
+
+from cryptography import x509
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+from contrail.security.onlineca.client import (
+    OnlineCaClient,
+    OnlineCaClientError,
+)
+from contrail.security.onlineca.client.key_pool import KeyPairPool
+from contrail.security.onlineca.client.test.stand_in_server import (
+    StandInOnlineCaServer,
+)
+
+
+class KeyTypesTestCase(unittest.TestCase):
+    """Test key pairs and certificate requests for each supported key type"""
+
+    # Smaller RSA keys to keep tests fast
+    N_BITS_FOR_KEY = 1024
+
+    USERNAME = "testuser"
+    PASSWORD = "changeme"
+
+    # Expected cryptography public key class and curve for each key type
+    PUBLIC_KEY_TYPES = {
+        OnlineCaClient.KEY_TYPE_RSA: (rsa.RSAPublicKey, None),
+        OnlineCaClient.KEY_TYPE_EC_P256: (ec.EllipticCurvePublicKey, ec.SECP256R1),
+        OnlineCaClient.KEY_TYPE_EC_P384: (ec.EllipticCurvePublicKey, ec.SECP384R1),
+        OnlineCaClient.KEY_TYPE_ED25519: (ed25519.Ed25519PublicKey, None),
+    }
+
+    def _assert_public_key_type(self, public_key, key_type):
+        public_key_class, curve_class = self.PUBLIC_KEY_TYPES[key_type]
+        self.assertIsInstance(public_key, public_key_class)
+        if curve_class is not None:
+            self.assertIsInstance(public_key.curve, curve_class)
+
+    def test01_cert_req_public_key_type(self):
+        self.assertEqual(set(self.PUBLIC_KEY_TYPES), set(OnlineCaClient.KEY_TYPES))
+        for key_type in OnlineCaClient.KEY_TYPES:
+            with self.subTest(key_type=key_type):
+                key_pair = OnlineCaClient.create_key_pair(
+                    n_bits_for_key=self.N_BITS_FOR_KEY, key_type=key_type
+                )
+                csr = x509.load_pem_x509_csr(OnlineCaClient.create_cert_req(key_pair))
+                self.assertTrue(csr.is_signature_valid)
+                self._assert_public_key_type(csr.public_key(), key_type)
+
+    def test02_invalid_key_type(self):
+        onlineca_client = OnlineCaClient()
+        with self.assertRaises(ValueError):
+            onlineca_client.key_type = "dsa"
+
+        with self.assertRaises(ValueError):
+            OnlineCaClient.create_key_pair(key_type="dsa")
+
+    def test03_get_certificate(self):
+        server = StandInOnlineCaServer(port=0)
+        with server.run_in_thread(), OnlineCaClient() as onlineca_client:
+            for key_type in (
+                OnlineCaClient.KEY_TYPE_EC_P256,
+                OnlineCaClient.KEY_TYPE_ED25519,
+            ):
+                with self.subTest(key_type=key_type):
+                    onlineca_client.key_type = key_type
+                    key_pair, certs = onlineca_client.get_certificate(
+                        self.USERNAME, self.PASSWORD, server.certificate_url
+                    )
+                    self._assert_public_key_type(
+                        certs[0].to_cryptography().public_key(), key_type
+                    )
+
+    def test04_key_pair_pool_key_type(self):
+        onlineca_client = OnlineCaClient()
+        onlineca_client.key_type = OnlineCaClient.KEY_TYPE_EC_P384
+
+        # Default pool holds RSA key pairs
+        onlineca_client.key_pair_pool = KeyPairPool()
+        with self.assertRaises(OnlineCaClientError):
+            onlineca_client._create_key_pair_and_cert_req()
+
+        onlineca_client.key_pair_pool = KeyPairPool(key_type=onlineca_client.key_type)
+        key_pair, cert_req = onlineca_client._create_key_pair_and_cert_req()
+        self._assert_public_key_type(
+            x509.load_pem_x509_csr(cert_req).public_key(),
+            OnlineCaClient.KEY_TYPE_EC_P384,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,199 @@
+"""Online CA service client - OAuth 2.0 callback listener unit tests
+
+Contrail Project
+"""
+__author__ = "P J Kershaw"
+__date__ = "16/10/26"
+__copyright__ = "Copyright 2026 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level directory"
+__contact__ = "Philip.Kershaw@stfc.ac.uk"
+import os
+import json
+import socket
+import time
+import asyncio
+import threading
+import unittest
+from unittest import mock
+from http import HTTPStatus
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+import requests
+
+from contrail.security.onlineca.client.oauth2_callback_listener import (
+    OAuthCallbackHandler,
+    OAuthCallbackListener,
+    OAuthCallbackError,
+)
+
+TOKEN = {"access_token": "abc123", "token_type": "Bearer", "expires_in": 3600}
+
+
+class _TokenRequestHandler(BaseHTTPRequestHandler):
+    """Stand-in for Authorisation Server token endpoint"""
+
+    # Delay before responding to simulate a slow token endpoint
+    delay = 0.0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        time.sleep(self.delay)
+        body = json.dumps(TOKEN).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _get_free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class OAuthCallbackListenerTestCase(unittest.TestCase):
+    """Test OAuth 2.0 callback listener against a stand-in Authorisation
+    Server"""
+
+    def setUp(self):
+        self.token_server = HTTPServer(("127.0.0.1", 0), _TokenRequestHandler)
+        threading.Thread(target=self.token_server.serve_forever, daemon=True).start()
+
+        port = _get_free_port()
+        self.settings = {
+            "client_id": "client",
+            "client_secret": "secret",
+            "authorization_base_url": "https://localhost/oauth/authorize",
+            "token_url": f"http://127.0.0.1:{self.token_server.server_port}/token",
+            "scope": "https://localhost/certificate/",
+            "start_url": f"http://127.0.0.1:{port}/",
+            "redirect_url": f"http://127.0.0.1:{port}/callback",
+        }
+
+        # Token endpoint is plain HTTP
+        os.environ["OAUTHLIB_INSECURE_TRANSPORT"] = "1"
+
+    def tearDown(self):
+        del os.environ["OAUTHLIB_INSECURE_TRANSPORT"]
+        self.token_server.shutdown()
+        self.token_server.server_close()
+
+    def _run_listener(self, make_callback_params, n_callbacks=1):
+        """Run listener simulating the browser being redirected back to it by
+        the Authorisation Server"""
+        responses = []
+        threads = []
+
+        def browser(authorization_url):
+            state = parse_qs(urlparse(authorization_url).query)["state"][0]
+
+            def redirect():
+                responses.append(
+                    requests.get(
+                        self.settings["redirect_url"],
+                        params=make_callback_params(state),
+                        timeout=5,
+                    )
+                )
+
+            for _ in range(n_callbacks):
+                threads.append(threading.Thread(target=redirect))
+                threads[-1].start()
+
+        listener = OAuthCallbackListener(self.settings, on_started=browser, timeout=5)
+        try:
+            return asyncio.run(listener.run()), responses
+        finally:
+            for thread in threads:
+                thread.join()
+
+    def test01_callback(self):
+        token, responses = self._run_listener(
+            lambda state: {"code": "xyz", "state": state}
+        )
+        self.assertEqual(token["access_token"], TOKEN["access_token"])
+        self.assertEqual(responses[0].status_code, 200)
+
+    def test02_error_response(self):
+        with self.assertRaises(OAuthCallbackError):
+            self._run_listener(lambda state: {"error": "access_denied"})
+
+    def test03_start_url_redirects(self):
+        listener = OAuthCallbackListener(
+            self.settings, on_started=lambda url: None, timeout=0.5
+        )
+
+        async def get_start_url():
+            task = asyncio.ensure_future(listener.run())
+            await asyncio.sleep(0.1)
+            res = await asyncio.get_running_loop().run_in_executor(
+                None,
+                lambda: requests.get(
+                    self.settings["start_url"], allow_redirects=False, timeout=5
+                ),
+            )
+            task.cancel()
+            return res
+
+        res = asyncio.run(get_start_url())
+        self.assertEqual(res.status_code, 302)
+        self.assertEqual(res.headers["Location"], listener.authorization_url)
+
+    def test04_concurrent_callbacks(self):
+        # Second callback arrives while the token for the first is fetched
+        with mock.patch.object(_TokenRequestHandler, "delay", 0.2):
+            token, responses = self._run_listener(
+                lambda state: {"code": "xyz", "state": state}, n_callbacks=2
+            )
+
+        self.assertEqual(token["access_token"], TOKEN["access_token"])
+        self.assertEqual(
+            sorted(response.status_code for response in responses), [200, 409]
+        )
+
+    def _handle_callback(self, handler, params):
+        request = requests.Request("GET", self.settings["redirect_url"], params=params)
+        authorization_response = request.prepare().url
+        return asyncio.run(
+            handler.handle_callback(
+                parse_qs(urlparse(authorization_response).query),
+                authorization_response,
+            )
+        )
+
+    def test05_callback_handler_invalid_state(self):
+        handler = OAuthCallbackHandler(self.settings)
+        state = parse_qs(urlparse(handler.authorization_url).query)["state"][0]
+
+        # Carry on waiting for a callback with a valid state parameter
+        status, _ = self._handle_callback(handler, {"code": "xyz", "state": "x"})
+        self.assertEqual(status, HTTPStatus.BAD_REQUEST)
+        self.assertFalse(handler.finished)
+
+        status, _ = self._handle_callback(handler, {"code": "xyz", "state": state})
+        self.assertEqual(status, HTTPStatus.OK)
+        self.assertTrue(handler.finished)
+        self.assertEqual(handler.token["access_token"], TOKEN["access_token"])
+        self.assertIsNone(handler.error)
+
+    def test06_callback_handler_error_response(self):
+        handler = OAuthCallbackHandler(self.settings)
+
+        status, _ = self._handle_callback(handler, {"error": "access_denied"})
+        self.assertEqual(status, HTTPStatus.BAD_REQUEST)
+        self.assertTrue(handler.finished)
+        self.assertIsInstance(handler.error, OAuthCallbackError)
+        self.assertIsNone(handler.token)
+
+        status, _ = self._handle_callback(handler, {"code": "xyz", "state": "x"})
+        self.assertEqual(status, HTTPStatus.CONFLICT)
+        self.assertIsNone(handler.token)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+"""Online CA service client - OAuth 2.0 settings unit tests
+
+Contrail Project
+"""
+__author__ = "P J Kershaw"
+__date__ = "16/10/26"
+__copyright__ = "Copyright 2026 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level directory"
+__contact__ = "Philip.Kershaw@stfc.ac.uk"
+import os
+import json
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from contrail.security.onlineca.client import oauth2_settings
+from contrail.security.onlineca.client.oauth2_settings import (
+    OAuthSettingsError,
+    validate_settings,
+    read_settings_file,
+    compile_settings_file,
+)
+
+SETTINGS_YAML = """\
+client_id: "client"
+client_secret: "secret"
+authorization_base_url: 'https://localhost/oauth/authorize'
+token_url: 'https://localhost/oauth/token/'
+scope: "https://localhost/certificate/"
+start_url: "http://localhost:5000/"
+redirect_url: "http://localhost:5000/callback"
+"""
+
+
+class OAuthSettingsTestCase(unittest.TestCase):
+    """Test validation and caching of OAuth settings"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.settings_filepath = os.path.join(self.tmp_dir, "idp.yaml")
+        with open(self.settings_filepath, "w") as settings_file:
+            settings_file.write(SETTINGS_YAML)
+
+        oauth2_settings.clear_settings_cache()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+        oauth2_settings.clear_settings_cache()
+
+    def _set_mtime(self, filepath, mtime):
+        os.utime(filepath, (mtime, mtime))
+
+    def test01_read_and_cache(self):
+        settings = read_settings_file(self.settings_filepath)
+        self.assertEqual(settings["client_id"], "client")
+
+        # Modifying the settings returned doesn't affect the cache
+        settings["client_id"] = "changed"
+
+        with mock.patch.object(
+            oauth2_settings, "_parse_settings_file"
+        ) as parse_settings_file:
+            settings = read_settings_file(self.settings_filepath)
+
+        parse_settings_file.assert_not_called()
+        self.assertEqual(settings["client_id"], "client")
+
+    def test02_reread_when_modified(self):
+        self._set_mtime(self.settings_filepath, 1000)
+        read_settings_file(self.settings_filepath)
+
+        with open(self.settings_filepath, "w") as settings_file:
+            settings_file.write(SETTINGS_YAML.replace('"client"', '"client2"'))
+        self._set_mtime(self.settings_filepath, 2000)
+
+        settings = read_settings_file(self.settings_filepath)
+        self.assertEqual(settings["client_id"], "client2")
+
+    def test03_compiled_settings(self):
+        self._set_mtime(self.settings_filepath, 1000)
+        compiled_filepath = compile_settings_file(self.settings_filepath)
+
+        self.assertEqual(compiled_filepath, os.path.join(self.tmp_dir, "idp.json"))
+        self.assertEqual(os.stat(compiled_filepath).st_mode & 0o777, 0o600)
+
+        with open(compiled_filepath) as compiled_file:
+            settings = json.load(compiled_file)
+        settings["client_id"] = "compiled"
+        with open(compiled_filepath, "w") as compiled_file:
+            json.dump(settings, compiled_file)
+        self._set_mtime(compiled_filepath, 2000)
+
+        # Up to date JSON version is read in preference
+        self.assertEqual(
+            read_settings_file(self.settings_filepath)["client_id"], "compiled"
+        )
+
+        # ... but not once the original is modified
+        self._set_mtime(self.settings_filepath, 3000)
+        self.assertEqual(
+            read_settings_file(self.settings_filepath)["client_id"], "client"
+        )
+
+    def test04_missing_settings(self):
+        with open(self.settings_filepath, "w") as settings_file:
+            settings_file.write('client_id: "client"\n')
+
+        with self.assertRaisesRegex(OAuthSettingsError, "'redirect_url' is missing"):
+            read_settings_file(self.settings_filepath)
+
+    def test05_invalid_settings(self):
+        settings = read_settings_file(self.settings_filepath)
+        settings["token_url"] = "localhost/oauth/token"
+        settings["client_secret"] = 1234
+
+        with self.assertRaises(OAuthSettingsError) as cm:
+            validate_settings(settings)
+
+        self.assertIn("'token_url'", str(cm.exception))
+        self.assertIn("'client_secret'", str(cm.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,158 @@
+"""Online CA service client - OAuth 2.0 web application unit tests
+
+Contrail Project
+"""
+__author__ = "P J Kershaw"
+__date__ = "16/10/26"
+__copyright__ = "Copyright 2026 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level directory"
+__contact__ = "Philip.Kershaw@stfc.ac.uk"
+import os
+import json
+import tempfile
+import threading
+import unittest
+from http.server import HTTPServer
+from unittest import mock
+from urllib.parse import urlparse, parse_qs
+
+import requests
+
+try:
+    import quart  # noqa: F401
+except ImportError:
+    quart = None
+
+from contrail.security.onlineca.client.oauth2_callback_listener import (
+    OAuthCallbackError,
+)
+from contrail.security.onlineca.client.test.test_oauth2_callback_listener import (
+    TOKEN,
+    _TokenRequestHandler,
+    _get_free_port,
+)
+
+
+@unittest.skipUnless(quart, "quart is not installed")
+class OAuth2WebAppTestCase(unittest.IsolatedAsyncioTestCase):
+    """Test OAuth 2.0 web application against a stand-in Authorisation
+    Server"""
+
+    def setUp(self):
+        from contrail.security.onlineca.client.oauth2_web_app import OAuth2WebApp
+
+        self.token_server = HTTPServer(("127.0.0.1", 0), _TokenRequestHandler)
+        threading.Thread(target=self.token_server.serve_forever, daemon=True).start()
+        self.addCleanup(self.token_server.server_close)
+        self.addCleanup(self.token_server.shutdown)
+
+        port = _get_free_port()
+        self.settings = {
+            "client_id": "client",
+            "client_secret": "secret",
+            "authorization_base_url": "https://localhost/oauth/authorize",
+            "token_url": f"http://127.0.0.1:{self.token_server.server_port}/token",
+            "scope": "https://localhost/certificate/",
+            "start_url": f"http://127.0.0.1:{port}/",
+            "redirect_url": f"http://127.0.0.1:{port}/callback",
+        }
+
+        # Token endpoint is plain HTTP
+        patcher = mock.patch.dict(os.environ, {"OAUTHLIB_INSECURE_TRANSPORT": "1"})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.tok_filepath = os.path.join(tmp_dir.name, "token.json")
+
+        self.web_app = OAuth2WebApp(
+            self.settings, __name__, tok_filepath=self.tok_filepath
+        )
+        query = parse_qs(urlparse(self.web_app.authorization_url).query)
+        self.state = query["state"][0]
+
+    async def test01_start_url_redirects(self):
+        res = await self.web_app.test_client().get("/")
+
+        self.assertEqual(res.status_code, 302)
+        self.assertEqual(res.headers["Location"], self.web_app.authorization_url)
+
+    async def test02_callback(self):
+        client = self.web_app.test_client()
+        res = await client.get(
+            "/callback", query_string={"code": "xyz", "state": self.state}
+        )
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(self.web_app.finished)
+        self.assertIsNone(self.web_app.error)
+        self.assertEqual(self.web_app.token["access_token"], TOKEN["access_token"])
+        with open(self.tok_filepath) as tok_file:
+            self.assertEqual(json.load(tok_file)["access_token"], TOKEN["access_token"])
+
+        res = await client.get(
+            "/callback", query_string={"code": "xyz", "state": self.state}
+        )
+        self.assertEqual(res.status_code, 409)
+
+    async def test03_invalid_callback(self):
+        client = self.web_app.test_client()
+        res = await client.get("/callback", query_string={"code": "xyz", "state": "x"})
+        self.assertEqual(res.status_code, 400)
+        self.assertFalse(self.web_app.finished)
+
+        res = await client.get("/callback", query_string={"error": "access_denied"})
+        self.assertEqual(res.status_code, 400)
+        self.assertTrue(self.web_app.finished)
+        self.assertIsInstance(self.web_app.error, OAuthCallbackError)
+        self.assertIsNone(self.web_app.token)
+        self.assertFalse(os.path.exists(self.tok_filepath))
+
+    def _run_web_server(self, callback_params_list):
+        """Run uvicorn web server simulating the browser being redirected back
+        to it by the Authorisation Server with each of the callback parameters
+        given in turn"""
+        from contrail.security.onlineca.client.oauth2_uvicorn_server import (
+            run_oauth_flow_web_server,
+        )
+
+        responses = []
+
+        def browser(url):
+            def redirect():
+                for params in callback_params_list:
+                    responses.append(
+                        requests.get(
+                            self.settings["redirect_url"], params=params, timeout=5
+                        )
+                    )
+
+            threading.Thread(target=redirect, daemon=True).start()
+
+        with mock.patch("webbrowser.open", browser):
+            run_oauth_flow_web_server(self.settings, tok_filepath=self.tok_filepath)
+
+        return responses
+
+    def test04_web_server_invalid_state(self):
+        # The server carries on waiting after a callback with an invalid state
+        # parameter and stops once the token has been written out
+        responses = self._run_web_server(
+            [
+                {"code": "xyz", "state": "x"},
+                {"code": "xyz", "state": self.state},
+            ]
+        )
+        self.assertEqual([res.status_code for res in responses], [400, 200])
+        with open(self.tok_filepath) as tok_file:
+            self.assertEqual(json.load(tok_file)["access_token"], TOKEN["access_token"])
+
+    def test05_web_server_error_response(self):
+        with self.assertRaises(OAuthCallbackError):
+            self._run_web_server([{"error": "access_denied"}])
+
+        self.assertFalse(os.path.exists(self.tok_filepath))
+
+
+if __name__ == "__main__":
+    unittest.main()
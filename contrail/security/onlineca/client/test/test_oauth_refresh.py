@@ -0,0 +1,121 @@
+"""Online CA service client - OAuth 2.0 access token refresh unit tests
+
+Contrail Project
+"""
+__author__ = "P J Kershaw"
+__date__ = "16/10/26"
+__copyright__ = "Copyright 2026 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level directory"
+__contact__ = "Philip.Kershaw@stfc.ac.uk"
+import os
+import json
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from urllib.parse import parse_qs
+
+from contrail.security.onlineca.client import OnlineCaClient, OnlineCaClientError
+
+REFRESHED_TOKEN = {
+    "access_token": "refreshed",
+    "refresh_token": "refresh2",
+    "token_type": "Bearer",
+    "expires_in": 3600,
+}
+
+
+class _TokenRequestHandler(BaseHTTPRequestHandler):
+    """Stand-in for Authorisation Server token endpoint"""
+
+    def do_POST(self):
+        self.server.requests.append(
+            parse_qs(self.rfile.read(int(self.headers["Content-Length"])).decode())
+        )
+        body = json.dumps(REFRESHED_TOKEN).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class OAuthRefreshTestCase(unittest.TestCase):
+    """Test refresh of OAuth access tokens against a stand-in Authorisation
+    Server"""
+
+    def setUp(self):
+        self.token_server = HTTPServer(("127.0.0.1", 0), _TokenRequestHandler)
+        self.token_server.requests = []
+        threading.Thread(target=self.token_server.serve_forever, daemon=True).start()
+
+        self.tmp_dir = tempfile.mkdtemp()
+        self.tok_filepath = os.path.join(self.tmp_dir, "token.json")
+
+        self.clnt = OnlineCaClient()
+        self.clnt.oauth_refresh_settings = {
+            "token_url": f"http://127.0.0.1:{self.token_server.server_port}/token",
+            "client_id": "client",
+            "client_secret": "secret",
+            "tok_filepath": self.tok_filepath,
+        }
+
+        # Token endpoint is plain HTTP
+        os.environ["OAUTHLIB_INSECURE_TRANSPORT"] = "1"
+
+    def tearDown(self):
+        del os.environ["OAUTHLIB_INSECURE_TRANSPORT"]
+        self.token_server.shutdown()
+        self.token_server.server_close()
+        shutil.rmtree(self.tmp_dir)
+
+    def _make_token(self, expires_in):
+        return {
+            "access_token": "current",
+            "refresh_token": "refresh1",
+            "token_type": "Bearer",
+            "expires_at": time.time() + expires_in,
+        }
+
+    def test01_token_due_for_refresh(self):
+        token = self.clnt.refresh_oauth_tok(self._make_token(10))
+
+        self.assertEqual(token["access_token"], REFRESHED_TOKEN["access_token"])
+        self.assertEqual(self.token_server.requests[0]["refresh_token"], ["refresh1"])
+
+        # Written back to token file with permissions for owner only
+        self.assertEqual(OnlineCaClient.read_oauth_tok(self.tok_filepath), token)
+        self.assertEqual(os.stat(self.tok_filepath).st_mode & 0o777, 0o600)
+        self.assertEqual(os.listdir(self.tmp_dir), ["token.json"])
+
+    def test02_token_not_due_for_refresh(self):
+        access_token = self._make_token(3600)
+        token = self.clnt.refresh_oauth_tok(access_token)
+
+        self.assertIs(token, access_token)
+        self.assertEqual(self.token_server.requests, [])
+        self.assertFalse(os.path.exists(self.tok_filepath))
+
+    def test03_force_refresh(self):
+        token = self.clnt.refresh_oauth_tok(self._make_token(3600), force=True)
+        self.assertEqual(token["access_token"], REFRESHED_TOKEN["access_token"])
+
+    def test04_no_refresh_token(self):
+        access_token = self._make_token(10)
+        del access_token["refresh_token"]
+
+        with self.assertRaises(OnlineCaClientError):
+            self.clnt.refresh_oauth_tok(access_token)
+
+    def test05_invalid_settings(self):
+        with self.assertRaises(ValueError):
+            self.clnt.oauth_refresh_settings = {"token_url": "https://localhost/"}
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+"""Online CA service client - stand-in Online CA server and load generator
+unit tests
+
+Contrail Project
+"""
+__author__ = "P J Kershaw"
+__date__ = "16/10/26"
+__copyright__ = "Copyright 2026 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level directory"
+__contact__ = "Philip.Kershaw@stfc.ac.uk"
+import os
+import tempfile
+import unittest
+
+from contrail.security.onlineca.client import (
+    OnlineCaClient,
+    OnlineCaClientErrorResponse,
+)
+from contrail.security.onlineca.client.test import TEST_CA_DIR
+from contrail.security.onlineca.client.test.benchmark.load_test import run_load
+from contrail.security.onlineca.client.test.stand_in_server import (
+    StandInOnlineCaServer,
+)
+
+
+class StandInOnlineCaServerTestCase(unittest.TestCase):
+    """Test OnlineCaClient calls against the stand-in server"""
+
+    USERNAME = "testuser"
+    PASSWORD = "changeme"
+
+    def _create_client(self):
+        onlineca_client = OnlineCaClient()
+        onlineca_client.key_type = OnlineCaClient.KEY_TYPE_EC_P256
+        self.addCleanup(onlineca_client.close)
+        return onlineca_client
+
+    def test01_get_certificate(self):
+        server = StandInOnlineCaServer(port=0)
+        with server.run_in_thread():
+            key_pair, certs = self._create_client().get_certificate(
+                self.USERNAME, self.PASSWORD, server.certificate_url
+            )
+
+        self.assertEqual(len(certs), 2)
+        self.assertEqual(certs[0].get_subject().CN, self.USERNAME)
+        self.assertEqual(certs[0].get_issuer().CN, server.CA_SUBJECT_NAME)
+        self.assertTrue(OnlineCaClient._is_ca_certificate(certs[1]))
+
+    def test02_get_trustroots(self):
+        server = StandInOnlineCaServer(port=0)
+        with server.run_in_thread(), tempfile.TemporaryDirectory() as tmp_dir:
+            onlineca_client = self._create_client()
+
+            # The directory is replaced by a symbolic link when it's updated
+            onlineca_client.ca_cert_dir = os.path.join(tmp_dir, "ca")
+            trustroots = onlineca_client.get_trustroots(
+                server.trustroots_url, write_to_ca_cert_dir=True, bootstrap=True
+            )
+
+            # Second call is answered with 304 Not Modified
+            self.assertEqual(
+                onlineca_client.get_trustroots(
+                    server.trustroots_url, write_to_ca_cert_dir=True, bootstrap=True
+                ),
+                trustroots,
+            )
+
+        file_names = {file_name.decode() for file_name in trustroots}
+        self.assertEqual(
+            file_names, set(os.listdir(TEST_CA_DIR)) | {server.ca_cert_file_name}
+        )
+        self.assertEqual(
+            trustroots[server.ca_cert_file_name.encode()], server.ca_cert_pem
+        )
+
+    def test03_error_injection(self):
+        server = StandInOnlineCaServer(port=0, error_rate=1.0, error_status=503)
+        with server.run_in_thread():
+            with self.assertRaises(OnlineCaClientErrorResponse) as cm:
+                self._create_client().get_certificate(
+                    self.USERNAME, self.PASSWORD, server.certificate_url
+                )
+
+        self.assertEqual(cm.exception.http_resp.status_code, 503)
+        self.assertEqual(server.n_errors, 1)
+
+        with self.assertRaises(ValueError):
+            StandInOnlineCaServer(port=0, error_rate=2.0)
+
+    def test04_tls(self):
+        server = StandInOnlineCaServer(port=0, use_tls=True)
+        with server.run_in_thread(), tempfile.TemporaryDirectory() as tmp_dir:
+            server.write_ca_cert(tmp_dir)
+            onlineca_client = self._create_client()
+            onlineca_client.ca_cert_dir = tmp_dir
+            key_pair, certs = onlineca_client.get_certificate(
+                self.USERNAME, self.PASSWORD, server.certificate_url
+            )
+
+        self.assertTrue(server.certificate_url.startswith("https://"))
+        self.assertEqual(certs[0].get_subject().CN, self.USERNAME)
+
+    def test05_run_load(self):
+        n_requests = 20
+        server = StandInOnlineCaServer(port=0, latency=0.001)
+        with server.run_in_thread():
+            stats = run_load(
+                self._create_client(),
+                server.certificate_url,
+                rate=200.0,
+                n_requests=n_requests,
+                n_workers=4,
+            )
+
+        self.assertEqual(stats["n_requests"], n_requests)
+        self.assertEqual(stats["n_errors"], 0)
+        self.assertEqual(server.n_requests, n_requests)
+        self.assertGreater(stats["throughput"], 0.0)
+        self.assertLessEqual(stats["p50"], stats["p95"])
+        self.assertLessEqual(stats["p95"], stats["p99"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,422 @@
+"""Online CA service client - trust roots file handling unit tests
+
+Contrail Project
+"""
+__author__ = "P J Kershaw"
+__date__ = "16/10/26"
+__copyright__ = "Copyright 2026 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level directory"
+__contact__ = "Philip.Kershaw@stfc.ac.uk"
+import os
+import json
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from OpenSSL import crypto
+
+from contrail.security.onlineca.client import OnlineCaClient
+from contrail.security.onlineca.client.trustroots_sync import (
+    MANIFEST_FILE_NAME,
+    sync_trustroots_dir,
+    TrustrootFileNameError,
+)
+from contrail.security.onlineca.client.test import TEST_CA_DIR, TEST_DIR
+from contrail.security.onlineca.client.test.stand_in_server import (
+    StandInOnlineCaServer,
+)
+
+
+class TrustrootsTestCase(unittest.TestCase):
+    """Test writing of trust roots and saving of validators for conditional
+    refresh"""
+
+    SERVER_URL = "https://localhost:10443/onlineca/trustroots/"
+    FILES_DICT = {b"ca1.0": b"ca1 content", b"ca2.0": b"ca2 content"}
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.onlineca_client = OnlineCaClient()
+        self.onlineca_client.ca_cert_dir = os.path.join(self.tmp_dir, "ca")
+
+    def tearDown(self):
+        self.onlineca_client.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test01_write_changed_files_only(self):
+        written_file_names = self.onlineca_client._write_trustroots(self.FILES_DICT)
+        self.assertEqual(sorted(written_file_names), [u"ca1.0", u"ca2.0"])
+
+        files_dict = {b"ca1.0": b"ca1 content", b"ca2.0": b"new ca2 content"}
+        written_file_names = self.onlineca_client._write_trustroots(files_dict)
+        self.assertEqual(written_file_names, [u"ca2.0"])
+
+    def test02_save_and_read_validators(self):
+        self.onlineca_client._write_trustroots(self.FILES_DICT)
+        self.onlineca_client._write_trustroots_validators(
+            self.SERVER_URL, {"ETag": '"v1"'}, self.FILES_DICT
+        )
+        # Validators are kept in the CA directory and aren't a trust root
+        self.assertEqual(
+            os.path.dirname(self.onlineca_client.trustroots_validators_filepath),
+            self.onlineca_client.ca_cert_dir,
+        )
+        self.assertEqual(os.listdir(self.tmp_dir), ["ca"])
+        self.assertEqual(
+            sorted(OnlineCaClient._read_ca_cert_dir(self.onlineca_client.ca_cert_dir)),
+            sorted(file_name.decode() for file_name in self.FILES_DICT),
+        )
+
+        validators = self.onlineca_client._read_trustroots_validators(
+            self.SERVER_URL
+        )
+        self.assertEqual(
+            self.onlineca_client._get_conditional_headers(validators),
+            {"If-None-Match": '"v1"'},
+        )
+        self.assertEqual(
+            self.onlineca_client._read_trustroots(validators["files"]),
+            self.FILES_DICT,
+        )
+
+        # Validators are specific to the server they were obtained from
+        self.assertIsNone(
+            self.onlineca_client._read_trustroots_validators("https://other/")
+        )
+
+    def test03_missing_file_invalidates_validators(self):
+        self.onlineca_client._write_trustroots(self.FILES_DICT)
+        os.unlink(os.path.join(self.onlineca_client.ca_cert_dir, "ca1.0"))
+
+        self.assertIsNone(
+            self.onlineca_client._read_trustroots([u"ca1.0", u"ca2.0"])
+        )
+
+    def test04_ssl_context(self):
+        self.onlineca_client.ca_cert_dir = TEST_CA_DIR
+        ssl_context = self.onlineca_client.ssl_context
+        self.assertEqual(ssl_context.cert_store_stats()["x509_ca"], 2)
+        self.assertIs(self.onlineca_client.http_adapter.ssl_context, ssl_context)
+
+        # Context is re-used until the trust roots change
+        self.assertIs(self.onlineca_client.ssl_context, ssl_context)
+
+        files_dict = OnlineCaClient._read_ca_cert_dir(TEST_CA_DIR)
+        self.onlineca_client.ca_cert_dir = os.path.join(self.tmp_dir, "ca")
+        self.assertIsNone(self.onlineca_client.ssl_context)
+
+        self.onlineca_client._write_trustroots(files_dict)
+        ssl_context = self.onlineca_client.ssl_context
+        self.assertEqual(ssl_context.cert_store_stats()["x509_ca"], 2)
+
+        self.onlineca_client._write_trustroots(files_dict)
+        self.assertIs(self.onlineca_client.ssl_context, ssl_context)
+
+    def test05_iter_parse_trustroots(self):
+        lines = [b"ca1.0=Y2ExIGNvbnRlbnQ=", b"", b"ca2.0=Y2EyIGNvbnRlbnQ=\r"]
+        self.assertEqual(
+            list(OnlineCaClient._iter_parse_trustroots(iter(lines))),
+            sorted(self.FILES_DICT.items()),
+        )
+
+    def test06_conditional_request(self):
+        server = StandInOnlineCaServer(port=0)
+        with server.run_in_thread():
+            trustroots = self.onlineca_client.get_trustroots(
+                server.trustroots_url, write_to_ca_cert_dir=True
+            )
+            ca_cert_dir = os.path.realpath(self.onlineca_client.ca_cert_dir)
+            file_stats = self._stat_files(ca_cert_dir)
+
+            self.assertEqual(
+                self.onlineca_client.get_trustroots(
+                    server.trustroots_url, write_to_ca_cert_dir=True
+                ),
+                trustroots,
+            )
+
+            # Last-Modified alone is enough for a conditional request
+            validators_filepath = self.onlineca_client.trustroots_validators_filepath
+            with open(validators_filepath) as validators_file:
+                validators = json.load(validators_file)
+
+            del validators["etag"]
+            with open(validators_filepath, "w") as validators_file:
+                json.dump(validators, validators_file)
+
+            self.assertEqual(
+                self.onlineca_client.get_trustroots(
+                    server.trustroots_url, write_to_ca_cert_dir=True
+                ),
+                trustroots,
+            )
+
+        self.assertEqual(
+            server.trustroots_request_headers,
+            [
+                {},
+                {
+                    "If-None-Match": server.trustroots_etag,
+                    "If-Modified-Since": server.trustroots_last_modified,
+                },
+                {"If-Modified-Since": server.trustroots_last_modified},
+            ],
+        )
+
+        # 304 Not Modified responses leave the directory as it was
+        self.assertEqual(
+            os.path.realpath(self.onlineca_client.ca_cert_dir), ca_cert_dir
+        )
+        self.assertEqual(self._stat_files(ca_cert_dir), file_stats)
+
+    def test07_iter_trustroots(self):
+        server = StandInOnlineCaServer(port=0)
+        with server.run_in_thread():
+            trustroots = dict(
+                self.onlineca_client.iter_trustroots(server.trustroots_url)
+            )
+            self.assertEqual(
+                trustroots, self.onlineca_client.get_trustroots(server.trustroots_url)
+            )
+
+        self.assertEqual(
+            trustroots[server.ca_cert_file_name.encode()], server.ca_cert_pem
+        )
+        self.assertEqual(len(trustroots), len(os.listdir(TEST_CA_DIR)) + 1)
+
+    def test08_sync_trustroots(self):
+        server = StandInOnlineCaServer(port=0)
+        with server.run_in_thread(), mock.patch.object(
+            OnlineCaClient,
+            "_read_ca_cert_dir",
+            wraps=OnlineCaClient._read_ca_cert_dir,
+        ) as read_ca_cert_dir:
+            written_file_names = self.onlineca_client.sync_trustroots(
+                server.trustroots_url
+            )
+
+            # Files aren't read back once written. The directory is read only
+            # for the SSL context used to make the request
+            self.assertEqual(read_ca_cert_dir.call_count, 1)
+            ca_cert_dir = os.path.realpath(self.onlineca_client.ca_cert_dir)
+
+            # Unchanged - answered with 304 Not Modified
+            self.assertEqual(
+                self.onlineca_client.sync_trustroots(server.trustroots_url), []
+            )
+
+            # Full download of the same files leaves the directory as it was
+            self.assertEqual(
+                self.onlineca_client.sync_trustroots(
+                    server.trustroots_url, conditional=False
+                ),
+                [],
+            )
+
+        self.assertEqual(
+            sorted(written_file_names),
+            sorted(os.listdir(TEST_CA_DIR) + [server.ca_cert_file_name]),
+        )
+
+        # Any other entries are subject hash links or hidden files
+        for file_name in os.listdir(self.onlineca_client.ca_cert_dir):
+            if file_name not in written_file_names and not file_name.startswith("."):
+                self.assertTrue(os.path.islink(os.path.join(ca_cert_dir, file_name)))
+        self.assertEqual(
+            os.path.realpath(self.onlineca_client.ca_cert_dir), ca_cert_dir
+        )
+        self.assertEqual(
+            self.onlineca_client._read_trustroots(written_file_names)[
+                server.ca_cert_file_name.encode()
+            ],
+            server.ca_cert_pem,
+        )
+        self.assertEqual(len(server.trustroots_request_headers), 3)
+
+        # Trust roots written are used to verify servers
+        self.assertEqual(
+            self.onlineca_client.ssl_context.cert_store_stats()["x509_ca"],
+            len(written_file_names),
+        )
+
+    def test09_atomic_swap(self):
+        with self.assertRaises(TypeError):
+            self.onlineca_client.trustroots_atomic_swap = "yes"
+
+        self.onlineca_client._write_trustroots(self.FILES_DICT)
+        self.assertFalse(os.path.islink(self.onlineca_client.ca_cert_dir))
+
+        # Only a directory created by an atomic update is swapped
+        self.onlineca_client.ca_cert_dir = os.path.join(self.tmp_dir, "ca-swapped")
+        self.onlineca_client.trustroots_atomic_swap = True
+        self.onlineca_client._write_trustroots(self.FILES_DICT)
+        self.assertTrue(os.path.islink(self.onlineca_client.ca_cert_dir))
+
+    @staticmethod
+    def _stat_files(dir_path):
+        # The validators file is edited by the tests
+        file_stats = {}
+        for file_name in os.listdir(dir_path):
+            if file_name == OnlineCaClient.TRUSTROOTS_VALIDATORS_FILENAME:
+                continue
+
+            file_stat = os.lstat(os.path.join(dir_path, file_name))
+            file_stats[file_name] = file_stat.st_ino, file_stat.st_mtime_ns
+
+        return file_stats
+
+
+class TrustrootsDirSyncTestCase(unittest.TestCase):
+    """Test update of CA trust roots directory"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.ca_cert_dir = os.path.join(self.tmp_dir, "ca")
+
+        with open(os.path.join(TEST_DIR, "localhost.crt"), "rb") as cert_file:
+            self.cert_pem = cert_file.read()
+
+        cert = crypto.load_certificate(crypto.FILETYPE_PEM, self.cert_pem)
+        self.hash_link_name = "%08x.0" % cert.subject_name_hash()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test01_sync_creates_hash_links(self):
+        for atomic_swap in (False, True):
+            with self.subTest(atomic_swap=atomic_swap):
+                ca_cert_dir = os.path.join(self.tmp_dir, "ca-%s" % atomic_swap)
+                sync_trustroots_dir(
+                    ca_cert_dir,
+                    [("localhost.pem", self.cert_pem), ("policy", b"x")],
+                    atomic_swap=atomic_swap,
+                )
+
+                self.assertEqual(os.path.islink(ca_cert_dir), atomic_swap)
+                hash_link_path = os.path.join(ca_cert_dir, self.hash_link_name)
+                self.assertEqual(os.readlink(hash_link_path), "localhost.pem")
+                self.assertEqual(
+                    sorted(
+                        file_name
+                        for file_name in os.listdir(ca_cert_dir)
+                        if not file_name.startswith(".")
+                    ),
+                    sorted(["localhost.pem", "policy", self.hash_link_name]),
+                )
+
+    def test02_sync_swaps_directory(self):
+        sync_trustroots_dir(
+            self.ca_cert_dir, [("a", b"a"), ("b", b"b")], atomic_swap=True
+        )
+        previous_dirpath = os.path.realpath(self.ca_cert_dir)
+
+        # Unchanged - no new version is created
+        self.assertEqual(
+            sync_trustroots_dir(
+                self.ca_cert_dir, [("a", b"a"), ("b", b"b")], atomic_swap=True
+            ),
+            [],
+        )
+        self.assertEqual(os.path.realpath(self.ca_cert_dir), previous_dirpath)
+
+        # Stale file b is dropped and the previous version removed
+        written_file_names = sync_trustroots_dir(
+            self.ca_cert_dir, [("a", b"a"), ("c", b"c")], atomic_swap=True
+        )
+        self.assertEqual(written_file_names, ["c"])
+        self.assertEqual(sorted(os.listdir(self.ca_cert_dir)), ["a", "c"])
+        self.assertFalse(os.path.exists(previous_dirpath))
+        # Only the link and the current version remain
+        self.assertEqual(len(os.listdir(self.tmp_dir)), 2)
+
+    def test03_existing_directory_not_swapped(self):
+        os.makedirs(self.ca_cert_dir)
+        with open(os.path.join(self.ca_cert_dir, "local"), "wb") as ca_file:
+            ca_file.write(b"local")
+
+        self.assertEqual(
+            sync_trustroots_dir(self.ca_cert_dir, [("a", b"a")], atomic_swap=True),
+            ["a"],
+        )
+
+        # A directory which wasn't created by an atomic update is updated in
+        # place and keeps its other files
+        self.assertFalse(os.path.islink(self.ca_cert_dir))
+        self.assertEqual(
+            sorted(os.listdir(self.ca_cert_dir)), [MANIFEST_FILE_NAME, "a", "local"]
+        )
+        self.assertEqual(os.listdir(self.tmp_dir), ["ca"])
+
+    def test04_reject_invalid_file_names(self):
+        for file_name in ("../a", "a/b", os.path.join(self.tmp_dir, "a"), ".a", ""):
+            for atomic_swap in (True, False):
+                with self.subTest(file_name=file_name, atomic_swap=atomic_swap):
+                    with self.assertRaises(TrustrootFileNameError):
+                        sync_trustroots_dir(
+                            self.ca_cert_dir,
+                            [("b", b"b"), (file_name, b"a")],
+                            atomic_swap=atomic_swap,
+                        )
+
+                    shutil.rmtree(self.ca_cert_dir, ignore_errors=True)
+
+        # Nothing is written outside the CA directory
+        self.assertEqual(os.listdir(self.tmp_dir), [])
+
+    def test05_sync_in_place(self):
+        os.makedirs(self.ca_cert_dir)
+        with open(os.path.join(self.ca_cert_dir, "local"), "wb") as ca_file:
+            ca_file.write(b"local")
+
+        # Local file has the name the hash link would otherwise take
+        local_hash_link_path = os.path.join(self.ca_cert_dir, self.hash_link_name)
+        os.symlink("local", local_hash_link_path)
+
+        written_file_names = sync_trustroots_dir(
+            self.ca_cert_dir, [("a", b"a"), ("b.pem", self.cert_pem)]
+        )
+        self.assertEqual(written_file_names, ["a", "b.pem"])
+        self.assertFalse(os.path.islink(self.ca_cert_dir))
+        self.assertEqual(os.readlink(local_hash_link_path), "local")
+        hash_link_name = self.hash_link_name[:-1] + "1"
+        self.assertEqual(
+            os.readlink(os.path.join(self.ca_cert_dir, hash_link_name)), "b.pem"
+        )
+
+        # Stale file b.pem and its hash link written by the earlier update are
+        # removed. Files not written by an update are left alone
+        written_file_names = sync_trustroots_dir(
+            self.ca_cert_dir, [("a", b"a"), ("c", b"c")]
+        )
+        self.assertEqual(written_file_names, ["c"])
+        self.assertEqual(
+            sorted(os.listdir(self.ca_cert_dir)),
+            sorted([MANIFEST_FILE_NAME, "a", "c", "local", self.hash_link_name]),
+        )
+
+    @mock.patch(
+        "contrail.security.onlineca.client.trustroots_sync._is_symlink_supported",
+        return_value=False,
+    )
+    def test06_sync_without_symlinks(self, _):
+        for atomic_swap in (False, True):
+            with self.subTest(atomic_swap=atomic_swap):
+                self.assertEqual(
+                    sync_trustroots_dir(
+                        self.ca_cert_dir,
+                        [("localhost.pem", self.cert_pem)],
+                        atomic_swap=atomic_swap,
+                    ),
+                    # Unchanged the second time round
+                    [] if atomic_swap else ["localhost.pem"],
+                )
+                self.assertFalse(os.path.islink(self.ca_cert_dir))
+                self.assertEqual(
+                    sorted(os.listdir(self.ca_cert_dir)),
+                    [MANIFEST_FILE_NAME, "localhost.pem"],
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
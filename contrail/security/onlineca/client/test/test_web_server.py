@@ -0,0 +1,117 @@
+"""Online CA service client - stoppable web server unit tests
+
+Contrail Project
+"""
+__author__ = "P J Kershaw"
+__date__ = "16/10/26"
+__copyright__ = "Copyright 2026 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level directory"
+__contact__ = "Philip.Kershaw@stfc.ac.uk"
+import time
+import socket
+import threading
+import unittest
+
+import uvicorn
+
+from contrail.security.onlineca.client.web_server import (
+    StoppableWebServer,
+    WebServerStartupError,
+)
+
+
+async def _app(scope, receive, send):
+    if scope["type"] != "http":
+        return
+
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+class _TestWebServer(StoppableWebServer):
+    def __init__(self, config):
+        super().__init__(config)
+        self.n_on_started_calls = 0
+
+    def on_started(self):
+        self.n_on_started_calls += 1
+
+
+def _get_free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class StoppableWebServerTestCase(unittest.TestCase):
+    """Test start up and shutdown signalling for web server"""
+
+    def _create_server(self, port, server_class=_TestWebServer, **kwargs):
+        config = uvicorn.Config(_app, host="127.0.0.1", port=port, log_level="critical")
+        return server_class(config, **kwargs)
+
+    def test01_run_in_thread(self):
+        server = self._create_server(_get_free_port())
+
+        # Signal shutdown from another thread as the OAuth callback would
+        with server.run_in_thread():
+            self.assertTrue(server.started)
+            self.assertEqual(server.n_on_started_calls, 1)
+
+            threading.Timer(1.0, server.config.shutdown_queue.put, (True,)).start()
+            start_time = time.process_time()
+
+        # Waiting for the signal doesn't busy loop
+        self.assertLess(time.process_time() - start_time, 0.025)
+        self.assertTrue(server.should_exit)
+        self.assertEqual(server.n_on_started_calls, 1)
+
+    def test02_startup_error(self):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            sock.listen()
+            server = self._create_server(sock.getsockname()[1])
+
+            with self.assertRaises(WebServerStartupError):
+                with server.run_in_thread():
+                    pass
+
+        self.assertEqual(server.n_on_started_calls, 0)
+
+
+    def test03_thread_callback_subclass(self):
+        # Subclasses of earlier versions override thread_callback
+        with self.assertWarns(DeprecationWarning):
+
+            class _ThreadCallbackWebServer(StoppableWebServer):
+                n_calls = 0
+
+                def thread_callback(self):
+                    if self.started:
+                        self.n_calls += 1
+
+        server = self._create_server(
+            _get_free_port(), server_class=_ThreadCallbackWebServer
+        )
+        with server.run_in_thread():
+            server.config.shutdown_queue.put(True)
+
+        self.assertEqual(server.n_calls, 1)
+
+    def test04_thread_callback_keyword(self):
+        n_calls = []
+        with self.assertWarns(DeprecationWarning):
+            server = self._create_server(
+                _get_free_port(),
+                server_class=StoppableWebServer,
+                thread_callback=lambda: n_calls.append(1),
+            )
+
+        with server.run_in_thread():
+            server.config.shutdown_queue.put(True)
+
+        self.assertEqual(len(n_calls), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
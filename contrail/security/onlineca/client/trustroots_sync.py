@@ -0,0 +1,406 @@
+"""Online CA service client - synchronisation of CA trust roots directory
+
+Changed files are replaced one by one, files unchanged from the previous
+version aren't re-written and files the server no longer sends are removed.
+Only files written by an earlier update, recorded in a manifest file in the
+directory, are ever removed so that any other files in the directory are left
+alone. OpenSSL subject hash links are created in the style of c_rehash so that
+OpenSSL finds CA certificates by direct lookup.
+
+Optionally, a directory created by this module can instead be swapped
+atomically so that concurrent readers always see a complete set of files. The
+new version is written to a staging directory and the CA directory path is
+maintained as a symbolic link to the current version. A directory which
+already exists and wasn't created this way is always updated in place.
+
+File names are supplied by the server so each must be a plain file name not
+starting with "." or the update is rejected.
+
+Contrail Project
+"""
+__author__ = "P J Kershaw"
+__date__ = "16/10/26"
+__copyright__ = "Copyright 2026 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level directory"
+__contact__ = "Philip.Kershaw@stfc.ac.uk"
+import os
+import re
+import errno
+import shutil
+import logging
+import tempfile
+
+from OpenSSL import crypto
+
+from contrail.security.onlineca.client.openssl_utils import (
+    iter_pem_certificates,
+    PemParseError,
+)
+
+log = logging.getLogger(__name__)
+
+# Names of hash links are the subject name hash followed by a sequence number
+# to distinguish certificates with the same subject name
+HASH_LINK_NAME_FMT = "%08x.%d"
+HASH_LINK_NAME_PAT = re.compile(r"^[0-9a-f]{8}\.\d+$")
+TRUSTROOT_FILE_MODE = 0o644
+TRUSTROOT_DIR_MODE = 0o755
+
+# Names of the files and hash links written by an update are recorded in this
+# file so that only those are removed when the server stops sending them.
+# Names starting with "." are never accepted from the server
+MANIFEST_FILE_NAME = ".trustroots"
+
+
+class TrustrootFileNameError(ValueError):
+    """Trust root file name from the server isn't a plain file name"""
+
+
+def check_file_name(file_name):
+    """Check that a trust root file name from the server is a plain file name
+    which can be safely joined to the CA directory path. Names with a
+    directory component or starting with "." are rejected
+
+    :param file_name: file name
+    :type file_name: str
+    :raises TrustrootFileNameError: if the name is invalid
+    """
+    if (
+        not file_name
+        or os.path.basename(file_name) != file_name
+        or file_name.startswith(".")
+    ):
+        raise TrustrootFileNameError(f"Invalid trust root file name: {file_name!r}")
+
+
+def _is_symlink_supported():
+    return os.name == "posix" and hasattr(os, "symlink")
+
+
+def _read_file(filepath):
+    try:
+        with open(filepath, "rb") as trustroot_file:
+            return trustroot_file.read()
+    except (IOError, OSError):
+        return None
+
+
+def _write_file(filepath, content):
+    tmp_file_desc, tmp_filepath = tempfile.mkstemp(
+        dir=os.path.dirname(filepath), prefix="." + os.path.basename(filepath) + "."
+    )
+    try:
+        with os.fdopen(tmp_file_desc, "wb") as tmp_file:
+            tmp_file.write(content)
+
+        os.chmod(tmp_filepath, TRUSTROOT_FILE_MODE)
+        os.replace(tmp_filepath, filepath)
+    except BaseException:
+        os.unlink(tmp_filepath)
+        raise
+
+
+def _list_trustroot_files(dirpath):
+    """List regular files in a CA directory excluding hash links"""
+    try:
+        file_names = os.listdir(dirpath)
+    except (IOError, OSError):
+        return []
+
+    return [
+        file_name
+        for file_name in file_names
+        if not file_name.startswith(".")
+        and not os.path.islink(os.path.join(dirpath, file_name))
+    ]
+
+
+def get_subject_name_hash(content):
+    """Get OpenSSL subject name hash for a file containing a single PEM
+    encoded certificate
+
+    :param content: file content
+    :type content: bytes
+    :return: subject name hash or None if the content isn't a single
+    certificate
+    """
+    try:
+        certs = list(iter_pem_certificates(content))
+    except (PemParseError, crypto.Error):
+        return None
+
+    if len(certs) != 1:
+        return None
+
+    return certs[0].subject_name_hash()
+
+
+def make_hash_links(dirpath, file_names):
+    """Create OpenSSL subject hash symbolic links to CA certificate files in
+    a directory in the manner of c_rehash. Files already named by their hash
+    are left as they are.
+
+    :param dirpath: CA directory
+    :param file_names: names of files in the directory
+    :return: dictionary of link names and the file names they link to
+    """
+    links = _get_hash_links(dirpath, file_names)
+    for link_name, file_name in links.items():
+        os.symlink(file_name, os.path.join(dirpath, link_name))
+
+    return links
+
+
+def _get_hash_links(dirpath, file_names, reserved_names=()):
+    """Get names of OpenSSL subject hash links for CA certificate files
+
+    :param dirpath: CA directory
+    :param file_names: names of files in the directory
+    :param reserved_names: names of other files in the directory which links
+    mustn't replace
+    :return: dictionary of link names and the file names they link to
+    """
+    hashes = {}
+    for file_name in file_names:
+        subject_name_hash = get_subject_name_hash(
+            _read_file(os.path.join(dirpath, file_name)) or b""
+        )
+        if subject_name_hash is not None:
+            hashes[file_name] = subject_name_hash
+
+    # Reserve names of files already named by their hash so that links don't
+    # clash with them
+    used_names = set(file_names).union(reserved_names)
+    links = {}
+    for file_name, subject_name_hash in sorted(hashes.items()):
+        if HASH_LINK_NAME_PAT.match(file_name) and file_name.startswith(
+            "%08x." % subject_name_hash
+        ):
+            continue
+
+        seq_num = 0
+        while HASH_LINK_NAME_FMT % (subject_name_hash, seq_num) in used_names:
+            seq_num += 1
+
+        link_name = HASH_LINK_NAME_FMT % (subject_name_hash, seq_num)
+        used_names.add(link_name)
+        links[link_name] = file_name
+
+    return links
+
+
+def sync_trustroots_dir(ca_cert_dir, files, atomic_swap=False):
+    """Synchronise CA directory with a set of trust root files. By default
+    files are updated in place. Only files written by an earlier update are
+    removed
+
+    :param ca_cert_dir: CA directory path
+    :param files: iterable of file name and file content pairs
+    :type files: iterable of (str, bytes) tuples
+    :param atomic_swap: set to True to write the new set of files to a
+    staging directory and swap it in atomically. ca_cert_dir is then a
+    symbolic link to the current version. This applies only where symbolic
+    links are supported and ca_cert_dir doesn't exist or was created in this
+    way. Any other directory is updated in place
+    :return: list of names of files which were added or changed
+    """
+    if (
+        atomic_swap
+        and _is_symlink_supported()
+        and _is_swappable_dir(os.path.abspath(ca_cert_dir).rstrip(os.sep))
+    ):
+        return _sync_trustroots_dir_atomic(ca_cert_dir, files)
+
+    return _sync_trustroots_dir_in_place(ca_cert_dir, files)
+
+
+def _is_staging_dir(ca_cert_dir, dirpath):
+    """Check a path is a staging directory for the CA directory"""
+    parent_dirpath, ca_cert_dirname = os.path.split(ca_cert_dir)
+    return os.path.dirname(dirpath) == os.path.realpath(
+        parent_dirpath
+    ) and os.path.basename(dirpath).startswith("." + ca_cert_dirname + ".")
+
+
+def _is_swappable_dir(ca_cert_dir):
+    """Check that the CA directory either doesn't exist or is a symbolic link
+    to a staging directory created by an earlier atomic update"""
+    if not os.path.lexists(ca_cert_dir):
+        return True
+
+    return os.path.islink(ca_cert_dir) and _is_staging_dir(
+        ca_cert_dir, os.path.realpath(ca_cert_dir)
+    )
+
+
+def _sync_trustroots_dir_atomic(ca_cert_dir, files):
+    """Write the new set of files to a staging directory and swap it in
+    atomically in place of the previous version"""
+    ca_cert_dir = os.path.abspath(ca_cert_dir).rstrip(os.sep)
+    parent_dirpath, ca_cert_dirname = os.path.split(ca_cert_dir)
+    if not os.path.isdir(parent_dirpath):
+        os.makedirs(parent_dirpath)
+
+    current_file_names = set(_list_trustroot_files(ca_cert_dir))
+
+    staging_dirpath = tempfile.mkdtemp(
+        dir=parent_dirpath, prefix="." + ca_cert_dirname + "."
+    )
+    try:
+        os.chmod(staging_dirpath, TRUSTROOT_DIR_MODE)
+
+        written_file_names = []
+        file_names = []
+        for file_name, file_content in files:
+            check_file_name(file_name)
+            file_names.append(file_name)
+            staging_filepath = os.path.join(staging_dirpath, file_name)
+
+            if file_name in current_file_names:
+                current_filepath = os.path.join(ca_cert_dir, file_name)
+                if _read_file(current_filepath) == file_content:
+                    try:
+                        os.link(current_filepath, staging_filepath)
+                        continue
+                    except (IOError, OSError):
+                        # e.g. removed by a concurrent update
+                        pass
+
+            with open(staging_filepath, "wb") as staging_file:
+                staging_file.write(file_content)
+
+            os.chmod(staging_filepath, TRUSTROOT_FILE_MODE)
+            written_file_names.append(file_name)
+
+        if (
+            not written_file_names
+            and current_file_names == set(file_names)
+            and os.path.islink(ca_cert_dir)
+        ):
+            log.debug("CA trust roots in %r are unchanged", ca_cert_dir)
+            shutil.rmtree(staging_dirpath)
+            return written_file_names
+
+        make_hash_links(staging_dirpath, file_names)
+        _swap_dir(ca_cert_dir, staging_dirpath)
+
+    except BaseException:
+        shutil.rmtree(staging_dirpath, ignore_errors=True)
+        raise
+
+    log.debug(
+        "Synchronised %d CA trust root files in %r (%d added or changed)",
+        len(file_names),
+        ca_cert_dir,
+        len(written_file_names),
+    )
+    return written_file_names
+
+
+def _swap_dir(ca_cert_dir, staging_dirpath):
+    """Point CA directory symbolic link at the staging directory and remove
+    the previous version"""
+    previous_dirpath = None
+    if os.path.islink(ca_cert_dir):
+        previous_dirpath = os.path.realpath(ca_cert_dir)
+
+    # Create link under a temporary name and rename over the old one. Link
+    # is relative so that the parent directory can be moved
+    _write_link(ca_cert_dir, os.path.basename(staging_dirpath))
+
+    # Only ever remove staging directories created here
+    if previous_dirpath is not None and _is_staging_dir(
+        ca_cert_dir, previous_dirpath
+    ):
+        shutil.rmtree(previous_dirpath, ignore_errors=True)
+
+
+def _write_link(link_filepath, target):
+    """Create or replace a symbolic link atomically"""
+    dirpath, link_name = os.path.split(link_filepath)
+    tmp_link_filepath = os.path.join(
+        dirpath, ".%s.%s.link" % (link_name, os.urandom(8).hex())
+    )
+    os.symlink(target, tmp_link_filepath)
+    try:
+        os.replace(tmp_link_filepath, link_filepath)
+    except BaseException:
+        os.unlink(tmp_link_filepath)
+        raise
+
+
+def _sync_trustroots_dir_in_place(ca_cert_dir, files):
+    """Replace changed files one by one and remove stale ones. Only files and
+    hash links recorded in the manifest as written by an earlier update are
+    removed. Any other files in the directory are left in place"""
+    try:
+        os.makedirs(ca_cert_dir)
+    except OSError as e:
+        # Ignore if the path already exists
+        if e.errno != errno.EEXIST:
+            raise
+
+    manifest_filepath = os.path.join(ca_cert_dir, MANIFEST_FILE_NAME)
+    managed_names = set(_read_manifest(manifest_filepath))
+    file_names = []
+    written_file_names = []
+    for file_name, file_content in files:
+        check_file_name(file_name)
+        file_names.append(file_name)
+        filepath = os.path.join(ca_cert_dir, file_name)
+        if _read_file(filepath) == file_content:
+            continue
+
+        _write_file(filepath, file_content)
+        written_file_names.append(file_name)
+
+    links = {}
+    if _is_symlink_supported():
+        # Links mustn't replace files which weren't written by an update
+        local_names = set(os.listdir(ca_cert_dir)) - managed_names
+        links = _get_hash_links(ca_cert_dir, file_names, reserved_names=local_names)
+        for link_name, file_name in links.items():
+            link_filepath = os.path.join(ca_cert_dir, link_name)
+            if os.path.islink(link_filepath):
+                if os.readlink(link_filepath) == file_name:
+                    continue
+
+            _write_link(link_filepath, file_name)
+
+    # Record the new set of files before removing stale ones so that an
+    # interrupted update never leaves files which won't be cleaned up
+    new_names = set(file_names).union(links)
+    _write_file(manifest_filepath, "\n".join(sorted(new_names)).encode())
+
+    for file_name in managed_names - new_names:
+        try:
+            os.unlink(os.path.join(ca_cert_dir, file_name))
+        except FileNotFoundError:
+            pass
+
+    log.debug(
+        "Synchronised %d CA trust root files in %r (%d added or changed)",
+        len(file_names),
+        ca_cert_dir,
+        len(written_file_names),
+    )
+    return written_file_names
+
+
+def _read_manifest(manifest_filepath):
+    """Read names of files written by an earlier in place update. Invalid
+    names are ignored"""
+    content = _read_file(manifest_filepath)
+    if content is None:
+        return []
+
+    file_names = []
+    for file_name in content.decode("utf-8", "replace").splitlines():
+        try:
+            check_file_name(file_name)
+        except TrustrootFileNameError:
+            continue
+
+        file_names.append(file_name)
+
+    return file_names
@@ -10,13 +10,17 @@ __license__ = "BSD - see LICENSE file in top-level directory"
 __contact__ = "Philip.Kershaw@stfc.ac.uk"
 import contextlib
 import threading
-import time
-from queue import Queue
+import warnings
+from queue import Queue, Empty
 from collections.abc import Generator
 
 import uvicorn
 import socket
-from typing import Optional, List
+from typing import Callable, Optional, List
+
+
+class WebServerStartupError(Exception):
+    """Web server failed to start"""
 
 
 class StoppableWebServer(uvicorn.Server):
@@ -27,9 +31,50 @@ class StoppableWebServer(uvicorn.Server):
     shutdown_queue which is a queue.Queue object
     """
 
-    def __init__(self, config: uvicorn.Config) -> None:
+    # Maximum time to block waiting for the server. Waits are made in steps
+    # of this length so that the main thread can respond to a keyboard
+    # interrupt and detect the server thread exiting unexpectedly
+    WAIT_TIMEOUT = 0.5
+
+    def __init__(
+        self,
+        config: uvicorn.Config,
+        thread_callback: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """
+        :param config: server configuration
+        :param thread_callback: deprecated - override on_started instead.
+        Function called once the server has started
+        """
         super().__init__(config)
         self.config.shutdown_queue = Queue()
+        self.started_event = threading.Event()
+
+        if thread_callback is not None:
+            warnings.warn(
+                "thread_callback is deprecated; override on_started instead",
+                DeprecationWarning,
+                stacklevel=2,
+            )
+            self.thread_callback = thread_callback
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        if "thread_callback" in cls.__dict__:
+            warnings.warn(
+                f"{cls.__name__}.thread_callback is deprecated; override "
+                "on_started instead",
+                DeprecationWarning,
+                stacklevel=2,
+            )
+
+    async def startup(self, sockets: Optional[List[socket.socket]] = None) -> None:
+        """Extend base implementation to signal when the server has started
+        or failed to start"""
+        try:
+            await super().startup(sockets)
+        finally:
+            self.started_event.set()
 
     async def serve(self, sockets: Optional[List[socket.socket]] = None) -> None:
         """Override base implementation in order to catch exceptions and make
@@ -40,25 +85,59 @@ class StoppableWebServer(uvicorn.Server):
         except (Exception, BaseException):
             # Use queue to signal to top-level loop to break
             self.config.shutdown_queue.put(True)
+            self.started_event.set()
+
+    def _wait(self, thread: threading.Thread, wait_func) -> None:
+        """Call wait_func with a timeout until it returns True or the server
+        thread exits"""
+        while not wait_func(self.__class__.WAIT_TIMEOUT):
+            if not thread.is_alive():
+                return
+
+    def _wait_for_shutdown_signal(self, timeout: float) -> bool:
+        try:
+            self.config.shutdown_queue.get(timeout=timeout)
+        except Empty:
+            return False
+
+        return True
 
     @contextlib.contextmanager
     def run_in_thread(self) -> Generator[None, None, None]:
+        """Start the server in a new thread. The body of the with statement is
+        executed once the server has started. On leaving it, the server is
+        stopped as soon as a shutdown signal is received via the queue
+        """
         thread = threading.Thread(target=self.run)
         thread.start()
 
         try:
+            self._wait(thread, self.started_event.wait)
+            if not self.started:
+                raise WebServerStartupError(
+                    f"Error starting web server on "
+                    f"{self.config.host}:{self.config.port}"
+                )
+
+            self.on_started()
+            yield
+
             # Flow complete Queue object is used to flag that the OAuth
             # process has been completed
-            while self.config.shutdown_queue.qsize() < 1:
-                time.sleep(1e-3)
-                self.thread_callback()
-            yield
+            self._wait(thread, self._wait_for_shutdown_signal)
         finally:
             self.should_exit = True
             thread.join()
 
-    def thread_callback(self):
-        """Callback function for loop - make an alternative method in a subclass
-        allow application of custom behaviours
+    def on_started(self) -> None:
+        """Called once the server has started and is ready to receive client
+        requests - make an alternative method in a subclass to apply custom
+        behaviours
+        """
+        self.thread_callback()
+
+    def thread_callback(self) -> None:
+        """Deprecated - override on_started instead. For compatibility, this
+        is called once from on_started when the server has started
         """
         pass
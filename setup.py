@@ -46,7 +46,7 @@ The code has been developed for the EU Contrail Project.
 
 Prerequisites
 =============
-This has been developed and tested for Python 2.7 and Python 3.6.
+Python 3.9 or later is required.
 
 Installation
 ============
@@ -62,14 +62,15 @@ Examples are contained in ``onlineca.client.test``.
     maintainer_email="Philip.Kershaw@stfc.ac.uk",
     url="https://github.com/cedadev/online_ca_client",
     platforms=["POSIX", "Linux", "Windows"],
+    python_requires=">=3.9",
     install_requires=[
         "requests_oauthlib",
         "types-requests",
         "six",
         "types-six",
         "PyOpenSSL",
+        "cryptography",
         "types-pyOpenSSL",
-        "asn1crypto",
         "quart",
         "pyyaml",
         "types-PyYAML",
@@ -78,6 +79,9 @@ Examples are contained in ``onlineca.client.test``.
         "types-urllib3",
         "typing_extensions"
     ],
+    extras_require={
+        "async": ["aiohttp"],
+    },
     license=__license__,
     test_suite="contrail.security.onlineca.client.test",
     packages=find_packages(),